@@ -24,17 +24,28 @@ class DatabaseManager:
         'restaurants': 'restaurants'
     }
     
-    def __init__(self, db_type, database=None):
+    # storage-engine row reads of the session (summed before/after a query)
+    HANDLER_READ_SQL = (
+        "SHOW SESSION STATUS WHERE Variable_name IN ("
+        "'Handler_read_first', 'Handler_read_key', 'Handler_read_last', 'Handler_read_next', "
+        "'Handler_read_prev', 'Handler_read_rnd', 'Handler_read_rnd_next')"
+    )
+
+    def __init__(self, db_type, database=None, track_rows_examined=False):
         """
         Initialize database manager
         
         Args:
             db_type: 'mysql' or 'mariadb'
             database: Optional specific database
+            track_rows_examined: Report rows read by the storage engine per query
+                (Handler_read% deltas; two extra status queries per execution)
         """
         self.db_type = db_type.lower()
         self.database = database
         self.engine = get_engine(self.db_type, database)
+        self.track_rows_examined = track_rows_examined
+        self._status_reads = None  # Handler_read% increments caused by the status query itself
         
         print(f"✅ Connected to {self.db_type.upper()}")
         if database:
@@ -55,13 +66,21 @@ class DatabaseManager:
                 'result': DataFrame or None,
                 'rows_affected': int,
                 'execution_time': float,
+                'rows_examined': int or None (only with track_rows_examined),
                 'error': str or None
             }
         """
         start_time = time.time()
+        status_time = 0.0
+        rows_examined = None
         
         try:
             with self.engine.connect() as conn:
+                if self.track_rows_examined:
+                    t = time.time()
+                    reads_before = self._handler_reads(conn)
+                    status_time += time.time() - t
+
                 result = conn.execute(text(sql), params or {})
                 
                 if result.returns_rows:
@@ -70,31 +89,57 @@ class DatabaseManager:
                 else:
                     df = None
                     rows_affected = result.rowcount
+
+                if self.track_rows_examined:
+                    t = time.time()
+                    reads_after = self._handler_reads(conn)
+                    if reads_before is not None and reads_after is not None:
+                        rows_examined = max(0, reads_after - reads_before - self._status_overhead(conn))
+                    status_time += time.time() - t
                 
                 conn.commit()
                 
-            execution_time = time.time() - start_time
+            # status queries are not part of the query's time
+            execution_time = time.time() - start_time - status_time
             
             return {
                 'success': True,
                 'result': df,
                 'rows_affected': rows_affected,
                 'execution_time': execution_time,
+                'rows_examined': rows_examined,
                 'error': None,
                 'db_type': self.db_type
             }
             
         except Exception as e:
-            execution_time = time.time() - start_time
+            execution_time = time.time() - start_time - status_time
             
             return {
                 'success': False,
                 'result': None,
                 'rows_affected': 0,
                 'execution_time': execution_time,
+                'rows_examined': None,
                 'error': str(e),
                 'db_type': self.db_type
             }
+
+    def _handler_reads(self, conn):
+        """Sum of the session's Handler_read% counters (None if the server does not report them)."""
+        try:
+            rows = conn.execute(text(self.HANDLER_READ_SQL)).fetchall()
+        except Exception:
+            return None
+        return sum(int(value) for _, value in rows)
+
+    def _status_overhead(self, conn):
+        """Handler reads done by one status query (measured once, subtracted from every delta)."""
+        if self._status_reads is None:
+            first = self._handler_reads(conn)
+            second = self._handler_reads(conn)
+            self._status_reads = max(0, second - first) if first is not None and second is not None else 0
+        return self._status_reads
     
     def get_schema(self, database=None):
         """
@@ -0,0 +1,15 @@
+"""Local Text2SQL agents and the name -> agent registry."""
+
+from models.base import Text2SQLAgent, build_prompt, build_repair_question
+from models.registry import AgentRegistry, available_models, build_agent, parse_model_list, register_agent
+
+__all__ = [
+    "Text2SQLAgent",
+    "build_prompt",
+    "build_repair_question",
+    "AgentRegistry",
+    "available_models",
+    "build_agent",
+    "parse_model_list",
+    "register_agent",
+]
@@ -0,0 +1,73 @@
+"""
+models/base.py
+
+Common interface shared by all local Text2SQL agents.
+
+Every agent (GPT-2 XL, Qwen, ...) exposes the same four methods so the
+runners can treat models interchangeably:
+
+    generate(schema, question, max_new_tokens=None) -> dict
+    generate_batch(items, max_new_tokens=None)       -> list[dict]
+    tokenize_len(text)                               -> int
+    info()                                           -> dict
+
+A generation result is a plain dict (same style as DatabaseManager.execute_query):
+
+    {
+        "sql": str,            # extracted SQL, ready for normalization
+        "raw": str,            # raw completion text (new tokens only)
+        "prompt_tokens": int,
+        "output_tokens": int,
+    }
+"""
+
+from typing import Protocol, runtime_checkable
+
+
+PROMPT_SCHEMA_HEADER = "### Database schema:\n"
+PROMPT_QUESTION_HEADER = "\n\n### Question:\n"
+PROMPT_SQL_HEADER = "\n\n### SQL:\n"
+PROMPT_PREVIOUS_SQL_HEADER = "\n\n### Previous SQL:\n"
+PROMPT_ERROR_HEADER = "\n\n### Error:\n"
+
+
+def build_prompt(schema: str, question: str, sql_prefix: str = "") -> str:
+    """Prompt layout shared by all agents (schema, question, SQL header)."""
+    return (
+        f"{PROMPT_SCHEMA_HEADER}{schema}"
+        f"{PROMPT_QUESTION_HEADER}{question}"
+        f"{PROMPT_SQL_HEADER}{sql_prefix}"
+    )
+
+
+def build_repair_question(question: str, failed_sql: str, error: str, max_error_chars: int = 300) -> str:
+    """
+    Question text for an execution-feedback retry: the original question plus
+    the failed SQL and the database error. It goes where the question goes, so
+    the schema part of the prompt (and its prefix KV cache) is unchanged.
+    """
+    error = " ".join(str(error or "").split())[:max_error_chars]
+    return f"{question}{PROMPT_PREVIOUS_SQL_HEADER}{failed_sql}{PROMPT_ERROR_HEADER}{error}"
+
+
+@runtime_checkable
+class Text2SQLAgent(Protocol):
+    """Structural interface implemented by every registered agent."""
+
+    name: str
+
+    def generate(self, schema: str, question: str, max_new_tokens: int | None = None) -> dict:
+        ...
+
+    def generate_batch(
+        self,
+        items: list[tuple[str, str]],
+        max_new_tokens: int | None = None,
+    ) -> list[dict]:
+        ...
+
+    def tokenize_len(self, text: str) -> int:
+        ...
+
+    def info(self) -> dict:
+        ...
@@ -0,0 +1,260 @@
+"""
+models/constrained.py
+
+Schema-aware constrained decoding (logits processor).
+
+At identifier positions the processor masks every token that cannot continue
+a name that exists in the schema:
+
+  - after FROM / JOIN (and after ',' inside a FROM list) -> table names
+  - after '<table or alias>.'                            -> columns of that table
+                                                            (all columns for unknown aliases)
+
+Everywhere else decoding is left untouched. Names are matched
+case-insensitively (normalize_pred_sql fixes table casing afterwards).
+
+Pieces:
+  SchemaConstraint  - tables/columns parsed from the compact schema
+                      ("table(col1, col2, ...)" per line) + identifier tries
+  VocabIndex        - decoded text of every token, grouped by first char;
+                      built once per tokenizer
+  SchemaLogitsProcessor - transformers LogitsProcessor applying the masks for a
+                      batch (one SchemaConstraint per row)
+"""
+
+import re
+
+import torch
+from transformers import LogitsProcessor
+
+
+SQL_KEYWORDS = {
+    "SELECT", "DISTINCT", "FROM", "WHERE", "JOIN", "INNER", "LEFT", "RIGHT", "OUTER", "CROSS", "ON",
+    "AND", "OR", "NOT", "IN", "IS", "NULL", "LIKE", "BETWEEN", "EXISTS", "AS", "GROUP", "BY", "ORDER",
+    "HAVING", "LIMIT", "OFFSET", "UNION", "ALL", "ASC", "DESC", "COUNT", "SUM", "AVG", "MIN", "MAX", "CASE",
+    "WHEN", "THEN", "ELSE", "END",
+}
+
+_IDENT_CHARS = set("abcdefghijklmnopqrstuvwxyz0123456789_")
+_WORD_RE = re.compile(r"[A-Za-z_][A-Za-z0-9_]*|\S")
+_TRAILING_IDENT_RE = re.compile(r"[A-Za-z0-9_]+$")
+_ALIAS_RE = re.compile(r"\b(?:FROM|JOIN)\s+([A-Za-z_][A-Za-z0-9_]*)(?:\s+AS)?\s+([A-Za-z_][A-Za-z0-9_]*)", re.IGNORECASE)
+_SCHEMA_LINE_RE = re.compile(r"^\s*([A-Za-z0-9_]+)\s*\((.*)\)\s*$")
+
+_END = "$"  # trie terminal marker
+
+
+def _build_trie(names) -> dict:
+    root: dict = {}
+    for name in names:
+        node = root
+        for ch in name.lower():
+            node = node.setdefault(ch, {})
+        node[_END] = True
+    return root
+
+
+class SchemaConstraint:
+    """Valid identifiers of one schema, as tries for prefix checks."""
+
+    def __init__(self, tables: dict[str, list[str]]):
+        self.tables = {t.lower(): [c.lower() for c in cols] for t, cols in tables.items()}
+        self.table_trie = _build_trie(self.tables)
+        self.column_tries = {t: _build_trie(cols) for t, cols in self.tables.items()}
+        self.all_columns_trie = _build_trie({c for cols in self.tables.values() for c in cols})
+
+    @classmethod
+    def from_compact_schema(cls, schema_compact: str) -> "SchemaConstraint":
+        tables: dict[str, list[str]] = {}
+        for line in schema_compact.splitlines():
+            m = _SCHEMA_LINE_RE.match(line)
+            if not m:
+                continue
+            # "col TYPE" when include_types=True -> keep the name only
+            cols = [c.strip().split()[0] for c in m.group(2).split(",") if c.strip()]
+            tables[m.group(1)] = cols
+        return cls(tables)
+
+    def trie_for(self, generated: str):
+        """
+        Return (trie_key, trie, partial, need_ws) for the identifier being
+        generated, or None when the current position is not constrained.
+
+        need_ws is True right after a keyword such as FROM, where the name
+        must be separated from the keyword by whitespace.
+        """
+        m = _TRAILING_IDENT_RE.search(generated)
+        partial = m.group(0).lower() if m else ""
+        context = generated[: m.start()] if m else generated
+
+        # "... FROM" / "... JOIN": the keyword itself is the trailing word
+        if partial.upper() in ("FROM", "JOIN"):
+            return ("table",), self.table_trie, "", True
+
+        words = _WORD_RE.findall(context)
+        if not words:
+            return None
+        last = words[-1].upper()
+
+        if last == "." and len(words) >= 2:
+            qualifier = words[-2].lower()
+            table = qualifier if qualifier in self.tables else self._resolve_alias(generated, qualifier)
+            if table in self.column_tries:
+                return ("col", table), self.column_tries[table], partial, False
+            return ("col", "*"), self.all_columns_trie, partial, False
+
+        if last in ("FROM", "JOIN") or (last == "," and self._in_from_clause(words)):
+            return ("table",), self.table_trie, partial, False
+
+        return None
+
+    def _resolve_alias(self, generated: str, alias: str) -> str | None:
+        for table, name in _ALIAS_RE.findall(generated):
+            if name.lower() == alias and name.upper() not in SQL_KEYWORDS:
+                return table.lower()
+        return None
+
+    @staticmethod
+    def _in_from_clause(words: list[str]) -> bool:
+        for w in reversed(words):
+            u = w.upper()
+            if u == "FROM":
+                return True
+            if u in ("SELECT", "WHERE", "GROUP", "ORDER", "HAVING", "ON", "LIMIT", "(", ")"):
+                return False
+        return False
+
+
+class VocabIndex:
+    """
+    Decoded text of every token id, pre-split into
+    (leading whitespace?, identifier run, first char after the run).
+    """
+
+    def __init__(self, tokenizer, vocab_size: int):
+        self.vocab_size = vocab_size
+        # first identifier char -> list of (token_id, has_leading_ws, ident_run, tail_first_char)
+        self.by_first_char: dict[str, list[tuple]] = {}
+        # tokens without an identifier run right after optional whitespace
+        self.non_ident: list[tuple] = []
+
+        for tok_id in range(vocab_size):
+            try:
+                text = tokenizer.decode([tok_id])
+            except Exception:
+                continue
+            stripped = text.lstrip()
+            lead_ws = len(stripped) != len(text)
+            lower = stripped.lower()
+            n = 0
+            while n < len(lower) and lower[n] in _IDENT_CHARS:
+                n += 1
+            run = lower[:n]
+            tail = stripped[n:n + 1]
+            entry = (tok_id, lead_ws, run, tail)
+            if run:
+                self.by_first_char.setdefault(run[0], []).append(entry)
+            else:
+                self.non_ident.append(entry)
+
+
+def _walk(node: dict, text: str):
+    for ch in text:
+        node = node.get(ch)
+        if node is None:
+            return None
+    return node
+
+
+class SchemaLogitsProcessor(LogitsProcessor):
+    """
+    Mask tokens that cannot continue a valid schema identifier.
+
+    Args:
+        vocab: VocabIndex for the agent's tokenizer
+        constraints: one SchemaConstraint per batch row
+        prompt_width: padded prompt length (new tokens start there)
+        decode: callable(list[int]) -> str
+        text_prefix: text the completion continues (e.g. "SELECT" for GPT-2)
+        always_allow: token ids never masked (eos)
+        mask_cache: optional dict shared across batches (allowed ids per state)
+    """
+
+    def __init__(self, vocab: VocabIndex, constraints: list, prompt_width: int, decode,
+                 text_prefix: str = "", always_allow=(), mask_cache: dict | None = None):
+        self.vocab = vocab
+        self.constraints = constraints
+        self.prompt_width = prompt_width
+        self.decode = decode
+        self.text_prefix = text_prefix
+        self.always_allow = list(always_allow)
+        self._mask_cache = mask_cache if mask_cache is not None else {}
+        # number of constrained decoding steps per row
+        self.masked_steps = [0] * len(constraints)
+
+    def __call__(self, input_ids: torch.LongTensor, scores: torch.FloatTensor) -> torch.FloatTensor:
+        for row in range(input_ids.shape[0]):
+            generated = self.text_prefix + self.decode(input_ids[row, self.prompt_width:].tolist())
+            state = self.constraints[row].trie_for(generated)
+            if state is None:
+                continue
+            trie_key, trie, partial, need_ws = state
+
+            cache_key = (id(self.constraints[row]), trie_key, partial, need_ws)
+            if cache_key not in self._mask_cache:
+                self._mask_cache[cache_key] = self._allowed_ids(trie, partial, need_ws)
+            allowed = self._mask_cache[cache_key]
+            if allowed is None:
+                continue
+
+            width = scores.shape[-1]
+            keep = torch.zeros(width, dtype=torch.bool, device=scores.device)
+            keep[allowed[allowed < width].to(scores.device)] = True
+            scores[row, ~keep] = float("-inf")
+            self.masked_steps[row] += 1
+        return scores
+
+    def _allowed_ids(self, trie: dict, partial: str, need_ws: bool):
+        node = _walk(trie, partial)
+        if node is None:
+            # already off-schema (e.g. quoted name); don't fight the model
+            return None
+        ids = list(self.always_allow)
+
+        def ok_run(run: str, tail: str) -> bool:
+            end = _walk(node, run)
+            if end is None:
+                return False
+            # a token may end the identifier only on a valid name, followed by a delimiter
+            return not tail or (_END in end and tail != "_" and not tail.isalnum())
+
+        if partial:
+            # continue the current identifier (no whitespace inside a name) ...
+            for ch in node:
+                if ch == _END:
+                    continue
+                for tok_id, lead_ws, run, tail in self.vocab.by_first_char.get(ch, ()):
+                    if not lead_ws and ok_run(run, tail):
+                        ids.append(tok_id)
+            # ... or terminate it with whitespace / punctuation once it is a valid name
+            if _END in node:
+                ids.extend(tok_id for tok_id, lead_ws, _, tail in self.vocab.non_ident if lead_ws or tail)
+                for entries in self.vocab.by_first_char.values():
+                    ids.extend(tok_id for tok_id, lead_ws, _, _ in entries if lead_ws)
+        else:
+            # start a new identifier
+            for ch in node:
+                if ch == _END:
+                    continue
+                for tok_id, lead_ws, run, tail in self.vocab.by_first_char.get(ch, ()):
+                    if (lead_ws or not need_ws) and ok_run(run, tail):
+                        ids.append(tok_id)
+            # a whitespace-only token may separate the keyword from the name (once);
+            # '(' subquery, '*' wildcard, '`' quoted name
+            for tok_id, lead_ws, _, tail in self.vocab.non_ident:
+                if not tail and lead_ws and need_ws:
+                    ids.append(tok_id)
+                elif tail and tail in "(*`" and (lead_ws or not need_ws):
+                    ids.append(tok_id)
+
+        return torch.tensor(sorted(set(ids)), dtype=torch.long)
@@ -0,0 +1,118 @@
+"""
+models/generation_cache.py
+
+Persistent, content-addressed generation cache (one SQLite file).
+
+Key = sha256 of
+  - model id and weights revision
+  - decoding parameters (greedy, max_new_tokens, constrained, ...)
+  - the exact prompt token ids
+
+Value = the generated token ids + raw completion (+ small extras such as
+constrained_steps). SQL extraction/normalization is NOT cached: it is redone
+from the raw completion on every hit, so changing the post-processing,
+normalization or comparison logic only needs a cheap re-run.
+
+Only deterministic (greedy) decoding is cached; speculative decoding gives
+the same tokens as greedy, so it shares the entries of the plain model.
+
+Usage:
+    cache = GenerationCache("results/generation_cache.sqlite")
+    key = cache.key(model_id, revision, {"decoding": "greedy", "max_new_tokens": 128}, prompt_ids)
+    hit = cache.get(key)            # None or {"new_ids": [...], "raw": str, "extra": {...}}
+    cache.put(key, new_ids, raw, extra)
+"""
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+
+class GenerationCache:
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # one connection shared by the model / batcher threads, serialized by a lock
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS generations (
+                    key        TEXT PRIMARY KEY,
+                    model_id   TEXT,
+                    revision   TEXT,
+                    decoding   TEXT,
+                    new_ids    TEXT NOT NULL,
+                    raw        TEXT NOT NULL,
+                    extra      TEXT,
+                    created_at REAL
+                )
+                """
+            )
+            self._conn.commit()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(model_id: str, revision: str | None, decoding: dict, prompt_ids: list[int]) -> str:
+        h = hashlib.sha256()
+        h.update(json.dumps([model_id, revision, decoding], sort_keys=True).encode("utf-8"))
+        h.update(b"\0")
+        h.update(",".join(map(str, prompt_ids)).encode("ascii"))
+        return h.hexdigest()
+
+    def get(self, key: str) -> dict | None:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT new_ids, raw, extra FROM generations WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return {"new_ids": json.loads(row[0]), "raw": row[1], "extra": json.loads(row[2] or "{}")}
+
+    def put(
+        self,
+        key: str,
+        new_ids: list[int],
+        raw: str,
+        extra: dict | None = None,
+        model_id: str | None = None,
+        revision: str | None = None,
+        decoding: dict | None = None,
+    ) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO generations VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    key, model_id, revision, json.dumps(decoding, sort_keys=True) if decoding else None,
+                    json.dumps(list(new_ids)), raw, json.dumps(extra or {}), time.time(),
+                ),
+            )
+            self._conn.commit()
+
+    def stats(self) -> dict:
+        with self._lock:
+            (entries,) = self._conn.execute("SELECT COUNT(*) FROM generations").fetchone()
+        return {"entries": entries, "hits": self.hits, "misses": self.misses}
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+def generation_times(batch_time: float, gens: list[dict]) -> list[float]:
+    """
+    Per-row generation time of a generate_batch() call: the batch time spread
+    over the rows actually generated; cache hits (gen["cache_hit"]) get 0.0.
+    """
+    n_generated = sum(1 for g in gens if not g.get("cache_hit"))
+    per_row = batch_time / n_generated if n_generated else 0.0
+    return [0.0 if g.get("cache_hit") else per_row for g in gens]
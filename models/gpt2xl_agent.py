@@ -2,64 +2,49 @@ import re
 import torch
 from transformers import AutoTokenizer, AutoModelForCausalLM
 
-MODEL_ID = "openai-community/gpt2-xl"
+from models.base import build_prompt
+from models.hf_agent import HFAgentBase
 
-class GPT2XLAgent:
-    def __init__(self, device: str | None = None):
+MODEL_ID = "openai-community/gpt2-xl"
+DRAFT_MODEL_ID = "distilbert/distilgpt2"
+
+class GPT2XLAgent(HFAgentBase):
+    name = "gpt2xl"
+    completion_prefix = "SELECT"
+
+    def __init__(
+        self,
+        device: str | None = None,
+        max_new_tokens: int = 128,
+        draft_model_id: str | None = None,
+        num_draft_tokens: int = 4,
+        spec_check: bool = False,
+        constrained: bool = False,
+        generation_cache=None,
+        prefix_cache: int = 0,
+    ):
+        self.model_id = MODEL_ID
         self.device = device or ("cuda" if torch.cuda.is_available() else "cpu")
+        self.default_max_new_tokens = max_new_tokens
         self.tokenizer = AutoTokenizer.from_pretrained(MODEL_ID)
         self.model = AutoModelForCausalLM.from_pretrained(MODEL_ID).to(self.device)
+        self.model.eval()
 
         self.tokenizer.pad_token = self.tokenizer.eos_token
+        # left padding so every row of a batch ends right before its first new token
+        self.tokenizer.padding_side = "left"
         self.max_ctx = getattr(self.model.config, "n_positions", 1024)  # GPT-2 = 1024
+        self.max_prompt_tokens = self.max_ctx
+
+        self._init_speculative(draft_model_id, num_draft_tokens, spec_check)
+        self._init_constraints(constrained)
+        self._init_cache(generation_cache, prefix_cache)
 
     def build_prompt(self, schema: str, question: str) -> str:
-        return (
-            "### Database schema:\n"
-            f"{schema}\n\n"
-            "### Question:\n"
-            f"{question}\n\n"
-            "### SQL:\n"
-            "SELECT"
-        )
+        return build_prompt(schema, question, sql_prefix="SELECT")
 
     def _make_inputs_under_limit(self, schema: str, question: str, max_new_tokens: int):
-        """
-        Ensure total tokens fit: prompt + max_new_tokens <= max_ctx
-        Strategy: progressively truncate schema tokens (keep question intact).
-        """
-        # Reserve space for generation
-        budget = self.max_ctx - max_new_tokens
-        if budget <= 0:
-            raise ValueError(f"max_new_tokens={max_new_tokens} leaves no room for prompt in ctx={self.max_ctx}")
-
-        # Tokenize question/prompt parts separately so we only truncate schema
-        prefix = "### Database schema:\n"
-        mid = "\n\n### Question:\n"
-        suffix = f"{question}\n\n### SQL:\nSELECT"
-
-        prefix_ids = self.tokenizer(prefix, add_special_tokens=False).input_ids
-        mid_ids = self.tokenizer(mid, add_special_tokens=False).input_ids
-        suffix_ids = self.tokenizer(suffix, add_special_tokens=False).input_ids
-
-        fixed_len = len(prefix_ids) + len(mid_ids) + len(suffix_ids)
-
-        # If even fixed parts exceed budget, truncate question (rare)
-        if fixed_len >= budget:
-            # Keep the tail of suffix (question) minimal
-            # Hard truncate suffix tokens to fit
-            keep = max(32, budget - (len(prefix_ids) + len(mid_ids)))
-            suffix_ids = suffix_ids[-keep:]
-            fixed_len = len(prefix_ids) + len(mid_ids) + len(suffix_ids)
-
-        # Now budget remaining for schema
-        schema_budget = max(0, budget - fixed_len)
-
-        schema_ids = self.tokenizer(schema, add_special_tokens=False).input_ids
-        if len(schema_ids) > schema_budget:
-            schema_ids = schema_ids[:schema_budget]
-
-        input_ids = prefix_ids + schema_ids + mid_ids + suffix_ids
+        input_ids = self._prompt_ids(schema, question, max_new_tokens)
         attn = [1] * len(input_ids)
 
         return {
@@ -67,20 +52,9 @@ class GPT2XLAgent:
             "attention_mask": torch.tensor([attn], device=self.device),
         }
 
-    def generate_sql(self, schema: str, question: str, max_new_tokens: int = 160) -> str:
-        inputs = self._make_inputs_under_limit(schema, question, max_new_tokens=max_new_tokens)
-
-        with torch.no_grad():
-            out = self.model.generate(
-                **inputs,
-                max_new_tokens=max_new_tokens,
-                do_sample=False,
-                pad_token_id=self.tokenizer.eos_token_id,
-                eos_token_id=self.tokenizer.eos_token_id,
-            )
-
-        text = self.tokenizer.decode(out[0], skip_special_tokens=True)
-        return self._extract_sql(text)
+    def _completion_to_sql(self, raw: str) -> str:
+        # prompt ends with "SELECT", so the completion continues that statement
+        return self._extract_sql("SELECT" + raw)
 
     @staticmethod
     def _extract_sql(generated_text: str) -> str:
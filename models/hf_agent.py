@@ -0,0 +1,356 @@
+"""
+models/hf_agent.py
+
+Generation plumbing shared by the local Hugging Face agents (GPT-2 XL, Qwen).
+
+Subclasses load `self.tokenizer` / `self.model`, set `self.model_id`,
+`self.device`, `self.max_ctx`, `self.max_prompt_tokens`,
+`self.default_max_new_tokens`, call `_init_speculative()`,
+`_init_constraints()` and `_init_cache()`, and implement:
+
+    _completion_to_sql(raw_completion) -> str
+
+Everything else (prompt building with token-budget schema packing, batched
+greedy decoding, optional speculative decoding with a draft model, optional
+schema-constrained decoding, the persistent generation cache with in-batch
+de-duplication, the shared-prefix KV cache, result dicts) lives here.
+"""
+
+import hashlib
+import time
+
+import torch
+from transformers import AutoModelForCausalLM, LogitsProcessorList
+
+from models.base import PROMPT_QUESTION_HEADER, PROMPT_SCHEMA_HEADER, PROMPT_SQL_HEADER
+from models.constrained import SchemaConstraint, SchemaLogitsProcessor, VocabIndex
+from models.generation_cache import GenerationCache
+from models.prefix_cache import PrefixKVCache
+from models.schema_packer import SchemaPacker
+from models.speculative import SpeculativeDecoder
+
+
+class HFAgentBase:
+    name = "hf"
+    # text the completion continues (GPT-2's prompt ends with "SELECT")
+    completion_prefix = ""
+    _schema_packer = None
+
+    # --- Setup -------------------------------------------------------------------
+
+    def _init_speculative(self, draft_model_id: str | None, num_draft_tokens: int = 4, spec_check: bool = False):
+        """
+        Optionally load a small draft model for speculative (assisted) greedy decoding.
+
+        spec_check: also run plain greedy decoding per question to verify the
+        output is identical and to measure the speed-up (doubles the cost).
+        """
+        self.draft_model_id = draft_model_id
+        self.spec_check = spec_check
+        self.speculative = None
+        if not draft_model_id:
+            return
+
+        print(f"⏳ Loading draft model {draft_model_id}...")
+        draft = AutoModelForCausalLM.from_pretrained(draft_model_id, torch_dtype=self.model.dtype).to(self.device)
+        draft.eval()
+        self.speculative = SpeculativeDecoder(
+            self.model,
+            draft,
+            eos_token_id=self._eos_ids(),
+            num_draft_tokens=num_draft_tokens,
+        )
+
+    def _init_constraints(self, constrained: bool = False):
+        """
+        Enable schema-aware constrained decoding (see models/constrained.py).
+        Takes precedence over speculative decoding when both are enabled.
+        """
+        self.constrained = constrained
+        self._vocab_index = None          # built lazily, once per agent
+        self._schema_constraints = {}     # schema text -> SchemaConstraint
+        self._mask_cache = {}             # shared across batches
+
+    def _init_cache(self, generation_cache=None, prefix_cache: int = 0):
+        """
+        Optional caches:
+          - generation_cache: a GenerationCache or a path to its SQLite file
+            (see models/generation_cache.py)
+          - prefix_cache: number of shared prompt prefixes (schema part) whose
+            KV cache is kept in memory; 0 disables (see models/prefix_cache.py)
+        """
+        if isinstance(generation_cache, (str, bytes)) or hasattr(generation_cache, "__fspath__"):
+            generation_cache = GenerationCache(generation_cache)
+        self.generation_cache = generation_cache
+        self.prefix_cache = PrefixKVCache(self.model, max_entries=prefix_cache) if prefix_cache else None
+
+    def _logits_processor(self, schemas: list[str], prompt_width: int) -> SchemaLogitsProcessor:
+        if self._vocab_index is None:
+            self._vocab_index = VocabIndex(self.tokenizer, len(self.tokenizer))
+        constraints = []
+        for schema in schemas:
+            if schema not in self._schema_constraints:
+                self._schema_constraints[schema] = SchemaConstraint.from_compact_schema(schema)
+            constraints.append(self._schema_constraints[schema])
+        return SchemaLogitsProcessor(
+            self._vocab_index,
+            constraints,
+            prompt_width=prompt_width,
+            decode=lambda ids: self.tokenizer.decode(ids, skip_special_tokens=True),
+            text_prefix=self.completion_prefix,
+            always_allow=self._eos_ids(),
+            mask_cache=self._mask_cache,
+        )
+
+    def _eos_ids(self) -> list[int]:
+        eos = self.model.generation_config.eos_token_id
+        if eos is None:
+            eos = self.tokenizer.eos_token_id
+        return [eos] if isinstance(eos, int) else list(eos)
+
+    # --- Text2SQLAgent interface ---------------------------------------------
+
+    def info(self) -> dict:
+        return {
+            "name": self.name,
+            "model_id": self.model_id,
+            "revision": getattr(self.model.config, "_commit_hash", None),
+            "device": self.device,
+            "max_ctx": self.max_ctx,
+            "max_new_tokens": self.default_max_new_tokens,
+            "decoding": "greedy",
+            "draft_model_id": self.draft_model_id,
+            "constrained": self.constrained,
+        }
+
+    def tokenize_len(self, text: str) -> int:
+        return len(self.tokenizer(text, add_special_tokens=False).input_ids)
+
+    def generate(self, schema: str, question: str, max_new_tokens: int | None = None) -> dict:
+        return self.generate_batch([(schema, question)], max_new_tokens=max_new_tokens)[0]
+
+    def generate_batch(self, items: list[tuple[str, str]], max_new_tokens: int | None = None) -> list[dict]:
+        """Greedy-decode a list of (schema, question) pairs."""
+        if not items:
+            return []
+        max_new_tokens = max_new_tokens or self.default_max_new_tokens
+
+        prompts = [self._prompt(schema, question, max_new_tokens) for schema, question in items]
+        rows = [ids for ids, _, _ in prompts]
+        schemas = [schema for schema, _ in items]
+        keys = [self._cache_key(row, max_new_tokens, schema) for row, schema in zip(rows, schemas)]
+
+        # cache hits first; identical prompts in the batch are generated once
+        results: list[dict | None] = [None] * len(items)
+        todo: dict[str, list[int]] = {}
+        cached = self.generation_cache is not None
+        for i, key in enumerate(keys):
+            hit = self.generation_cache.get(key) if cached and key not in todo else None
+            if hit is not None:
+                # SQL extraction is redone from the cached tokens
+                extra = {**prompts[i][1], **hit["extra"], "cache_hit": True}
+                results[i] = self._to_result(rows[i], hit["new_ids"], extra)
+            else:
+                todo.setdefault(key, []).append(i)
+
+        if todo:
+            firsts = [idxs[0] for idxs in todo.values()]
+            completions = self._complete_rows(
+                [rows[i] for i in firsts],
+                max_new_tokens,
+                schemas=[schemas[i] for i in firsts],
+                max_prefix=min(prompts[i][2] for i in firsts),
+            )
+            for (key, idxs), (new_ids, extra) in zip(todo.items(), completions):
+                if cached:
+                    self._cache_put(key, new_ids, extra, max_new_tokens)
+                    extra = {**extra, "cache_hit": False}
+                for i in idxs:
+                    results[i] = self._to_result(rows[i], new_ids, {**prompts[i][1], **extra})
+        return results
+
+    def generate_sql(self, schema: str, question: str, max_new_tokens: int | None = None) -> str:
+        return self.generate(schema, question, max_new_tokens=max_new_tokens)["sql"]
+
+    # --- Generation cache ----------------------------------------------------------
+
+    def _decoding_params(self, max_new_tokens: int, schema: str) -> dict:
+        params = {"decoding": "greedy", "max_new_tokens": max_new_tokens}
+        if self.constrained:
+            # the constraint uses the whole schema, not only the packed prompt part
+            params["constrained"] = hashlib.sha256(schema.encode("utf-8")).hexdigest()[:16]
+        return params
+
+    def _cache_key(self, row: list[int], max_new_tokens: int, schema: str) -> str:
+        return GenerationCache.key(
+            self.model_id,
+            getattr(self.model.config, "_commit_hash", None),
+            self._decoding_params(max_new_tokens, schema),
+            row,
+        )
+
+    def _cache_put(self, key: str, new_ids: list[int], extra: dict, max_new_tokens: int) -> None:
+        new_ids = self._strip_stop(new_ids)
+        # timing/speculative stats describe this run only
+        keep = {k: v for k, v in extra.items() if k == "constrained_steps"}
+        self.generation_cache.put(
+            key,
+            new_ids,
+            self.tokenizer.decode(new_ids, skip_special_tokens=True),
+            keep,
+            model_id=self.model_id,
+            revision=getattr(self.model.config, "_commit_hash", None),
+            decoding={"max_new_tokens": max_new_tokens, "constrained": self.constrained},
+        )
+
+    # --- Prompt building ---------------------------------------------------------
+
+    def _encode(self, text: str) -> list[int]:
+        return self.tokenizer(text, add_special_tokens=False).input_ids
+
+    def _packer(self) -> SchemaPacker:
+        if self._schema_packer is None:
+            self._schema_packer = SchemaPacker(self._encode)
+        return self._schema_packer
+
+    def _prompt_ids(self, schema: str, question: str, max_new_tokens: int) -> list[int]:
+        return self._prompt(schema, question, max_new_tokens)[0]
+
+    def _prompt(self, schema: str, question: str, max_new_tokens: int) -> tuple[list[int], dict, int]:
+        """
+        Ensure total tokens fit: prompt + max_new_tokens <= max_prompt_tokens
+        Strategy: pack whole schema tables into the remaining budget (keep question intact).
+
+        Returns (input_ids, meta, schema_end) with meta = schema tables/columns
+        included and schema_end = length of the question-independent part
+        (header + schema + question header), the prefix KV cache boundary.
+        """
+        # Reserve space for generation
+        budget = self.max_prompt_tokens - max_new_tokens
+        if budget <= 0:
+            raise ValueError(
+                f"max_new_tokens={max_new_tokens} leaves no room for prompt in ctx={self.max_prompt_tokens}"
+            )
+
+        # Tokenize question/prompt parts separately so we only pack the schema
+        prefix_ids = self._encode(PROMPT_SCHEMA_HEADER)
+        mid_ids = self._encode(PROMPT_QUESTION_HEADER)
+        suffix_ids = self._encode(f"{question}{PROMPT_SQL_HEADER}{self.completion_prefix}")
+
+        fixed_len = len(prefix_ids) + len(mid_ids) + len(suffix_ids)
+
+        # If even fixed parts exceed budget, truncate question (rare)
+        if fixed_len >= budget:
+            # Keep the tail of suffix (question) minimal
+            # Hard truncate suffix tokens to fit
+            keep = max(32, budget - (len(prefix_ids) + len(mid_ids)))
+            suffix_ids = suffix_ids[-keep:]
+            fixed_len = len(prefix_ids) + len(mid_ids) + len(suffix_ids)
+
+        # Now budget remaining for schema: whole tables only
+        schema_budget = max(0, budget - fixed_len)
+        packer = self._packer()
+        schema_ids, tables = packer.pack(schema, question, schema_budget)
+        n_tables, n_cols = packer.tables_and_columns(schema, tables)
+
+        meta = {"schema_tables_included": n_tables, "schema_columns_included": n_cols}
+        head = prefix_ids + schema_ids + mid_ids
+        return head + suffix_ids, meta, len(head)
+
+    # --- Internals ---------------------------------------------------------------
+
+    def _strip_stop(self, new_ids: list[int]) -> list[int]:
+        """Drop trailing eos/pad tokens emitted after a row finished."""
+        stop = set(self._eos_ids()) | {self.tokenizer.pad_token_id}
+        new_ids = list(new_ids)
+        while new_ids and new_ids[-1] in stop:
+            new_ids.pop()
+        return new_ids
+
+    def _to_result(self, row: list[int], new_ids: list[int], extra: dict) -> dict:
+        new_ids = self._strip_stop(new_ids)
+        raw = self.tokenizer.decode(new_ids, skip_special_tokens=True)
+        return {
+            "sql": self._completion_to_sql(raw),
+            "raw": raw,
+            "prompt_tokens": len(row),
+            "output_tokens": len(new_ids),
+            **extra,
+        }
+
+    def _greedy_rows(
+        self,
+        rows: list[list[int]],
+        max_new_tokens: int,
+        processor=None,
+        max_prefix: int | None = None,
+    ) -> list[list[int]]:
+        """
+        Plain greedy decoding of token-id rows in one left-padded batch, or
+        reusing the cached KV of their shared prefix (up to max_prefix tokens)
+        when the prefix cache is enabled.
+        """
+        width = max(len(r) for r in rows)
+        pad_id = self.tokenizer.pad_token_id
+        prepared = self.prefix_cache.prepare(rows, pad_id, max_prefix) if self.prefix_cache is not None else None
+        if prepared is not None:
+            inputs = prepared[0]
+        else:
+            inputs = {
+                "input_ids": torch.tensor([[pad_id] * (width - len(r)) + r for r in rows], device=self.device),
+                "attention_mask": torch.tensor([[0] * (width - len(r)) + [1] * len(r) for r in rows], device=self.device),
+            }
+
+        with torch.no_grad():
+            out = self.model.generate(
+                **inputs,
+                max_new_tokens=max_new_tokens,
+                do_sample=False,
+                pad_token_id=pad_id,
+                logits_processor=LogitsProcessorList([processor]) if processor is not None else None,
+            )
+        return [out[i, width:].tolist() for i in range(len(rows))]
+
+    def _complete_rows(
+        self,
+        rows: list[list[int]],
+        max_new_tokens: int,
+        schemas: list[str] | None = None,
+        max_prefix: int | None = None,
+    ) -> list[tuple[list[int], dict]]:
+        """Return (new_token_ids, extra_fields) per row."""
+        prefix = {}
+        if self.prefix_cache is not None and (self.speculative is None or self.constrained):
+            n = self.prefix_cache.prefix_len(rows, max_prefix)
+            prefix = {"prefix_cached_tokens": n} if n else {}
+
+        if self.constrained and schemas:
+            # the prefix layout keeps every row ending at the same width
+            processor = self._logits_processor(schemas, prompt_width=max(len(r) for r in rows))
+            outs = self._greedy_rows(rows, max_new_tokens, processor=processor, max_prefix=max_prefix)
+            return [(ids, {"constrained_steps": steps, **prefix}) for ids, steps in zip(outs, processor.masked_steps)]
+
+        if self.speculative is None:
+            return [(ids, dict(prefix)) for ids in self._greedy_rows(rows, max_new_tokens, max_prefix=max_prefix)]
+
+        out = []
+        for row in rows:
+            t0 = time.time()
+            new_ids, stats = self.speculative.generate(row, max_new_tokens)
+            spec_time = time.time() - t0
+            extra = {
+                "spec_draft_tokens": stats["draft_tokens"],
+                "spec_accepted_tokens": stats["accepted_tokens"],
+                "spec_acceptance_rate": stats["acceptance_rate"],
+                "spec_target_passes": stats["target_passes"],
+                "spec_time_s": round(spec_time, 4),
+            }
+            if self.spec_check:
+                t1 = time.time()
+                ref_ids = self._greedy_rows([row], max_new_tokens)[0]
+                greedy_time = time.time() - t1
+                extra["greedy_time_s"] = round(greedy_time, 4)
+                extra["spec_speedup"] = round(greedy_time / spec_time, 3) if spec_time > 0 else None
+                extra["spec_identical"] = self._strip_stop(new_ids) == self._strip_stop(ref_ids)
+            out.append((new_ids, extra))
+        return out
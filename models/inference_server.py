@@ -0,0 +1,285 @@
+"""
+models/inference_server.py
+
+Local HTTP inference service around any registered agent, plus a client.
+
+Server side:
+    DynamicBatcher  - collects concurrent requests into batches (max size /
+                      max wait window) and runs them through agent.generate_batch()
+    serve(agent)    - ThreadingHTTPServer on localhost exposing:
+                        GET  /health
+                        GET  /info
+                        POST /tokenize_len   {"text": str}
+                        POST /generate       {"items": [{"schema", "question", "max_new_tokens"?}, ...]}
+                      /generate streams one JSON line per item as soon as the
+                      batch containing it finishes: {"index": i, ...generation dict}
+
+Client side:
+    RemoteAgent(url) implements the same Text2SQLAgent interface, so runners can
+    use a shared server instead of loading the weights themselves, e.g.
+
+        register_agent("gpt2xl", "models.inference_server:RemoteAgent", url="http://127.0.0.1:8765")
+"""
+
+import json
+import queue
+import threading
+import time
+import urllib.request
+from concurrent.futures import Future, as_completed
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+
+
+# --- Server --------------------------------------------------------------------
+
+
+class DynamicBatcher:
+    """
+    Group single generation requests into batches.
+
+    The worker thread blocks for the first request, then keeps collecting until
+    either `max_batch` requests are queued or `max_wait_ms` has passed. Requests
+    with different max_new_tokens are run as separate sub-batches.
+
+    After stop(), new requests and requests still queued fail with
+    RuntimeError("batcher stopped") instead of waiting forever.
+    """
+
+    def __init__(self, agent, max_batch: int = 8, max_wait_ms: float = 20.0):
+        self.agent = agent
+        self.max_batch = max(1, max_batch)
+        self.max_wait_s = max(0.0, max_wait_ms) / 1000.0
+        self._queue: queue.Queue = queue.Queue()
+        self._stop = threading.Event()
+        # makes "not stopped -> enqueue" atomic with stop()'s sentinel
+        self._lock = threading.Lock()
+        self._worker = threading.Thread(target=self._run, name="batcher", daemon=True)
+        self.batches = 0
+        self.requests = 0
+
+    def start(self) -> "DynamicBatcher":
+        self._worker.start()
+        return self
+
+    def stop(self) -> None:
+        with self._lock:
+            self._stop.set()
+            self._queue.put(None)
+        self._worker.join(timeout=5)
+
+    def submit(self, schema: str, question: str, max_new_tokens: int | None = None) -> Future:
+        fut: Future = Future()
+        with self._lock:
+            if self._stop.is_set():
+                fut.set_exception(RuntimeError("batcher stopped"))
+            else:
+                self._queue.put((schema, question, max_new_tokens, fut))
+        return fut
+
+    def _fail_pending(self) -> None:
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                return
+            if item is not None:
+                item[3].set_exception(RuntimeError("batcher stopped"))
+
+    def _collect(self) -> list:
+        first = self._queue.get()
+        if first is None:
+            return []
+        batch = [first]
+        deadline = time.monotonic() + self.max_wait_s
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if item is None:
+                self._stop.set()
+                break
+            batch.append(item)
+        return batch
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            batch = self._collect()
+            if not batch:
+                continue
+
+            by_tokens: dict = {}
+            for item in batch:
+                by_tokens.setdefault(item[2], []).append(item)
+
+            for max_new_tokens, items in by_tokens.items():
+                t0 = time.time()
+                try:
+                    gens = self.agent.generate_batch([(s, q) for s, q, _, _ in items], max_new_tokens=max_new_tokens)
+                except Exception as e:  # propagate to every waiting caller
+                    for *_, fut in items:
+                        fut.set_exception(e)
+                    continue
+                batch_time = time.time() - t0
+                for (*_, fut), gen in zip(items, gens):
+                    fut.set_result({**gen, "batch_size": len(items), "batch_time_s": round(batch_time, 4)})
+
+                self.batches += 1
+                self.requests += len(items)
+        self._fail_pending()
+
+
+def _make_handler(agent, batcher: DynamicBatcher):
+    class Handler(BaseHTTPRequestHandler):
+        # HTTP/1.0: the response body ends when the connection closes, which
+        # lets /generate stream lines without Content-Length or chunking.
+        protocol_version = "HTTP/1.0"
+
+        def log_message(self, fmt, *args):  # keep the console quiet
+            pass
+
+        def _send_json(self, obj, status: int = 200) -> None:
+            body = json.dumps(obj, ensure_ascii=False).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _read_json(self) -> dict:
+            length = int(self.headers.get("Content-Length") or 0)
+            return json.loads(self.rfile.read(length) or b"{}")
+
+        def do_GET(self):
+            if self.path == "/health":
+                self._send_json({"ok": True, "batches": batcher.batches, "requests": batcher.requests})
+            elif self.path == "/info":
+                self._send_json(agent.info())
+            else:
+                self._send_json({"error": f"unknown path {self.path}"}, status=404)
+
+        def do_POST(self):
+            try:
+                payload = self._read_json()
+            except ValueError as e:
+                self._send_json({"error": f"bad JSON: {e}"}, status=400)
+                return
+
+            if self.path == "/tokenize_len":
+                self._send_json({"tokens": agent.tokenize_len(str(payload.get("text", "")))})
+                return
+            if self.path != "/generate":
+                self._send_json({"error": f"unknown path {self.path}"}, status=404)
+                return
+
+            items = payload.get("items")
+            if items is None:
+                items = [payload]
+            futures = {
+                batcher.submit(str(it.get("schema", "")), str(it.get("question", "")), it.get("max_new_tokens")): i
+                for i, it in enumerate(items)
+            }
+
+            self.send_response(200)
+            self.send_header("Content-Type", "application/x-ndjson")
+            self.end_headers()
+            for fut in as_completed(futures):
+                idx = futures[fut]
+                try:
+                    line = {"index": idx, **fut.result()}
+                except Exception as e:
+                    line = {"index": idx, "error": str(e)}
+                self.wfile.write((json.dumps(line, ensure_ascii=False) + "\n").encode("utf-8"))
+                self.wfile.flush()
+
+    return Handler
+
+
+def serve(
+    agent,
+    host: str = DEFAULT_HOST,
+    port: int = DEFAULT_PORT,
+    max_batch: int = 8,
+    max_wait_ms: float = 20.0,
+) -> None:
+    """Run the inference service until interrupted (Ctrl+C)."""
+    batcher = DynamicBatcher(agent, max_batch=max_batch, max_wait_ms=max_wait_ms).start()
+    httpd = ThreadingHTTPServer((host, port), _make_handler(agent, batcher))
+    httpd.daemon_threads = True
+    print(f"🚀 Serving '{agent.name}' on http://{host}:{port} (max batch {max_batch}, wait {max_wait_ms} ms)")
+    try:
+        httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        httpd.server_close()
+        batcher.stop()
+        print(f"✅ Server stopped ({batcher.requests} requests in {batcher.batches} batches)")
+
+
+# --- Client --------------------------------------------------------------------
+
+
+class RemoteAgent:
+    """Text2SQLAgent implementation backed by a running inference server."""
+
+    name = "remote"
+
+    def __init__(self, url: str = f"http://{DEFAULT_HOST}:{DEFAULT_PORT}", timeout: float = 600.0):
+        self.url = url.rstrip("/")
+        self.timeout = timeout
+        self._info: dict | None = None
+
+    def _post(self, path: str, payload: dict):
+        req = urllib.request.Request(
+            self.url + path,
+            data=json.dumps(payload).encode("utf-8"),
+            headers={"Content-Type": "application/json"},
+            method="POST",
+        )
+        return urllib.request.urlopen(req, timeout=self.timeout)
+
+    def info(self) -> dict:
+        if self._info is None:
+            with urllib.request.urlopen(self.url + "/info", timeout=self.timeout) as resp:
+                self._info = {**json.loads(resp.read()), "server": self.url}
+        return self._info
+
+    def tokenize_len(self, text: str) -> int:
+        with self._post("/tokenize_len", {"text": text}) as resp:
+            return int(json.loads(resp.read())["tokens"])
+
+    def generate(self, schema: str, question: str, max_new_tokens: int | None = None) -> dict:
+        return self.generate_batch([(schema, question)], max_new_tokens=max_new_tokens)[0]
+
+    def generate_batch(self, items: list[tuple[str, str]], max_new_tokens: int | None = None) -> list[dict]:
+        results = list(self.stream_batch(items, max_new_tokens=max_new_tokens))
+        results.sort(key=lambda r: r["index"])
+        for r in results:
+            if "error" in r:
+                raise RuntimeError(f"Inference server error: {r['error']}")
+        return results
+
+    def stream_batch(self, items: list[tuple[str, str]], max_new_tokens: int | None = None):
+        """Yield results (each with its 'index') in completion order."""
+        payload = {
+            "items": [
+                {"schema": schema, "question": question, "max_new_tokens": max_new_tokens}
+                for schema, question in items
+            ]
+        }
+        with self._post("/generate", payload) as resp:
+            for line in resp:
+                line = line.strip()
+                if line:
+                    yield json.loads(line)
+
+    def generate_sql(self, schema: str, question: str, max_new_tokens: int | None = None) -> str:
+        return self.generate(schema, question, max_new_tokens=max_new_tokens)["sql"]
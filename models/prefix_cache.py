@@ -0,0 +1,147 @@
+"""
+models/prefix_cache.py
+
+KV cache for shared prompt prefixes.
+
+Prompts of questions on the same database start with the same tokens (schema
+header, schema, question header), so the attention keys/values of that
+prefix are the same for every question. The cache runs the prefix through
+the model once, keeps its past_key_values (small LRU, one entry per prefix),
+and a batch then only runs the per-question suffixes:
+
+    prefix | pad ... pad | suffix_i      (attention mask 0 on the pads)
+
+Padding goes between the shared prefix and the suffix so the cached prefix
+stays at the same positions for every row; position ids follow the attention
+mask, so every row sees exactly the positions of its unpadded prompt and
+greedy output is unchanged.
+
+Entries are large (layers x 2 x prefix_len x hidden floats: ~0.6 MB per token
+for GPT-2 XL), so keep max_entries small and feed batches grouped by
+database.
+"""
+
+import hashlib
+import threading
+from collections import OrderedDict
+
+import torch
+from transformers import DynamicCache
+
+
+def common_prefix_len(rows: list[list[int]]) -> int:
+    """Length of the longest common token prefix, leaving >= 1 suffix token per row."""
+    if not rows:
+        return 0
+    limit = min(len(r) for r in rows) - 1
+    first = rows[0]
+    n = 0
+    while n < limit and all(r[n] == first[n] for r in rows):
+        n += 1
+    return max(0, n)
+
+
+class PrefixKVCache:
+    """
+    Args:
+        model: causal LM the keys/values belong to
+        max_entries: prefixes kept (LRU)
+        min_tokens: shorter common prefixes are not worth caching
+    """
+
+    def __init__(self, model, max_entries: int = 2, min_tokens: int = 32):
+        self.model = model
+        self.max_entries = max(1, max_entries)
+        self.min_tokens = min_tokens
+        self._entries: OrderedDict[str, tuple] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.tokens_saved = 0
+
+    @staticmethod
+    def _key(prefix_ids: list[int]) -> str:
+        return hashlib.sha256(",".join(map(str, prefix_ids)).encode("ascii")).hexdigest()
+
+    def _prefix_kv(self, prefix_ids: list[int]) -> tuple[tuple, bool]:
+        """(legacy (key, value) tuples per layer for one prefix row, cache hit)."""
+        key = self._key(prefix_ids)
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key], True
+
+        device = self.model.device
+        with torch.no_grad():
+            out = self.model(input_ids=torch.tensor([prefix_ids], device=device), use_cache=True)
+        past = out.past_key_values
+        if hasattr(past, "to_legacy_cache"):
+            past = past.to_legacy_cache()
+
+        with self._lock:
+            self.misses += 1
+            self._entries[key] = past
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return past, False
+
+    def prefix_len(self, rows: list[list[int]], max_prefix: int | None = None) -> int:
+        """
+        Prefix length prepare() will use (0 = not worth caching).
+
+        max_prefix caps it at a stable boundary (e.g. the end of the schema
+        part of the prompt), so batches whose questions happen to share a
+        first word still hit the same cache entry.
+        """
+        n = common_prefix_len(rows)
+        if max_prefix is not None:
+            n = min(n, max_prefix)
+        return n if n >= self.min_tokens else 0
+
+    def prepare(self, rows: list[list[int]], pad_id: int, max_prefix: int | None = None) -> tuple[dict, int] | None:
+        """
+        (generate() kwargs, prefix length) for rows sharing a cached prefix, or
+        None if the common prefix is too short. The kwargs are input_ids,
+        attention_mask and past_key_values; generated tokens start at
+        input_ids.shape[1], as with left padding.
+        """
+        n = self.prefix_len(rows, max_prefix)
+        if not n:
+            return None
+        prefix = rows[0][:n]
+        past, hit = self._prefix_kv(prefix)
+        with self._lock:
+            # prefix tokens the model did not have to run again
+            self.tokens_saved += n * len(rows) - (0 if hit else n)
+
+        suffixes = [r[n:] for r in rows]
+        width = max(len(s) for s in suffixes)
+        input_ids = [prefix + [pad_id] * (width - len(s)) + s for s in suffixes]
+        attn = [[1] * n + [0] * (width - len(s)) + [1] * len(s) for s in suffixes]
+
+        # one copy of the prefix per row; generate() extends the cache in place
+        batch = len(rows)
+        expanded = tuple(
+            (k.expand(batch, *k.shape[1:]).contiguous(), v.expand(batch, *v.shape[1:]).contiguous())
+            for k, v in past
+        )
+        if getattr(self.model, "_supports_cache_class", False):
+            expanded = DynamicCache.from_legacy_cache(expanded)
+
+        device = self.model.device
+        kwargs = {
+            "input_ids": torch.tensor(input_ids, device=device),
+            "attention_mask": torch.tensor(attn, device=device),
+            "past_key_values": expanded,
+        }
+        return kwargs, n
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "tokens_saved": self.tokens_saved,
+            }
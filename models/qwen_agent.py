@@ -2,55 +2,74 @@ import torch
 import re
 from transformers import AutoTokenizer, AutoModelForCausalLM
 
+from models.base import build_prompt
+from models.hf_agent import HFAgentBase
+
 # Χρησιμοποιούμε την έκδοση 1.5B για να τρέχει γρήγορα στο laptop σου
 MODEL_ID = "Qwen/Qwen2.5-Coder-1.5B-Instruct"
+# Μικρό draft μοντέλο (ίδιο vocabulary) για speculative decoding
+DRAFT_MODEL_ID = "Qwen/Qwen2.5-Coder-0.5B-Instruct"
+
+class QwenAgent(HFAgentBase):
+    name = "qwen1.5b"
+
+    def __init__(
+        self,
+        device: str | None = None,
+        max_new_tokens: int = 256,
+        model_id: str = MODEL_ID,
+        draft_model_id: str | None = None,
+        num_draft_tokens: int = 4,
+        spec_check: bool = False,
+        constrained: bool = False,
+        generation_cache=None,
+        prefix_cache: int = 0,
+        max_prompt_tokens: int | None = None,
+    ):
+        self.model_id = model_id
+        print(f"⏳ Loading {self.model_id} locally... (this might take a minute)")
+        self.device = device or ("cuda" if torch.cuda.is_available() else "cpu")
+        self.default_max_new_tokens = max_new_tokens
 
-class QwenAgent:
-    def __init__(self):
-        print(f"⏳ Loading {MODEL_ID} locally... (this might take a minute)")
-        self.device = "cuda" if torch.cuda.is_available() else "cpu"
-        
         # Φόρτωση του Μοντέλου
-        self.tokenizer = AutoTokenizer.from_pretrained(MODEL_ID)
+        self.tokenizer = AutoTokenizer.from_pretrained(self.model_id)
+        # left padding για batched generation
+        self.tokenizer.padding_side = "left"
+        if self.tokenizer.pad_token is None:
+            self.tokenizer.pad_token = self.tokenizer.eos_token
         self.model = AutoModelForCausalLM.from_pretrained(
-            MODEL_ID,
-            torch_dtype=torch.float32, 
+            self.model_id,
+            torch_dtype=torch.float32,
             device_map=self.device
         )
         self.model.eval()
+        self.max_ctx = getattr(self.model.config, "max_position_embeddings", 32768)
+        # prompt + νέα tokens; μικρότερο όριο = λιγότερη μνήμη/χρόνος σε CPU
+        self.max_prompt_tokens = min(self.max_ctx, max_prompt_tokens or self.max_ctx)
         print(f"✅ Model loaded on {self.device.upper()}")
 
-    def generate_sql(self, schema: str, question: str) -> str:
-        prompt = (
-            f"### Database schema:\n{schema}\n\n"
-            f"### Question:\n{question}\n\n"
-            f"### SQL:\n"
-        )
-        
-        inputs = self.tokenizer(prompt, return_tensors="pt").to(self.device)
-        
-        with torch.no_grad():
-            generated_ids = self.model.generate(
-                **inputs,
-                max_new_tokens=256,
-                do_sample=False,
-                pad_token_id=self.tokenizer.eos_token_id
-            )
-            
-        output_text = self.tokenizer.decode(generated_ids[0], skip_special_tokens=True)
-        
+        self._init_speculative(draft_model_id, num_draft_tokens, spec_check)
+        self._init_constraints(constrained)
+        self._init_cache(generation_cache, prefix_cache)
+
+    def build_prompt(self, schema: str, question: str) -> str:
+        return build_prompt(schema, question)
+
+    def _completion_to_sql(self, raw: str) -> str:
+        return self._extract_sql(raw)
+
+    @staticmethod
+    def _extract_sql(completion: str) -> str:
         # --- ΤΕΛΙΚΟΣ ΚΑΘΑΡΙΣΜΟΣ (FINAL CLEANING) ---
-        
+
         # 1. Κρατάμε μόνο το κείμενο μετά το Prompt
-        if "### SQL:" in output_text:
-            raw_answer = output_text.split("### SQL:")[-1].strip()
-        else:
-            raw_answer = output_text.replace(prompt, "").strip()
+        # (το completion περιέχει ήδη μόνο τα νέα tokens)
+        raw_answer = completion.split("### SQL:")[-1].strip()
 
         # 2. Ελέγχουμε αν υπάρχει code block (```sql ... ```)
         # Αυτό το regex ψάχνει κείμενο ανάμεσα στα backticks
         code_block_match = re.search(r"```(?:sql)?\s*(.*?)\s*```", raw_answer, re.DOTALL | re.IGNORECASE)
-        
+
         if code_block_match:
             # Αν βρήκαμε code block, παίρνουμε ΜΟΝΟ το περιεχόμενό του
             sql = code_block_match.group(1).strip()
@@ -62,8 +81,8 @@ class QwenAgent:
         # Το SQL τελειώνει πάντα με ;. Οτιδήποτε μετά είναι "μπλα-μπλα" του μοντέλου.
         if ";" in sql:
             sql = sql.split(";")[0] + ";"
-            
+
         # 4. Τελευταίο καθάρισμα για τυχόν σκουπίδια που έμειναν
         sql = sql.replace("```", "").strip()
-        
-        return sql
\ No newline at end of file
+
+        return sql
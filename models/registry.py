@@ -0,0 +1,166 @@
+"""
+models/registry.py
+
+Name -> agent registry with lazy construction and LRU eviction.
+
+Agents are only imported/instantiated the first time they are requested, and
+at most `max_resident` of them are kept in memory. When a new agent would
+exceed that limit, the least recently used one is dropped (and the CUDA cache
+emptied, if any) before the new one is loaded.
+
+Usage:
+    from models.registry import AgentRegistry
+
+    registry = AgentRegistry(max_resident=1)
+    agent = registry.get("gpt2xl")
+    out = agent.generate(schema, question)
+"""
+
+import gc
+import importlib
+import inspect
+from collections import OrderedDict
+
+
+# name -> (import path "module:Class", default constructor kwargs)
+_AGENT_SPECS: dict[str, tuple[str, dict]] = {
+    "gpt2xl": ("models.gpt2xl_agent:GPT2XLAgent", {}),
+    "qwen1.5b": ("models.qwen_agent:QwenAgent", {}),
+    # speculative decoding with a small draft model (same greedy output)
+    "gpt2xl-spec": ("models.gpt2xl_agent:GPT2XLAgent", {"draft_model_id": "distilbert/distilgpt2"}),
+    "qwen1.5b-spec": ("models.qwen_agent:QwenAgent", {"draft_model_id": "Qwen/Qwen2.5-Coder-0.5B-Instruct"}),
+}
+
+
+def register_agent(name: str, target: str, **kwargs) -> None:
+    """
+    Register (or override) an agent under `name`.
+
+    Args:
+        name: short model name used on the command line (e.g. 'qwen1.5b')
+        target: import path in the form 'package.module:ClassName'
+        kwargs: default constructor arguments
+    """
+    if ":" not in target:
+        raise ValueError(f"Agent target must look like 'module:Class', got: {target!r}")
+    _AGENT_SPECS[name.lower()] = (target, dict(kwargs))
+
+
+def available_models() -> list[str]:
+    """Names that can be passed to AgentRegistry.get()."""
+    return sorted(_AGENT_SPECS)
+
+
+def parse_model_list(value: str) -> list[str]:
+    """
+    Parse a comma-separated --models value, validating every name.
+
+    Raises:
+        ValueError: on empty input or unknown model names.
+    """
+    names = [n.strip().lower() for n in value.split(",") if n.strip()]
+    if not names:
+        raise ValueError("No model names given.")
+    unknown = [n for n in names if n not in _AGENT_SPECS]
+    if unknown:
+        raise ValueError(f"Unknown model(s): {', '.join(unknown)}. Available: {', '.join(available_models())}")
+    # keep order, drop duplicates
+    return list(dict.fromkeys(names))
+
+
+def _accepted_kwargs(cls, kwargs: dict) -> dict:
+    """Keep only the kwargs that cls.__init__ accepts (unless it takes **kwargs)."""
+    params = inspect.signature(cls.__init__).parameters
+    if any(p.kind is inspect.Parameter.VAR_KEYWORD for p in params.values()):
+        return dict(kwargs)
+    return {k: v for k, v in kwargs.items() if k in params}
+
+
+def build_agent(name: str, **overrides):
+    """
+    Instantiate an agent by name (no caching).
+
+    Overrides the agent class does not accept (e.g. draft_model_id for a
+    RemoteAgent) are ignored, so one set of options can be passed to all models.
+    """
+    key = name.lower()
+    if key not in _AGENT_SPECS:
+        raise ValueError(f"Unknown model: {name!r}. Available: {', '.join(available_models())}")
+
+    target, defaults = _AGENT_SPECS[key]
+    module_name, class_name = target.split(":", 1)
+    cls = getattr(importlib.import_module(module_name), class_name)
+
+    overrides = {k: v for k, v in overrides.items() if v is not None}
+    kwargs = {**defaults, **_accepted_kwargs(cls, overrides)}
+    agent = cls(**kwargs)
+    # registry name wins over the class default (same class may be registered twice)
+    agent.name = key
+    return agent
+
+
+class AgentRegistry:
+    """LRU cache of loaded agents, keyed by registry name."""
+
+    def __init__(self, max_resident: int = 1, **agent_kwargs):
+        """
+        Args:
+            max_resident: max number of agents kept loaded at the same time (>= 1)
+            agent_kwargs: extra constructor kwargs passed to every agent
+        """
+        if max_resident < 1:
+            raise ValueError(f"max_resident must be >= 1, got {max_resident}")
+        self.max_resident = max_resident
+        self.agent_kwargs = agent_kwargs
+        self._agents: OrderedDict[str, object] = OrderedDict()
+        self.loads = 0
+        self.evictions = 0
+
+    def get(self, name: str):
+        """Return a loaded agent, building it (and evicting the LRU one) if needed."""
+        key = name.lower()
+        if key in self._agents:
+            self._agents.move_to_end(key)
+            return self._agents[key]
+
+        while len(self._agents) >= self.max_resident:
+            self._evict_lru()
+
+        agent = build_agent(key, **self.agent_kwargs)
+        self._agents[key] = agent
+        self.loads += 1
+        return agent
+
+    def resident(self) -> list[str]:
+        """Loaded agent names, least recently used first."""
+        return list(self._agents)
+
+    def is_resident(self, name: str) -> bool:
+        return name.lower() in self._agents
+
+    def evict(self, name: str) -> None:
+        key = name.lower()
+        if key in self._agents:
+            del self._agents[key]
+            self.evictions += 1
+            _release_memory()
+
+    def _evict_lru(self) -> None:
+        name, _ = self._agents.popitem(last=False)
+        self.evictions += 1
+        print(f"♻️  Evicting model '{name}' (max resident: {self.max_resident})")
+        _release_memory()
+
+    def clear(self) -> None:
+        self._agents.clear()
+        _release_memory()
+
+
+def _release_memory() -> None:
+    gc.collect()
+    try:
+        import torch
+    except ImportError:
+        return
+    if torch.cuda.is_available():
+        torch.cuda.empty_cache()
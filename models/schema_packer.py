@@ -0,0 +1,156 @@
+"""
+models/schema_packer.py
+
+Token-budget-aware schema packing for prompts.
+
+Instead of tokenizing the whole compact schema for every question and
+slicing it at the budget (which cuts the last table mid-column), the packer:
+
+  1. parses the compact schema ("table(col1, col2, ...)" per line) once per
+     schema text and caches the token ids of every table line;
+  2. scores tables by question relevance (word overlap with the table and
+     column names) plus connectivity to relevant tables (shared *_id columns,
+     used as an FK proxy since the compact schema has no constraints);
+  3. picks whole tables with a 0/1 knapsack over the token budget and emits
+     them in the original schema order.
+
+If the whole schema fits, it is returned unchanged (no scoring needed).
+"""
+
+import re
+
+
+_LINE_RE = re.compile(r"^\s*([A-Za-z0-9_]+)\s*\((.*)\)\s*$")
+_WORD_RE = re.compile(r"[a-z0-9]+")
+
+
+def _words(text: str) -> set[str]:
+    # split snake_case / CamelCase-ish names into lowercase words
+    return set(_WORD_RE.findall(text.lower().replace("_", " ")))
+
+
+class _ParsedSchema:
+    """Per-schema cache: table lines, token ids, word sets and link graph."""
+
+    def __init__(self, schema: str, tokenize):
+        self.lines: list[str] = [ln for ln in schema.splitlines() if ln.strip()]
+        self.ids: list[list[int]] = [tokenize(ln) for ln in self.lines]
+        self.sep_ids: list[int] = tokenize("\n")
+        self.total = sum(len(x) for x in self.ids) + len(self.sep_ids) * max(0, len(self.lines) - 1)
+
+        self.names: list[str] = []
+        self.columns: list[list[str]] = []
+        for ln in self.lines:
+            m = _LINE_RE.match(ln)
+            if m:
+                self.names.append(m.group(1))
+                self.columns.append([c.strip().split()[0] for c in m.group(2).split(",") if c.strip()])
+            else:
+                self.names.append(ln.strip())
+                self.columns.append([])
+
+        self.name_words = [_words(n) for n in self.names]
+        self.col_words = [set().union(*(_words(c) for c in cols)) if cols else set() for cols in self.columns]
+
+        # link tables that share an id-like column (FK proxy)
+        id_cols = [{c.lower() for c in cols if c.lower().endswith("id")} for cols in self.columns]
+        self.links: list[set[int]] = [set() for _ in self.lines]
+        for i in range(len(self.lines)):
+            for j in range(i + 1, len(self.lines)):
+                if id_cols[i] & id_cols[j]:
+                    self.links[i].add(j)
+                    self.links[j].add(i)
+
+
+class SchemaPacker:
+    """
+    Pack whole schema tables into a token budget.
+
+    Args:
+        tokenize: callable(text) -> list[int] (no special tokens)
+        max_cached_schemas: number of parsed schemas kept (one per database is typical)
+    """
+
+    def __init__(self, tokenize, max_cached_schemas: int = 16):
+        self.tokenize = tokenize
+        self.max_cached_schemas = max_cached_schemas
+        self._cache: dict[str, _ParsedSchema] = {}
+
+    def _parsed(self, schema: str) -> _ParsedSchema:
+        parsed = self._cache.get(schema)
+        if parsed is None:
+            if len(self._cache) >= self.max_cached_schemas:
+                self._cache.pop(next(iter(self._cache)))
+            parsed = _ParsedSchema(schema, self.tokenize)
+            self._cache[schema] = parsed
+        return parsed
+
+    def _scores(self, parsed: _ParsedSchema, question: str) -> list[float]:
+        q = _words(question)
+        base = [
+            2.0 * len(q & parsed.name_words[i]) + 1.0 * len(q & parsed.col_words[i])
+            for i in range(len(parsed.lines))
+        ]
+        scores = []
+        for i, b in enumerate(base):
+            # neighbours of relevant tables are needed for joins
+            link_bonus = 0.5 * sum(1 for j in parsed.links[i] if base[j] > 0)
+            # small prior for well-connected tables; +1 so every table has value
+            scores.append(1.0 + b + link_bonus + 0.05 * len(parsed.links[i]))
+        return scores
+
+    def pack(self, schema: str, question: str, budget: int) -> tuple[list[int], list[int]]:
+        """
+        Return (schema_token_ids, included_table_indices) fitting in `budget` tokens.
+        Indices refer to the non-empty lines of the schema, in schema order.
+        """
+        parsed = self._parsed(schema)
+        n = len(parsed.lines)
+        if n == 0 or budget <= 0:
+            return [], []
+        if parsed.total <= budget:
+            return self._join(parsed, list(range(n))), list(range(n))
+
+        sep = len(parsed.sep_ids)
+        # each table costs its tokens + one separator (the last separator is slack)
+        weights = [len(parsed.ids[i]) + sep for i in range(n)]
+        values = self._scores(parsed, question)
+        chosen = _knapsack(weights, values, budget + sep)
+        return self._join(parsed, chosen), chosen
+
+    def tables_and_columns(self, schema: str, indices: list[int]) -> tuple[int, int]:
+        parsed = self._parsed(schema)
+        return len(indices), sum(len(parsed.columns[i]) for i in indices)
+
+    @staticmethod
+    def _join(parsed: _ParsedSchema, indices: list[int]) -> list[int]:
+        out: list[int] = []
+        for k, i in enumerate(indices):
+            if k:
+                out.extend(parsed.sep_ids)
+            out.extend(parsed.ids[i])
+        return out
+
+
+def _knapsack(weights: list[int], values: list[float], capacity: int) -> list[int]:
+    """0/1 knapsack; returns chosen indices in ascending order."""
+    n = len(weights)
+    best = [0.0] * (capacity + 1)
+    keep = [[False] * (capacity + 1) for _ in range(n)]
+    for i in range(n):
+        w, v = weights[i], values[i]
+        if w > capacity:
+            continue
+        for c in range(capacity, w - 1, -1):
+            cand = best[c - w] + v
+            if cand > best[c]:
+                best[c] = cand
+                keep[i][c] = True
+
+    chosen = []
+    c = capacity
+    for i in range(n - 1, -1, -1):
+        if keep[i][c]:
+            chosen.append(i)
+            c -= weights[i]
+    return sorted(chosen)
@@ -0,0 +1,149 @@
+"""
+models/speculative.py
+
+Greedy speculative decoding with a small draft model.
+
+The draft model proposes `k` tokens greedily, the target model scores all of
+them in a single forward pass, and the longest prefix that matches the
+target's own greedy choice is accepted, followed by one token from the target
+(the correction, or a bonus token when everything was accepted). The output
+is therefore the target model's greedy output; only the number of target
+forward passes changes.
+
+Both models must share the tokenizer vocabulary (e.g. distilgpt2 / gpt2-xl,
+Qwen2.5-Coder-0.5B / Qwen2.5-Coder-1.5B). Works on one sequence at a time.
+"""
+
+import torch
+
+
+def _crop_cache(past, length: int):
+    """Drop cached positions >= length (supports Cache objects and legacy tuples)."""
+    if past is None:
+        return None
+    if hasattr(past, "crop"):
+        past.crop(length)
+        return past
+    return tuple(tuple(t[:, :, :length, :] for t in layer) for layer in past)
+
+
+def _new_cache(model):
+    """Empty Cache object for models that support one, else None (legacy tuples)."""
+    if getattr(model, "_supports_cache_class", False):
+        try:
+            from transformers import DynamicCache
+        except ImportError:
+            return None
+        return DynamicCache()
+    return None
+
+
+def _cache_len(past) -> int:
+    if past is None:
+        return 0
+    if hasattr(past, "get_seq_length"):
+        return int(past.get_seq_length())
+    return int(past[0][0].shape[2])
+
+
+class SpeculativeDecoder:
+    """Greedy assisted decoding for a (target, draft) pair of causal LMs."""
+
+    def __init__(
+        self,
+        target,
+        draft,
+        eos_token_id: int | list[int] | None,
+        num_draft_tokens: int = 4,
+        max_draft_tokens: int = 16,
+    ):
+        self.target = target
+        self.draft = draft
+        if eos_token_id is None:
+            self.eos_ids = set()
+        elif isinstance(eos_token_id, int):
+            self.eos_ids = {eos_token_id}
+        else:
+            self.eos_ids = set(eos_token_id)
+        self.num_draft_tokens = max(1, num_draft_tokens)
+        self.max_draft_tokens = max(self.num_draft_tokens, max_draft_tokens)
+
+    def _forward(self, model, past, tokens: list[int], device):
+        out = model(
+            input_ids=torch.tensor([tokens], device=device),
+            past_key_values=past,
+            use_cache=True,
+        )
+        return out.logits[0], out.past_key_values
+
+    @torch.no_grad()
+    def generate(self, prompt_ids: list[int], max_new_tokens: int) -> tuple[list[int], dict]:
+        """
+        Return (new_token_ids, stats) for one prompt.
+
+        stats = {"draft_tokens", "accepted_tokens", "acceptance_rate", "target_passes"}
+        """
+        device = self.target.device
+        seq = list(prompt_ids)
+        prompt_len = len(seq)
+        k = self.num_draft_tokens
+
+        # Invariant: both caches cover at most seq[:-1]; missing tokens are fed next round.
+        t_past = _new_cache(self.target)
+        d_past = _new_cache(self.draft)
+        if len(seq) > 1:
+            _, t_past = self._forward(self.target, t_past, seq[:-1], device)
+            _, d_past = self._forward(self.draft, d_past, seq[:-1], device)
+
+        proposed = accepted = passes = 0
+
+        while len(seq) - prompt_len < max_new_tokens:
+            remaining = max_new_tokens - (len(seq) - prompt_len)
+            k_round = max(1, min(k, remaining - 1)) if remaining > 1 else 0
+
+            # 1) Draft proposes k_round tokens greedily
+            drafts: list[int] = []
+            if k_round:
+                logits, d_past = self._forward(self.draft, d_past, seq[_cache_len(d_past):], device)
+                drafts.append(int(logits[-1].argmax()))
+                while len(drafts) < k_round and drafts[-1] not in self.eos_ids:
+                    logits, d_past = self._forward(self.draft, d_past, [drafts[-1]], device)
+                    drafts.append(int(logits[-1].argmax()))
+
+            # 2) Target scores pending tokens + drafts in one pass
+            t_start = _cache_len(t_past)
+            pending = seq[t_start:]
+            logits, t_past = self._forward(self.target, t_past, pending + drafts, device)
+            passes += 1
+            greedy = logits[len(pending) - 1:].argmax(dim=-1).tolist()  # greedy[i] follows drafts[:i]
+
+            # 3) Accept the matching prefix, then one target token
+            n_ok = 0
+            while n_ok < len(drafts) and drafts[n_ok] == greedy[n_ok]:
+                n_ok += 1
+            new_tokens = drafts[:n_ok] + [greedy[n_ok]]
+            proposed += len(drafts)
+            accepted += n_ok
+
+            # adapt the draft length like HF's "heuristic" schedule
+            if drafts:
+                k = min(self.max_draft_tokens, k + 2) if n_ok == len(drafts) else max(1, k - 1)
+
+            stop = next((i for i, tok in enumerate(new_tokens) if tok in self.eos_ids), None)
+            if stop is not None:
+                seq.extend(new_tokens[: stop + 1])
+                break
+            seq.extend(new_tokens)
+
+            # 4) Roll caches back to the committed prefix (minus the pending last token)
+            t_past = _crop_cache(t_past, len(seq) - 1)
+            d_past = _crop_cache(d_past, min(_cache_len(d_past), len(seq) - 1))
+
+        new_ids = seq[prompt_len:prompt_len + max_new_tokens]
+        stats = {
+            "draft_tokens": proposed,
+            "accepted_tokens": accepted,
+            "acceptance_rate": round(accepted / proposed, 4) if proposed else None,
+            "target_passes": passes,
+        }
+        return new_ids, stats
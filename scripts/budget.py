@@ -0,0 +1,144 @@
+"""
+scripts/budget.py
+
+Wall-clock / token budget governor for the baseline runner
+(--time_budget SECONDS, --token_budget TOKENS).
+
+Before each chunk the runner asks how many of the chunk's questions still fit.
+The estimate uses rolling (EWMA) per-question costs observed so far:
+
+  - generation seconds and tokens (prompt + output) per question, per model
+  - DB seconds per evaluated question (pred + gold execution), to reserve
+    time for draining the questions still in the evaluation pipeline
+
+Every model answers the same questions of a chunk, so when the budget runs out
+all models stop at the same question and the run still ends with a complete,
+paired summary. Until a model has been observed, chunks are capped to one
+batch (warm-up) so a first estimate exists before large chunks are started.
+"""
+
+import threading
+import time
+
+
+class _Ewma:
+    def __init__(self, alpha: float = 0.2):
+        self.alpha = alpha
+        self.value: float | None = None
+
+    def update(self, x: float) -> None:
+        self.value = x if self.value is None else self.alpha * x + (1 - self.alpha) * self.value
+
+
+class BudgetGovernor:
+    """
+    Args:
+        time_budget_s: wall-clock budget for the whole run (0 = unlimited)
+        token_budget: prompt + output tokens for the whole run (0 = unlimited)
+        models: models that answer every question
+        db_workers: DB worker threads (to estimate the pipeline drain time)
+        warmup: questions per model per chunk before costs are known
+    """
+
+    def __init__(
+        self,
+        time_budget_s: float = 0.0,
+        token_budget: int = 0,
+        models: list[str] | None = None,
+        db_workers: int = 1,
+        warmup: int = 1,
+    ):
+        self.time_budget_s = time_budget_s
+        self.token_budget = token_budget
+        self.models = list(models or [])
+        self.db_workers = max(1, db_workers)
+        self.warmup = max(1, warmup)
+
+        self.t_start = time.time()
+        self.tokens_used = 0
+        self.stopped_reason: str | None = None
+
+        self._gen_s = {m: _Ewma() for m in self.models}
+        self._tokens = {m: _Ewma() for m in self.models}
+        self._db_s = _Ewma()
+        self._in_flight = 0
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.time_budget_s > 0 or self.token_budget > 0
+
+    def elapsed(self) -> float:
+        return time.time() - self.t_start
+
+    # --- Observations ---------------------------------------------------------------
+
+    def observe_generation(self, model: str, n_questions: int, seconds: float, tokens: int) -> None:
+        """After a generate_batch() call (model thread)."""
+        if n_questions <= 0:
+            return
+        self._gen_s[model].update(seconds / n_questions)
+        self._tokens[model].update(tokens / n_questions)
+        with self._lock:
+            self.tokens_used += tokens
+            self._in_flight += n_questions
+
+    def observe_repair(self, tokens: int) -> None:
+        """After an execution-feedback retry was generated (model thread)."""
+        with self._lock:
+            self.tokens_used += tokens
+
+    def observe_evaluation(self, db_seconds: float) -> None:
+        """After a record was written (writer thread)."""
+        with self._lock:
+            self._db_s.update(db_seconds)
+            self._in_flight = max(0, self._in_flight - 1)
+
+    # --- Decisions ---------------------------------------------------------------------
+
+    def _drain_reserve_s(self) -> float:
+        # time to finish the evaluations still queued, plus a small margin for the summary
+        with self._lock:
+            in_flight = self._in_flight
+            db_s = self._db_s.value or 0.0
+        margin = max(5.0, 0.02 * self.time_budget_s)
+        return in_flight * db_s / self.db_workers + margin
+
+    def affordable(self, n_questions: int) -> int:
+        """How many of the next n_questions every model can still answer within budget."""
+        if not self.enabled or n_questions <= 0:
+            return n_questions
+
+        unknown = any(self._gen_s[m].value is None for m in self.models)
+        n = min(n_questions, self.warmup) if unknown else n_questions
+
+        if self.time_budget_s > 0:
+            remaining = self.time_budget_s - self.elapsed() - self._drain_reserve_s()
+            if remaining <= 0:
+                n_time = 0
+            elif unknown:
+                n_time = n
+            else:
+                per_q = sum(self._gen_s[m].value for m in self.models)
+                db_per_q = (self._db_s.value or 0.0) * len(self.models) / self.db_workers
+                # DB work overlaps generation; only the slower of the two bounds throughput
+                cost = max(per_q, db_per_q)
+                n_time = int(remaining // cost) if cost > 0 else n
+            if n_time <= 0 and self.stopped_reason is None:
+                self.stopped_reason = f"time budget ({self.elapsed():.0f}s of {self.time_budget_s:.0f}s used)"
+            n = min(n, n_time)
+
+        if self.token_budget > 0:
+            remaining_tokens = self.token_budget - self.tokens_used
+            if remaining_tokens <= 0:
+                n_tokens = 0
+            elif unknown:
+                n_tokens = n
+            else:
+                per_q_tokens = sum(self._tokens[m].value for m in self.models)
+                n_tokens = int(remaining_tokens // per_q_tokens) if per_q_tokens > 0 else n
+            if n_tokens <= 0 and self.stopped_reason is None:
+                self.stopped_reason = f"token budget ({self.tokens_used} of {self.token_budget} tokens used)"
+            n = min(n, n_tokens)
+
+        return max(0, n)
@@ -0,0 +1,134 @@
+"""
+scripts/checkpoint.py
+
+Checkpoint/resume helpers for long baseline runs.
+
+Every output JSONL gets a manifest next to it (<out>.manifest.json) holding
+the dataset hash, the model and the run configuration. With --resume the
+runner:
+
+  1. checks the manifest matches the current run (refuses to mix results);
+  2. reads the existing records (dropping a torn last line left by a crash)
+     to rebuild its counters and the set of completed
+     (entry_idx, sentence_idx) keys;
+  3. appends only the missing questions.
+
+Records are appended with fsync batching: the file is flushed and fsynced
+every `fsync_every` records and on close, so a crash loses at most one batch.
+"""
+
+import hashlib
+import json
+import os
+from pathlib import Path
+
+
+def file_sha256(path: Path) -> str:
+    h = hashlib.sha256()
+    with path.open("rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def manifest_path(out_path: Path) -> Path:
+    return out_path.with_name(out_path.name + ".manifest.json")
+
+
+def write_manifest(out_path: Path, manifest: dict) -> None:
+    path = manifest_path(out_path)
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_text(json.dumps(manifest, indent=2, ensure_ascii=False), encoding="utf-8")
+    os.replace(tmp, path)
+
+
+def read_manifest(out_path: Path) -> dict | None:
+    path = manifest_path(out_path)
+    if not path.exists():
+        return None
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+def manifest_mismatch(old: dict, new: dict) -> list[str]:
+    """Keys of the run identity ('dataset_sha256', 'model', 'config') that differ."""
+    diffs = []
+    for key in ("dataset_sha256", "model"):
+        if old.get(key) != new.get(key):
+            diffs.append(key)
+    old_cfg, new_cfg = old.get("config", {}), new.get("config", {})
+    for key in sorted(set(old_cfg) | set(new_cfg)):
+        if old_cfg.get(key) != new_cfg.get(key):
+            diffs.append(f"config.{key}")
+    return diffs
+
+
+def question_key(record: dict) -> tuple[int, int]:
+    return record["entry_idx"], record["sentence_idx"]
+
+
+def load_records(out_path: Path) -> list[dict]:
+    """
+    Read the records of an interrupted run.
+
+    A torn last line (crash in the middle of a write) is cut off the file so
+    appending can continue from the last complete record.
+    """
+    if not out_path.exists():
+        return []
+
+    records = []
+    good_bytes = 0
+    with out_path.open("rb") as f:
+        for line in f:
+            if not line.endswith(b"\n"):
+                break
+            try:
+                records.append(json.loads(line))
+            except json.JSONDecodeError:
+                break
+            good_bytes += len(line)
+
+    if good_bytes < out_path.stat().st_size:
+        print(f"⚠️  Dropping incomplete tail of {out_path} ({out_path.stat().st_size - good_bytes} bytes)")
+        with out_path.open("r+b") as f:
+            f.truncate(good_bytes)
+    return records
+
+
+class CheckpointWriter:
+    """
+    Append-only JSONL writer with batched fsync.
+
+    With `blobs` (scripts/results_io.py BlobWriter) the large repeated fields
+    go to the side table and records keep references.
+    """
+
+    def __init__(self, out_path: Path, append: bool, fsync_every: int = 32, blobs=None):
+        self.fsync_every = max(1, fsync_every)
+        self.blobs = blobs
+        self._f = out_path.open("a" if append else "w", encoding="utf-8")
+        self._unsynced = 0
+
+    def write(self, record: dict) -> None:
+        if self.blobs is not None:
+            record = self.blobs.pack(record)
+        self._f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self._unsynced += 1
+        if self._unsynced >= self.fsync_every:
+            self.sync()
+
+    def sync(self) -> None:
+        if self.blobs is not None:
+            # blobs reach the disk before the records that reference them
+            self.blobs.sync()
+        self._f.flush()
+        os.fsync(self._f.fileno())
+        self._unsynced = 0
+
+    def close(self) -> None:
+        if self._f.closed:
+            return
+        self.sync()
+        self._f.close()
+        if self.blobs is not None:
+            self.blobs.close()
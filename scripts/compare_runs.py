@@ -0,0 +1,154 @@
+"""
+scripts/compare_runs.py
+
+Cross-run comparison cube for plot_results.py --compare.
+
+Accepts any mix of
+  - summary CSVs of jsonl_to_csv_metrics.py (results/*_summary.csv; the
+    numpy backend's <metric>_ci_low/_ci_high columns become error bars)
+  - per-question metrics files (converter CSV or .parquet), which are
+    summarized here with the same numpy backend (bootstrap CIs)
+
+Files are loaded in parallel (one process per file) and aggregated once into
+a cube with one row per
+
+    model x dataset x rdbms x complexity        (complexity "all" = every question)
+
+holding n, EX, pred success rate, execution / generation latency (mean with
+CI, p50, p90) and generation throughput (questions/s = 1 / mean gen time, CI
+from the mean's CI). Model, dataset and RDBMS mode come from the file name
+(<model>_baseline_<dataset>_<rdbms>[_summary]); a run only contributes the
+engine(s) it executed on.
+
+Usage:
+    cube = load_cube(["results/qwen1.5b_baseline_advising_mysql_summary.csv",
+                      "results/gpt2xl_baseline_advising_mysql.parquet"])
+    cube.loc[("qwen1.5b", "advising", "mysql", "all"), "ex"]
+"""
+
+import re
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import pandas as pd
+
+from scripts.metrics_aggregator import BUCKETS
+from scripts.metrics_bootstrap import ColumnarRows, summarize_columns
+from scripts.metrics_schema import read_metrics
+
+RDBMS = ("mysql", "mariadb")
+ALL = "all"
+CUBE_INDEX = ["model", "dataset", "rdbms", "complexity"]
+
+_STEM_RE = re.compile(r"^(?P<model>.+?)_baseline_(?P<dataset>.+)_(?P<mode>mysql|mariadb|both)$")
+
+# cube column -> summary column ({r} = rdbms); CI columns follow when present
+_METRICS = {
+    "ex": "{r}_execution_accuracy_ex",
+    "pred_success_rate": "{r}_pred_success_rate",
+    "exec_time_mean_s": "{r}_exec_time_mean_s",
+    "exec_time_p50_s": "{r}_exec_time_median_s",
+    "gen_time_mean_s": "gen_time_mean_s",
+    "gen_time_p50_s": "gen_time_median_s",
+    "gen_time_p90_s": "gen_time_p90_s",
+}
+_WITH_CI = ("ex", "pred_success_rate", "exec_time_mean_s", "gen_time_mean_s")
+
+
+def parse_run_name(path: Path) -> dict:
+    """{'model', 'dataset', 'mode'} from a results file name (model = stem if it does not match)."""
+    stem = path.stem
+    if stem.endswith("_summary"):
+        stem = stem[: -len("_summary")]
+    m = _STEM_RE.match(stem)
+    if m is None:
+        return {"model": stem, "dataset": None, "mode": None}
+    return m.groupdict()
+
+
+def _summary_rows_of_columnar(path: Path, n_boot: int, seed: int) -> tuple[list[dict], str | None]:
+    df = read_metrics(path)
+    mode = None
+    if "rdbms_mode" in df.columns and df["rdbms_mode"].notna().any():
+        mode = str(df["rdbms_mode"].dropna().iloc[0])
+    # nullable dtypes -> plain Python values with None for missing (what row_flags expects)
+    records = df.astype(object).where(df.notna(), None).to_dict("records")
+    cols = ColumnarRows()
+    for row in records:
+        cols.add(row)
+    return summarize_columns(cols, n_boot=n_boot, seed=seed), mode
+
+
+def _summary_rows_of_csv(path: Path) -> list[dict]:
+    df = pd.read_csv(path)
+    return df.astype(object).where(df.notna(), None).to_dict("records")
+
+
+def _num(value) -> float:
+    return float("nan") if value is None else float(value)
+
+
+def _cube_rows(summary: list[dict], model: str, modes: tuple[str, ...], run: str) -> list[dict]:
+    out = []
+    for s in summary:
+        breakdown = s.get("breakdown")
+        if breakdown not in (None, "complexity"):
+            continue  # paired_diff rows compare two runs, not part of the cube
+        complexity = s["bucket"] if breakdown == "complexity" else ALL
+        for r in modes:
+            row = {
+                "model": model, "dataset": s["dataset"], "rdbms": r, "complexity": complexity,
+                "run": run, "n": int(s["n_questions"]),
+            }
+            for name, col in _METRICS.items():
+                col = col.format(r=r)
+                row[name] = _num(s.get(col))
+                if name in _WITH_CI:
+                    row[f"{name}_ci_low"] = _num(s.get(f"{col}_ci_low"))
+                    row[f"{name}_ci_high"] = _num(s.get(f"{col}_ci_high"))
+            mean, lo, hi = row["gen_time_mean_s"], row["gen_time_mean_s_ci_low"], row["gen_time_mean_s_ci_high"]
+            row["throughput_qps"] = 1.0 / mean if mean > 0 else float("nan")
+            # 1/x is decreasing: the upper bound of the time gives the lower bound of the rate
+            row["throughput_qps_ci_low"] = 1.0 / hi if hi > 0 else float("nan")
+            row["throughput_qps_ci_high"] = 1.0 / lo if lo > 0 else float("nan")
+            out.append(row)
+    return out
+
+
+def load_run(path: str, n_boot: int = 2000, seed: int = 0) -> list[dict]:
+    """Cube rows of one summary CSV or per-question metrics file."""
+    path = Path(path)
+    name = parse_run_name(path)
+    if path.suffix == ".parquet" or "n_questions" not in pd.read_csv(path, nrows=0).columns:
+        summary, mode = _summary_rows_of_columnar(path, n_boot, seed)
+    else:
+        summary, mode = _summary_rows_of_csv(path), None
+    mode = mode or name["mode"]
+    modes = RDBMS if mode in (None, "both") else (mode,)
+    return _cube_rows(summary, name["model"], modes, path.name)
+
+
+def load_cube(paths: list, jobs: int = 0, n_boot: int = 2000, seed: int = 0) -> pd.DataFrame:
+    """
+    Comparison cube of all `paths`, indexed by CUBE_INDEX (sorted; complexity
+    ordered all, then BUCKETS). Files are loaded over a process
+    pool of `jobs` workers (0 = CPU count).
+    When two files give the same cell, the first one (in path order) is kept.
+    """
+    paths = [str(p) for p in paths]
+    if len(paths) > 1 and jobs != 1:
+        with ProcessPoolExecutor(max_workers=jobs or None) as pool:
+            loaded = list(pool.map(load_run, paths, [n_boot] * len(paths), [seed] * len(paths)))
+    else:
+        loaded = [load_run(p, n_boot, seed) for p in paths]
+
+    cube = pd.DataFrame([row for rows in loaded for row in rows])
+    if cube.empty:
+        return cube
+    dup = cube.duplicated(CUBE_INDEX)
+    if dup.any():
+        runs = sorted(set(cube.loc[dup, "run"]))
+        print(f"⚠️ {int(dup.sum())} duplicate cube cells ignored (from {', '.join(runs)})")
+        cube = cube[~dup].copy()
+    cube["complexity"] = pd.Categorical(cube["complexity"], categories=[ALL, *BUCKETS], ordered=True)
+    return cube.set_index(CUBE_INDEX).sort_index()
@@ -0,0 +1,76 @@
+# scripts/dataset_utils.py
+"""
+Helpers for datasets in the jkkummerfeld/text2sql-data JSON format.
+
+- load_dataset: read the dataset JSON (a list of entries)
+- iter_questions: flatten entries -> one dict per (entry, sentence)
+- small accessors for splits, SQL variants and sentence variables
+"""
+
+import json
+from pathlib import Path
+
+
+def get_query_split(entry: dict) -> str:
+    return str(entry.get("query-split", ""))
+
+
+def get_sql_variants(entry: dict) -> list[str]:
+    sql_list = entry.get("sql", [])
+    if isinstance(sql_list, list):
+        return [str(x) for x in sql_list]
+    return [str(sql_list)] if sql_list else []
+
+
+def iter_sentences(entry: dict):
+    sentences = entry.get("sentences", [])
+    if not isinstance(sentences, list):
+        return
+    for s in sentences:
+        if isinstance(s, dict):
+            yield s
+
+
+def get_sentence_text(sentence: dict) -> str:
+    return str(sentence.get("text", ""))
+
+
+def get_question_split(sentence: dict) -> str:
+    return str(sentence.get("question-split", ""))
+
+
+def get_sentence_variables(sentence: dict) -> dict:
+    vars_map = sentence.get("variables", {})
+    return vars_map if isinstance(vars_map, dict) else {}
+
+
+def load_dataset(path: Path) -> list[dict]:
+    data = json.loads(path.read_text(encoding="utf-8"))
+    if not isinstance(data, list):
+        raise ValueError(f"Dataset JSON must be a list, got: {type(data)}")
+    return data
+
+
+def iter_questions(data: list[dict], limit_entries: int | None = None):
+    """
+    Yield one dict per question (sentence) in dataset order:
+
+        {
+            "entry_idx": int, "sentence_idx": int,
+            "entry": dict, "sentence": dict,
+            "question_text": str, "query_split": str, "question_split": str,
+        }
+    """
+    entries = data if limit_entries is None else data[:limit_entries]
+    for entry_idx, entry in enumerate(entries):
+        query_split = get_query_split(entry)
+        for sentence_idx, sentence in enumerate(iter_sentences(entry)):
+            yield {
+                "entry_idx": entry_idx,
+                "sentence_idx": sentence_idx,
+                "entry": entry,
+                "sentence": sentence,
+                "question_text": get_sentence_text(sentence),
+                "query_split": query_split,
+                "question_split": get_question_split(sentence),
+            }
@@ -0,0 +1,142 @@
+"""
+scripts/eval_pipeline.py
+
+Staged evaluation pipeline used by scripts/run_baseline.py:
+
+    model thread  ->  DB worker pool  ->  writer thread
+    (generate)        (normalize, execute     (ordered JSONL writes,
+                       pred/gold, compare)     counters, console lines)
+
+The model thread only hands finished generations over and goes on with the
+next batch, so it never waits on MySQL/MariaDB round-trips. Queues are
+bounded: when the DB side falls `max_pending` jobs behind, submit() blocks
+(back-pressure) instead of letting results pile up in memory.
+
+Records are written in submission order (the writer consumes the futures
+FIFO), so output files are identical to a sequential run.
+
+An evaluation may return a Future instead of a record (e.g. a repair attempt
+that needs the model again); the writer waits for the final record. Work the
+model thread must do for such futures is done by the `on_wait` callback,
+which runs on the model thread whenever it is blocked in submit() or close().
+
+Usage:
+    pipeline = EvalPipeline(evaluate, on_record, db_workers=4)
+    gold = pipeline.run_db(execute_gold, q)      # Future, shared by all models
+    pipeline.submit("gpt2xl", evaluate_args...)  # blocks only on back-pressure
+    pipeline.flush()                             # wait until everything so far is written
+    pipeline.close()                             # drain + join, re-raise errors
+"""
+
+import queue
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+
+
+_STOP = object()
+
+
+def _put(q: queue.Queue, item, timeout: float | None = None) -> bool:
+    try:
+        q.put(item, timeout=timeout)
+    except queue.Full:
+        return False
+    return True
+
+
+class EvalPipeline:
+    """
+    Args:
+        evaluate: callable(*args) -> record dict, run on the DB worker pool
+        on_record: callable(stream, record), run on the writer thread only
+                   (so it may update counters / files without locks)
+        db_workers: number of DB worker threads
+        max_pending: max evaluations submitted but not yet written
+        on_wait: optional callable(), run on the model thread while it waits
+                 (needed when evaluations return futures the model resolves)
+    """
+
+    def __init__(self, evaluate, on_record, db_workers: int = 4, max_pending: int = 64, on_wait=None):
+        if db_workers < 1:
+            raise ValueError(f"db_workers must be >= 1, got {db_workers}")
+        self.evaluate = evaluate
+        self.on_record = on_record
+        self.max_pending = max(1, max_pending)
+        self.on_wait = on_wait
+
+        self._pool = ThreadPoolExecutor(max_workers=db_workers, thread_name_prefix="db")
+        self._slots = threading.BoundedSemaphore(self.max_pending)
+        self._queue: queue.Queue = queue.Queue(maxsize=self.max_pending)
+        self._error: BaseException | None = None
+
+        # time the model thread spent blocked on back-pressure
+        self.wait_time_s = 0.0
+        self.written = 0
+
+        self._writer = threading.Thread(target=self._write_loop, name="writer", daemon=True)
+        self._writer.start()
+
+    def run_db(self, fn, *args) -> Future:
+        """Run an arbitrary DB job (e.g. gold execution) on the worker pool."""
+        return self._pool.submit(fn, *args)
+
+    def submit(self, stream: str, *args) -> None:
+        """Queue one evaluation; `stream` is passed back to on_record()."""
+        self._raise_if_failed()
+        t0 = time.time()
+        self._wait(self._slots.acquire)
+        self.wait_time_s += time.time() - t0
+
+        future = self._pool.submit(self.evaluate, *args)
+        self._queue.put((stream, future))
+
+    def flush(self) -> None:
+        """Wait until every submitted evaluation is written (serving on_wait meanwhile)."""
+        for _ in range(self.max_pending):
+            self._wait(self._slots.acquire)
+        for _ in range(self.max_pending):
+            self._slots.release()
+        self._raise_if_failed()
+
+    def close(self) -> None:
+        """Wait for every submitted job to be written, then stop the threads."""
+        self._wait(lambda timeout=None: _put(self._queue, _STOP, timeout))
+        self._wait(lambda timeout=None: self._writer.join(timeout) or not self._writer.is_alive())
+        self._pool.shutdown(wait=True)
+        self._raise_if_failed()
+
+    def _wait(self, attempt) -> None:
+        """Block on attempt(timeout) -> bool, serving on_wait() meanwhile."""
+        if self.on_wait is None:
+            attempt()
+            return
+        while not attempt(timeout=0.05):
+            self.on_wait()
+
+    def _raise_if_failed(self) -> None:
+        if self._error is not None:
+            raise RuntimeError("Evaluation pipeline failed") from self._error
+
+    def _write_loop(self) -> None:
+        # futures arrive in submission order; writing them in that order keeps
+        # the output deterministic while later jobs finish in the background
+        while True:
+            item = self._queue.get()
+            if item is _STOP:
+                return
+            stream, future = item
+            try:
+                record = future.result()
+                while isinstance(record, Future):
+                    # deferred (e.g. a repair attempt still in progress)
+                    record = record.result()
+                if self._error is None:
+                    self.on_record(stream, record)
+                    self.written += 1
+            except BaseException as e:  # noqa: BLE001 - surfaced in the model thread
+                if self._error is None:
+                    print(f"❌ Evaluation failed: {e}")
+                    self._error = e
+            finally:
+                self._slots.release()
@@ -9,6 +9,25 @@ Inputs:
 Outputs:
   - Per-question CSV (one row per question): results/*.csv
   - Per-dataset summary CSV: results/*_summary.csv
+  - With --parquet: the per-question rows as typed Parquet, results/*.parquet
+    (schema in scripts/metrics_schema.py; needs pyarrow)
+  - With --warehouse: the run loaded into a SQLite results warehouse for
+    cross-run queries (scripts/results_warehouse.py)
+
+Records are streamed: each one is flattened, written to the per-question CSV
+and handed to the summary backend in the same pass:
+
+  --backend numpy   (default) columnar arrays + bootstrap CIs for every rate
+                    and mean (<metric>_ci_low/_ci_high), see scripts/metrics_bootstrap.py;
+                    --compare adds paired-difference rows against other runs
+  --backend stream  counters + KLL quantile sketches (scripts/metrics_aggregator.py),
+                    memory independent of the run size, no CIs
+
+With --incremental, only lines appended since the previous call are read:
+the streaming aggregator state and the byte offset are kept in
+<out_csv>.state.json, new rows are appended to the per-question CSV and the
+summary is rewritten, so --watch N can refresh a live run every N seconds at
+O(new records) cost.
 
 Metrics supported (all 9 from our list):
   1) Execution Success Rate (pred) per RDBMS
@@ -22,6 +41,13 @@ Metrics supported (all 9 from our list):
   9) Schema size sensitivity (tables_in_schema_compact) + max_tables from args (if present)
 
 Notes:
+  - Per-question columns and their types: scripts/metrics_schema.FLAT_COLUMNS
+    (the contract with plot_results.py); besides the metrics above they carry
+    prompt/output tokens, tokens/s, the runner's peak RSS and, with
+    run_baseline.py --rows_examined, the rows each execution examined.
+  - Generation cache hits (run_baseline.py --cache) are flagged cache_hit and
+    get no gen_time_s / tokens_per_s, so they stay out of the generation
+    latency and throughput metrics (they were not generated in this run).
   - Assumes baseline JSONL contains fields like:
       pred_sql, gen_time_s, schema_compact,
       mysql / mariadb objects for pred execution,
@@ -34,11 +60,25 @@ from __future__ import annotations
 
 import argparse
 import csv
+import hashlib
 import json
-import math
+import os
 import re
+import sys
+import time
+from functools import lru_cache
 from pathlib import Path
-from typing import Any, Dict, Iterable, List, Optional
+from typing import Iterable, List, Optional
+
+# Add project root to path for imports
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from scripts.metrics_aggregator import SummaryAggregator
+from scripts.metrics_bootstrap import ColumnarRows, paired_diff_rows, summarize_columns
+from scripts.metrics_schema import FLAT_COLUMNS, ParquetRowWriter, has_parquet
+from scripts.results_io import iter_records, load_blobs, resolve_record
+from scripts.results_warehouse import ResultsWarehouse
+from scripts.sql_utils import infer_sql_complexity
 
 
 # -----------------------------
@@ -68,6 +108,12 @@ def _to_bool_or_none(x) -> Optional[bool]:
     return None
 
 
+@lru_cache(maxsize=64)
+def _schema_table_count(schema_compact: str) -> int:
+    # one schema per dataset: parse it once, not per row
+    return len(_parse_schema_compact(schema_compact))
+
+
 def _parse_schema_compact(schema_compact: str) -> List[str]:
     """
     schema_compact example lines:
@@ -89,65 +135,13 @@ def _parse_schema_compact(schema_compact: str) -> List[str]:
     return tables
 
 
-def _infer_sql_complexity(sql: str) -> str:
-    """
-    Heuristic complexity bucket:
-      simple: no JOIN and no subquery
-      medium: <=2 JOIN and <=1 subquery
-      complex: otherwise
-    """
-    if not sql:
-        return "unknown"
-    s = sql.upper()
-    join_count = s.count("JOIN")
-    subquery_count = max(0, s.count("SELECT") - 1)
-
-    if join_count == 0 and subquery_count == 0:
-        return "simple"
-    if join_count <= 2 and subquery_count <= 1:
-        return "medium"
-    return "complex"
-
-
-def _quantile(xs: List[float], q: float) -> Optional[float]:
-    """Nearest-rank quantile (simple + deterministic)."""
-    if not xs:
-        return None
-    xs_sorted = sorted(xs)
-    if q <= 0:
-        return xs_sorted[0]
-    if q >= 1:
-        return xs_sorted[-1]
-    k = int(math.ceil(q * len(xs_sorted))) - 1
-    k = max(0, min(k, len(xs_sorted) - 1))
-    return xs_sorted[k]
-
-
-def _mean(xs: List[float]) -> Optional[float]:
-    if not xs:
-        return None
-    return sum(xs) / len(xs)
-
-
-def _median(xs: List[float]) -> Optional[float]:
-    return _quantile(xs, 0.5)
-
-
-def _count_not_none(xs: List[Any]) -> int:
-    return sum(1 for x in xs if x is not None)
-
-
 # -----------------------------
 # Core: JSONL -> row dict
 # -----------------------------
 
 def jsonl_records(path: Path) -> Iterable[dict]:
-    with path.open("r", encoding="utf-8") as f:
-        for line in f:
-            line = line.strip()
-            if not line:
-                continue
-            yield json.loads(line)
+    """Records with side-table fields (schema, gold templates) restored, see results_io.py."""
+    return iter_records(path)
 
 
 def to_flat_row(rec: dict) -> dict:
@@ -162,18 +156,24 @@ def to_flat_row(rec: dict) -> dict:
     question_split = rec.get("question_split", "")
     question_text = rec.get("question_text", "")
 
-    gen_time_s = rec.get("gen_time_s", None)
+    # generation cache hits were not generated: no generation latency / throughput
+    cache_hit = _to_bool_or_none(rec.get("cache_hit"))
+    gen_time_s = None if cache_hit else rec.get("gen_time_s", None)
+    prompt_tokens = rec.get("prompt_tokens")
+    output_tokens = rec.get("output_tokens")
+    tokens_per_s = None
+    if output_tokens is not None and gen_time_s:
+        tokens_per_s = round(output_tokens / gen_time_s, 2)
     pred_sql = rec.get("pred_sql", rec.get("pred_sql_raw", ""))
     gold_sql_exec = rec.get("gold_sql_exec", "")
 
     rdbms_mode = rec.get("rdbms_mode", "")
 
     schema_compact = rec.get("schema_compact", "")
-    schema_tables = _parse_schema_compact(schema_compact)
-    tables_in_schema_compact = len(schema_tables)
+    tables_in_schema_compact = _schema_table_count(schema_compact)
 
     # Complexity based on GOLD (preferred) else predicted
-    complexity = _infer_sql_complexity(gold_sql_exec or rec.get("gold_sql_first", "") or pred_sql)
+    complexity = infer_sql_complexity(gold_sql_exec or rec.get("gold_sql_first", "") or pred_sql)
 
     # Pred exec objects
     mysql_pred = rec.get("mysql", None)
@@ -202,6 +202,12 @@ def to_flat_row(rec: dict) -> dict:
     mysql_gold_exec_time = _safe_get(mysql_gold, "execution_time_s")
     maria_gold_exec_time = _safe_get(maria_gold, "execution_time_s")
 
+    # Rows read by the storage engine (runner --rows_examined)
+    mysql_pred_rows_examined = _safe_get(mysql_pred, "rows_examined")
+    maria_pred_rows_examined = _safe_get(maria_pred, "rows_examined")
+    mysql_gold_rows_examined = _safe_get(mysql_gold, "rows_examined")
+    maria_gold_rows_examined = _safe_get(maria_gold, "rows_examined")
+
     # Conditional EX | success (computed per row)
     mysql_ex_given_success = None
     if mysql_pred_success is True:
@@ -232,14 +238,21 @@ def to_flat_row(rec: dict) -> dict:
 
         # Prompt / schema
         "tables_in_schema_compact": tables_in_schema_compact,
+        "schema_tables_included": rec.get("schema_tables_included"),
+        "schema_columns_included": rec.get("schema_columns_included"),
         "complexity_bucket": complexity,
 
         # SQL strings
         "pred_sql": pred_sql,
         "gold_sql_exec": gold_sql_exec,
 
-        # Timings
+        # Timings + generation resources
         "gen_time_s": gen_time_s,
+        "cache_hit": cache_hit,
+        "prompt_tokens": prompt_tokens,
+        "output_tokens": output_tokens,
+        "tokens_per_s": tokens_per_s,
+        "peak_rss_mb": rec.get("peak_rss_mb"),
 
         # Pred execution success
         "mysql_pred_success": mysql_pred_success,
@@ -257,6 +270,12 @@ def to_flat_row(rec: dict) -> dict:
         "mysql_gold_execution_time_s": mysql_gold_exec_time,
         "mariadb_gold_execution_time_s": maria_gold_exec_time,
 
+        # Rows examined
+        "mysql_pred_rows_examined": mysql_pred_rows_examined,
+        "mariadb_pred_rows_examined": maria_pred_rows_examined,
+        "mysql_gold_rows_examined": mysql_gold_rows_examined,
+        "mariadb_gold_rows_examined": maria_gold_rows_examined,
+
         # EX (pred vs gold)
         "mysql_ex": mysql_ex,
         "mariadb_ex": maria_ex,
@@ -281,127 +300,15 @@ def to_flat_row(rec: dict) -> dict:
 # Summary aggregation
 # -----------------------------
 
-def summarize(rows: List[dict]) -> List[dict]:
+def summarize(rows: Iterable[dict]) -> List[dict]:
     """
     Produce per-dataset summary rows with rates + timing stats,
-    plus breakdown by complexity bucket.
+    plus breakdown by complexity bucket (single pass, see metrics_aggregator.py).
     """
-    # group by dataset
-    by_dataset: Dict[str, List[dict]] = {}
+    agg = SummaryAggregator()
     for r in rows:
-        by_dataset.setdefault(r["dataset"], []).append(r)
-
-    summaries: List[dict] = []
-
-    for dataset, ds_rows in sorted(by_dataset.items()):
-        n = len(ds_rows)
-
-        # success counts (pred)
-        mysql_pred_succ = sum(1 for r in ds_rows if r["mysql_pred_success"] is True)
-        maria_pred_succ = sum(1 for r in ds_rows if r["mariadb_pred_success"] is True)
-
-        # EX counts
-        mysql_ex_true = sum(1 for r in ds_rows if r["mysql_ex"] is True)
-        maria_ex_true = sum(1 for r in ds_rows if r["mariadb_ex"] is True)
-
-        # EX | success denom excludes None
-        mysql_ex_given_success_vals = [r["mysql_ex_given_success"] for r in ds_rows]
-        maria_ex_given_success_vals = [r["mariadb_ex_given_success"] for r in ds_rows]
-
-        mysql_ex_gs_denom = sum(1 for x in mysql_ex_given_success_vals if x in (True, False))
-        maria_ex_gs_denom = sum(1 for x in maria_ex_given_success_vals if x in (True, False))
-
-        mysql_ex_gs_true = sum(1 for x in mysql_ex_given_success_vals if x is True)
-        maria_ex_gs_true = sum(1 for x in maria_ex_given_success_vals if x is True)
-
-        # Cross-RDBMS agreement among both-success where match is comparable
-        match_vals = [r["mysql_vs_mariadb_match"] for r in ds_rows if r["pred_both_success"]]
-        match_denom = sum(1 for x in match_vals if x in (True, False))
-        match_true = sum(1 for x in match_vals if x is True)
-
-        # Asymmetry
-        mysql_only = sum(1 for r in ds_rows if r["pred_mysql_only_success"])
-        maria_only = sum(1 for r in ds_rows if r["pred_mariadb_only_success"])
-        both = sum(1 for r in ds_rows if r["pred_both_success"])
-        neither = sum(1 for r in ds_rows if r["pred_neither_success"])
-
-        # Timings
-        gen_times = [float(r["gen_time_s"]) for r in ds_rows if r["gen_time_s"] is not None]
-        mysql_exec_times = [
-            float(r["mysql_pred_execution_time_s"])
-            for r in ds_rows
-            if r["mysql_pred_execution_time_s"] is not None
-        ]
-        maria_exec_times = [
-            float(r["mariadb_pred_execution_time_s"])
-            for r in ds_rows
-            if r["mariadb_pred_execution_time_s"] is not None
-        ]
-
-        # Schema size
-        schema_sizes = [int(r["tables_in_schema_compact"]) for r in ds_rows if r["tables_in_schema_compact"] is not None]
-
-        base = {
-            "dataset": dataset,
-            "n_questions": n,
-
-            # 1) Execution success rate
-            "mysql_pred_success_rate": mysql_pred_succ / n if n else None,
-            "mariadb_pred_success_rate": maria_pred_succ / n if n else None,
-
-            # 2) EX overall
-            "mysql_execution_accuracy_ex": mysql_ex_true / n if n else None,
-            "mariadb_execution_accuracy_ex": maria_ex_true / n if n else None,
-
-            # 3) EX | success
-            "mysql_ex_given_success": (mysql_ex_gs_true / mysql_ex_gs_denom) if mysql_ex_gs_denom else None,
-            "mariadb_ex_given_success": (maria_ex_gs_true / maria_ex_gs_denom) if maria_ex_gs_denom else None,
-
-            # 4) Cross-RDBMS agreement among both-success
-            "mysql_vs_mariadb_match_rate": (match_true / match_denom) if match_denom else None,
-
-            # 5) Failure asymmetry (pred)
-            "mysql_only_success_rate": mysql_only / n if n else None,
-            "mariadb_only_success_rate": maria_only / n if n else None,
-            "both_success_rate": both / n if n else None,
-            "neither_success_rate": neither / n if n else None,
-
-            # 6) Generation time stats
-            "gen_time_mean_s": _mean(gen_times),
-            "gen_time_median_s": _median(gen_times),
-            "gen_time_p90_s": _quantile(gen_times, 0.90),
-
-            # 7) Execution time stats
-            "mysql_exec_time_mean_s": _mean(mysql_exec_times),
-            "mysql_exec_time_median_s": _median(mysql_exec_times),
-            "mariadb_exec_time_mean_s": _mean(maria_exec_times),
-            "mariadb_exec_time_median_s": _median(maria_exec_times),
-
-            # 9) Schema size stats (for sensitivity)
-            "schema_tables_mean": _mean([float(x) for x in schema_sizes]) if schema_sizes else None,
-            "schema_tables_median": _median([float(x) for x in schema_sizes]) if schema_sizes else None,
-        }
-
-        summaries.append(base)
-
-        # 8) Complexity breakdown rows (optional but handy)
-        for bucket in ("simple", "medium", "complex", "unknown"):
-            b_rows = [r for r in ds_rows if r["complexity_bucket"] == bucket]
-            if not b_rows:
-                continue
-            bn = len(b_rows)
-            summaries.append({
-                "dataset": dataset,
-                "n_questions": bn,
-                "breakdown": "complexity",
-                "bucket": bucket,
-                "mysql_pred_success_rate": sum(1 for r in b_rows if r["mysql_pred_success"] is True) / bn,
-                "mariadb_pred_success_rate": sum(1 for r in b_rows if r["mariadb_pred_success"] is True) / bn,
-                "mysql_execution_accuracy_ex": sum(1 for r in b_rows if r["mysql_ex"] is True) / bn,
-                "mariadb_execution_accuracy_ex": sum(1 for r in b_rows if r["mariadb_ex"] is True) / bn,
-            })
-
-    return summaries
+        agg.add(r)
+    return agg.summary_rows()
 
 
 # -----------------------------
@@ -422,6 +329,141 @@ def write_csv(path: Path, rows: List[dict]) -> None:
             w.writerow(r)
 
 
+class StreamingCsvWriter:
+    """
+    Write flattened rows as they come. Every row from to_flat_row() has the
+    same keys, so the (sorted) header of the first row is the header of all.
+    With append, rows are added to an existing CSV (header written only if empty).
+    """
+
+    def __init__(self, path: Path, append: bool = False):
+        self.path = path
+        self.append = append
+        self.rows = 0
+        self._f = None
+        self._w = None
+
+    def write(self, row: dict) -> None:
+        if self._w is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            has_header = self.append and self.path.exists() and self.path.stat().st_size > 0
+            self._f = self.path.open("a" if self.append else "w", encoding="utf-8", newline="")
+            self._w = csv.DictWriter(self._f, fieldnames=sorted(row.keys()))
+            if not has_header:
+                self._w.writeheader()
+        self._w.writerow(row)
+        self.rows += 1
+
+    def close(self) -> None:
+        if self._f is not None:
+            self._f.close()
+
+
+def jsonl_to_parquet(jsonl_path: Path, parquet_path: Path) -> int:
+    """Flatten a results JSONL into the typed Parquet store; returns the row count."""
+    with ParquetRowWriter(parquet_path) as w:
+        for rec in jsonl_records(jsonl_path):
+            w.write(to_flat_row(rec))
+    return w.rows
+
+
+# -----------------------------
+# Incremental mode
+# -----------------------------
+
+def state_path_for(out_csv: Path) -> Path:
+    return out_csv.with_name(out_csv.name + ".state.json")
+
+
+def _head_sha256(path: Path, n_bytes: int) -> str:
+    with path.open("rb") as f:
+        return hashlib.sha256(f.read(n_bytes)).hexdigest()
+
+
+def update_incremental(jsonl_path: Path, out_csv: Path, out_summary: Path, state_path: Path) -> dict:
+    """
+    Consume the JSONL lines appended since the last call, append their rows to
+    out_csv and rewrite out_summary from the saved aggregator state.
+
+    The state file holds the SummaryAggregator state, the byte offset of the
+    next unread line and the CSV size at that point. A line still being
+    written (no newline yet) is left for the next call; a rewritten or
+    truncated JSONL starts over.
+
+    Returns:
+        dict: {'new': rows added now, 'rows': total rows, 'reset': bool}
+    """
+    state = json.loads(state_path.read_text(encoding="utf-8")) if state_path.exists() else None
+    if state is not None:
+        head_bytes = state["head_bytes"]
+        if (
+            state["source"] != str(jsonl_path)
+            or jsonl_path.stat().st_size < state["offset"]
+            or _head_sha256(jsonl_path, head_bytes) != state["head_sha256"]
+            or not out_csv.exists()
+            or out_csv.stat().st_size < state["csv_bytes"]
+            or state.get("columns") != list(FLAT_COLUMNS)
+        ):
+            state = None
+    reset = state is None
+
+    if state is None:
+        agg, offset, rows, csv_bytes = SummaryAggregator(), 0, 0, 0
+    else:
+        agg = SummaryAggregator.from_dict(state["aggregator"])
+        offset, rows, csv_bytes = state["offset"], state["rows"], state["csv_bytes"]
+        # drop rows appended by a call that died before saving its state
+        with out_csv.open("r+b") as f:
+            f.truncate(csv_bytes)
+
+    blobs = load_blobs(jsonl_path)
+    writer = StreamingCsvWriter(out_csv, append=not reset)
+    try:
+        with jsonl_path.open("rb") as f:
+            f.seek(offset)
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break
+                offset += len(line)
+                line = line.strip()
+                if not line:
+                    continue
+                rec = json.loads(line)
+                try:
+                    rec = resolve_record(rec, blobs)
+                except KeyError:
+                    # blob appended after we loaded the side table
+                    blobs = load_blobs(jsonl_path)
+                    rec = resolve_record(rec, blobs)
+                row = to_flat_row(rec)
+                writer.write(row)
+                agg.add(row)
+    finally:
+        writer.close()
+    rows += writer.rows
+
+    if rows:
+        write_csv(out_summary, agg.summary_rows())
+        csv_bytes = out_csv.stat().st_size
+
+    head_bytes = min(offset, 4096)
+    new_state = {
+        "source": str(jsonl_path),
+        "offset": offset,
+        "head_bytes": head_bytes,
+        "head_sha256": _head_sha256(jsonl_path, head_bytes),
+        "rows": rows,
+        "csv_bytes": csv_bytes,
+        # a schema change rewrites the CSV (its header) from scratch
+        "columns": list(FLAT_COLUMNS),
+        "aggregator": agg.to_dict(),
+    }
+    tmp = state_path.with_name(state_path.name + ".tmp")
+    tmp.write_text(json.dumps(new_state), encoding="utf-8")
+    os.replace(tmp, state_path)
+    return {"new": writer.rows, "rows": rows, "reset": reset}
+
+
 # -----------------------------
 # Main
 # -----------------------------
@@ -446,6 +488,61 @@ def main() -> int:
         default="",
         help="Output summary CSV path. Default: same as out_csv but *_summary.csv",
     )
+    parser.add_argument(
+        "--parquet",
+        action="store_true",
+        help="Also write the per-question rows as typed Parquet (same path as out_csv, .parquet; needs pyarrow).",
+    )
+    parser.add_argument(
+        "--warehouse",
+        type=str,
+        default="",
+        help="Also load the run into this SQLite results warehouse (scripts/results_warehouse.py).",
+    )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Only read lines appended since the last --incremental call (state in <out_csv>.state.json); "
+             "summary from the streaming backend (no CIs).",
+    )
+    parser.add_argument(
+        "--watch",
+        type=float,
+        default=0.0,
+        help="With --incremental: refresh every N seconds until Ctrl+C (0 = once).",
+    )
+    parser.add_argument(
+        "--backend",
+        type=str,
+        default="numpy",
+        choices=["numpy", "stream"],
+        help="Summary backend: numpy (bootstrap CIs) or stream (bounded memory, no CIs).",
+    )
+    parser.add_argument(
+        "--n_boot",
+        type=int,
+        default=2000,
+        help="Bootstrap resamples for the CIs (numpy backend; 0 = no CIs).",
+    )
+    parser.add_argument(
+        "--ci",
+        type=float,
+        default=0.95,
+        help="Confidence level of the bootstrap CIs.",
+    )
+    parser.add_argument(
+        "--seed",
+        type=int,
+        default=0,
+        help="Bootstrap seed.",
+    )
+    parser.add_argument(
+        "--compare",
+        type=str,
+        default="",
+        help="Comma-separated JSONL(s) of other runs on the same questions: adds paired-difference "
+             "rows (this run - other, with CIs) to the summary (numpy backend).",
+    )
     args = parser.parse_args()
 
     jsonl_path = Path(args.jsonl)
@@ -460,22 +557,92 @@ def main() -> int:
         else out_csv.with_name(out_csv.stem + "_summary.csv")
     )
 
-    # Build per-question rows
-    rows: List[dict] = []
-    for rec in jsonl_records(jsonl_path):
-        rows.append(to_flat_row(rec))
+    if args.watch and not args.incremental:
+        print("❌ --watch needs --incremental")
+        return 1
+    if args.incremental:
+        if args.parquet or args.compare or args.warehouse:
+            print("❌ --incremental does not support --parquet / --compare / --warehouse")
+            return 1
+        return _run_incremental(jsonl_path, out_csv, out_summary, args.watch)
+
+    if args.parquet and not has_parquet():
+        print("❌ --parquet needs pyarrow (pip install pyarrow)")
+        return 1
 
-    write_csv(out_csv, rows)
+    compare_paths = [Path(p.strip()) for p in args.compare.split(",") if p.strip()]
+    if compare_paths and args.backend != "numpy":
+        print("❌ --compare needs --backend numpy")
+        return 1
+    for p in compare_paths:
+        if not p.exists():
+            print(f"❌ JSONL not found: {p}")
+            return 1
+
+    # Single pass: per-question rows are written and collected/aggregated as they are read
+    writer = StreamingCsvWriter(out_csv)
+    parquet = ParquetRowWriter(out_csv.with_suffix(".parquet")) if args.parquet else None
+    agg = ColumnarRows() if args.backend == "numpy" else SummaryAggregator()
+    warehouse = ResultsWarehouse(args.warehouse) if args.warehouse else None
+    # None: this file content is already in the warehouse
+    run_id = warehouse.begin_run(jsonl_path) if warehouse is not None else None
+    try:
+        for rec in jsonl_records(jsonl_path):
+            row = to_flat_row(rec)
+            writer.write(row)
+            if parquet is not None:
+                parquet.write(row)
+            if run_id is not None:
+                warehouse.add(run_id, rec, row)
+            agg.add(row)
+        if run_id is not None:
+            warehouse.finish_run(run_id)
+    finally:
+        writer.close()
+        if parquet is not None:
+            parquet.close()
+        if warehouse is not None:
+            warehouse.close()
+    if not writer.rows:
+        print(f"❌ No records in: {jsonl_path}")
+        return 1
 
-    # Build summary rows
-    summary_rows = summarize(rows)
+    if args.backend == "numpy":
+        summary_rows = summarize_columns(agg, n_boot=args.n_boot, ci=args.ci, seed=args.seed)
+        for p in compare_paths:
+            other = ColumnarRows()
+            for rec in jsonl_records(p):
+                other.add(to_flat_row(rec))
+            summary_rows += paired_diff_rows(agg, other, p.stem, n_boot=args.n_boot, ci=args.ci, seed=args.seed)
+    else:
+        summary_rows = agg.summary_rows()
     write_csv(out_summary, summary_rows)
 
     print(f"✅ Wrote per-question CSV: {out_csv}")
     print(f"✅ Wrote summary CSV:     {out_summary}")
-    print(f"Rows: {len(rows)}")
+    if parquet is not None:
+        print(f"✅ Wrote Parquet:         {parquet.path}")
+    if warehouse is not None:
+        print(f"✅ {'Loaded into' if run_id is not None else 'Already in'} warehouse: {args.warehouse}")
+    print(f"Rows: {writer.rows}")
     return 0
 
 
+def _run_incremental(jsonl_path: Path, out_csv: Path, out_summary: Path, watch: float) -> int:
+    state_path = state_path_for(out_csv)
+    try:
+        while True:
+            stats = update_incremental(jsonl_path, out_csv, out_summary, state_path)
+            if stats["reset"] or stats["new"] or not watch:
+                note = " (started over)" if stats["reset"] else ""
+                print(f"🔄 +{stats['new']} rows, {stats['rows']} total{note} -> {out_summary}")
+            if not watch:
+                return 0
+            time.sleep(watch)
+    except KeyboardInterrupt:
+        print("\n⏹️  Stopped watching.")
+        return 0
+
+
 if __name__ == "__main__":
     raise SystemExit(main())
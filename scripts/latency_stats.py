@@ -0,0 +1,426 @@
+"""
+scripts/latency_stats.py
+
+Latency distributions of a baseline run: HDR-style histograms, tail
+percentiles and tail attribution.
+
+Latencies per question (seconds):
+  gen                    gen_time_s
+  <rdbms>_pred_exec      predicted SQL execution time (per engine)
+  <rdbms>_gold_exec      gold SQL execution time (per engine)
+  e2e                    generation + every execution of the question
+                         (what the runner spends on it end to end)
+
+Generation cache hits (cache_hit) have no gen or e2e latency: they were not
+generated in this run.
+
+Each latency is recorded in an HdrHistogram: log-linear buckets (HdrHistogram
+layout) with a fixed relative precision of `significant_digits`, so p99.9 of
+a million questions costs a few KB and histograms of shards merge exactly.
+Percentiles are the highest value of the bucket holding the rank (within
+0.8% of the true value at 2 significant digits, never below it). Values above
+the trackable range are counted in an overflow bucket whose ranks report the
+maximum seen.
+
+Tail attribution: the questions at or above the `tail` quantile of a latency
+are compared with all questions on prompt tokens, output tokens, complexity
+bucket and schema table count. Each attribute level gets its share among tail
+questions, its share overall and their ratio (lift > 1 = over-represented in
+the tail). Numeric attributes are binned by the quartiles over all questions.
+
+Outputs (next to the JSONL unless --out_dir):
+  <stem>_latency.csv        dataset, latency, n, mean, min, p50 ... p99.9, max
+  <stem>_latency_hist.csv   non-empty histogram buckets (bin_low_s, bin_high_s, count)
+  <stem>_latency_tail.csv   tail attribution rows
+and figures in --fig_dir (percentiles, histograms, tail lift), rendered like
+plot_results.py (Agg, process pool, unchanged figures skipped).
+
+Usage:
+    python scripts/latency_stats.py --jsonl results/qwen1.5b_baseline_advising_mysql.jsonl
+    python scripts/latency_stats.py --jsonl results/qwen1.5b_baseline_advising_mysql.jsonl --tail 0.99 --fig_dir docs/figures
+"""
+
+import argparse
+import csv
+import math
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# Add project root to path for imports
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from scripts.metrics_schema import columns
+
+PERCENTILES = (50.0, 90.0, 95.0, 99.0, 99.9)
+RDBMS = ("mysql", "mariadb")
+LATENCIES = ("gen", *(f"{r}_pred_exec" for r in RDBMS), *(f"{r}_gold_exec" for r in RDBMS), "e2e")
+ATTRIBUTES = tuple(columns("prompt_tokens", "output_tokens", "complexity_bucket", "tables_in_schema_compact"))
+
+# numeric attributes with at most this many distinct values are reported per value, not per quartile
+_MAX_LEVELS = 8
+
+
+def percentile_label(p: float) -> str:
+    """50.0 -> 'p50', 99.9 -> 'p99_9' (column-name safe)."""
+    return "p" + f"{p:g}".replace(".", "_")
+
+
+class HdrHistogram:
+    """
+    Args:
+        lowest: smallest distinguishable value (the unit; seconds)
+        highest: largest trackable value (larger values go to an overflow
+            bucket above all others; its percentiles are the max seen)
+        significant_digits: relative precision (2 -> buckets within 1%)
+    """
+
+    def __init__(self, lowest: float = 1e-6, highest: float = 86400.0, significant_digits: int = 2):
+        self.lowest = lowest
+        self.highest = highest
+        self.significant_digits = significant_digits
+        # linear sub-buckets per power of two: first power of two >= 2 * 10**digits
+        self._sub_bits = math.ceil(math.log2(2 * 10 ** significant_digits))
+        self._sub_count = 1 << self._sub_bits
+        self._half = self._sub_count >> 1
+        self._max_units = int(math.ceil(highest / lowest))
+        self._overflow = self._index(self._max_units) + 1
+        self.count = 0
+        self.total = 0.0
+        self.min: float | None = None
+        self.max: float | None = None
+        self._counts: dict[int, int] = {}
+
+    def _index(self, units: int) -> int:
+        if units < self._sub_count:
+            return units
+        shift = units.bit_length() - self._sub_bits
+        return self._sub_count + (shift - 1) * self._half + ((units >> shift) - self._half)
+
+    def _bounds(self, index: int) -> tuple[int, int]:
+        """[low, high) of a bucket in units."""
+        if index == self._overflow:
+            return self._max_units, max(self._max_units, math.ceil(self.max / self.lowest))
+        if index < self._sub_count:
+            return index, index + 1
+        shift, sub = divmod(index - self._sub_count, self._half)
+        shift += 1
+        return (sub + self._half) << shift, (sub + self._half + 1) << shift
+
+    def bucket_of(self, x: float) -> int:
+        """Bucket index of a value (buckets are ordered like the values)."""
+        units = max(int(float(x) / self.lowest), 0)
+        return self._overflow if units > self._max_units else self._index(units)
+
+    def record(self, x: float) -> None:
+        x = float(x)
+        if math.isnan(x):
+            return
+        self.count += 1
+        self.total += x
+        self.min = x if self.min is None or x < self.min else self.min
+        self.max = x if self.max is None or x > self.max else self.max
+        i = self.bucket_of(x)
+        self._counts[i] = self._counts.get(i, 0) + 1
+
+    def merge(self, other: "HdrHistogram") -> None:
+        if (other.lowest, other.highest, other.significant_digits) != (self.lowest, self.highest, self.significant_digits):
+            raise ValueError("Cannot merge HdrHistograms with different ranges / precision.")
+        for i, c in other._counts.items():
+            self._counts[i] = self._counts.get(i, 0) + c
+        self.count += other.count
+        self.total += other.total
+        if other.min is not None:
+            self.min = other.min if self.min is None else min(self.min, other.min)
+            self.max = other.max if self.max is None else max(self.max, other.max)
+
+    def _rank_bucket(self, p: float) -> int:
+        rank = max(1, math.ceil(p / 100 * self.count))
+        seen = 0
+        for i in sorted(self._counts):
+            seen += self._counts[i]
+            if seen >= rank:
+                return i
+        return max(self._counts)
+
+    def percentile(self, p: float) -> float | None:
+        """Highest value of the bucket holding rank ceil(p/100 * count), capped at the max seen."""
+        if self.count == 0:
+            return None
+        i = self._rank_bucket(p)
+        if i == self._overflow:
+            return self.max
+        return min(self._bounds(i)[1] * self.lowest, self.max)
+
+    def percentile_bucket(self, p: float) -> int | None:
+        """Bucket index of the p-th percentile (values with bucket_of(x) >= it are the tail)."""
+        return self._rank_bucket(p) if self.count else None
+
+    def mean(self) -> float | None:
+        return self.total / self.count if self.count else None
+
+    def buckets(self) -> list[tuple[float, float, int]]:
+        """Non-empty buckets as (low, high, count), ascending."""
+        out = []
+        for i in sorted(self._counts):
+            lo, hi = self._bounds(i)
+            out.append((lo * self.lowest, hi * self.lowest, self._counts[i]))
+        return out
+
+    def to_dict(self) -> dict:
+        return {
+            "lowest": self.lowest,
+            "highest": self.highest,
+            "significant_digits": self.significant_digits,
+            "count": self.count,
+            "total": self.total,
+            "min": self.min,
+            "max": self.max,
+            "counts": {str(i): c for i, c in self._counts.items()},
+        }
+
+    @classmethod
+    def from_dict(cls, d: dict) -> "HdrHistogram":
+        h = cls(lowest=d["lowest"], highest=d["highest"], significant_digits=d["significant_digits"])
+        h.count = d["count"]
+        h.total = d["total"]
+        h.min = d["min"]
+        h.max = d["max"]
+        h._counts = {int(i): c for i, c in d["counts"].items()}
+        return h
+
+
+# -----------------------------
+# Per-question samples
+# -----------------------------
+
+def latency_sample(row: dict) -> dict:
+    """Latencies (LATENCIES; None = not measured) and attributes (ATTRIBUTES) of one flattened row."""
+    sample = {"gen": row.get("gen_time_s")}
+    for r in RDBMS:
+        sample[f"{r}_pred_exec"] = row.get(f"{r}_pred_execution_time_s")
+        sample[f"{r}_gold_exec"] = row.get(f"{r}_gold_execution_time_s")
+    parts = [v for v in sample.values() if v is not None]
+    sample["e2e"] = sum(parts) if parts and not row.get("cache_hit") else None
+    for attr in ATTRIBUTES:
+        sample[attr] = row.get(attr)
+    sample["complexity_bucket"] = sample["complexity_bucket"] or "unknown"
+    return sample
+
+
+class LatencyStats:
+    """Per-dataset HdrHistograms of every latency plus the samples for tail attribution."""
+
+    def __init__(self, significant_digits: int = 2):
+        self.significant_digits = significant_digits
+        self.histograms: dict[tuple[str, str], HdrHistogram] = {}
+        self._samples: list[dict] = []
+
+    def add(self, dataset: str, sample: dict) -> None:
+        for name in LATENCIES:
+            value = sample[name]
+            if value is None:
+                continue
+            key = (dataset, name)
+            if key not in self.histograms:
+                self.histograms[key] = HdrHistogram(significant_digits=self.significant_digits)
+            self.histograms[key].record(value)
+        self._samples.append({"dataset": dataset, **sample})
+
+    def percentile_rows(self) -> list[dict]:
+        rows = []
+        for (dataset, name), h in sorted(self.histograms.items(), key=lambda kv: (kv[0][0], LATENCIES.index(kv[0][1]))):
+            row = {"dataset": dataset, "latency": name, "n": h.count, "mean_s": h.mean(), "min_s": h.min}
+            for p in PERCENTILES:
+                row[f"{percentile_label(p)}_s"] = h.percentile(p)
+            row["max_s"] = h.max
+            rows.append(row)
+        return rows
+
+    def histogram_rows(self) -> list[dict]:
+        rows = []
+        for (dataset, name), h in sorted(self.histograms.items(), key=lambda kv: (kv[0][0], LATENCIES.index(kv[0][1]))):
+            for lo, hi, c in h.buckets():
+                rows.append({"dataset": dataset, "latency": name, "bin_low_s": lo, "bin_high_s": hi, "count": c})
+        return rows
+
+    def tail_rows(self, tail: float = 0.95) -> list[dict]:
+        """
+        Tail attribution: for every dataset x latency, the share of each
+        attribute level among questions at or above the `tail` quantile vs
+        among all questions with that latency.
+        """
+        if not self._samples:
+            return []
+        df = pd.DataFrame(self._samples)
+        rows = []
+        for (dataset, name), h in sorted(self.histograms.items(), key=lambda kv: (kv[0][0], LATENCIES.index(kv[0][1]))):
+            d = df[(df["dataset"] == dataset) & df[name].notna()]
+            threshold = h.percentile(tail * 100)
+            # rank-based: every question in the percentile's bucket or above
+            cut = h.percentile_bucket(tail * 100)
+            in_tail = d[name].map(h.bucket_of) >= cut
+            n_tail = int(in_tail.sum())
+            for attr in ATTRIBUTES:
+                levels = _levels(d[attr])
+                all_share = levels.value_counts(normalize=True, dropna=False, sort=False)
+                tail_counts = levels[in_tail].value_counts(dropna=False)
+                if not isinstance(levels.dtype, pd.CategoricalDtype):
+                    all_share = all_share[sorted(all_share.index, key=lambda v: (pd.isna(v), 0 if pd.isna(v) else v))]
+                for level, share in all_share.items():
+                    k = int(tail_counts.get(level, 0))
+                    tail_share = k / n_tail if n_tail else float("nan")
+                    rows.append({
+                        "dataset": dataset, "latency": name, "tail_q": tail, "threshold_s": threshold,
+                        "n": len(d), "n_tail": n_tail, "attribute": attr,
+                        "level": "missing" if pd.isna(level) else str(level),
+                        "tail_count": k, "tail_share": tail_share, "all_share": float(share),
+                        "lift": tail_share / share if share else float("nan"),
+                    })
+        return rows
+
+
+def _levels(values: pd.Series) -> pd.Series:
+    """
+    Attribute levels: categories as-is; numbers per value (few distinct) or
+    per quartile of all questions (ordered categorical).
+    """
+    numeric = pd.to_numeric(values, errors="coerce")
+    if numeric.notna().sum() == 0 or values.notna().sum() != numeric.notna().sum():
+        return values.astype(object)
+    if numeric.nunique() <= _MAX_LEVELS:
+        return numeric.astype("Int64").astype(object)
+    edges = list(numeric.quantile([0, 0.25, 0.5, 0.75, 1]).drop_duplicates())
+    labels = [f"{'[' if k == 0 else '('}{lo:g}, {hi:g}]" for k, (lo, hi) in enumerate(zip(edges, edges[1:]))]
+    return pd.cut(numeric, edges, labels=labels, include_lowest=True)
+
+
+def collect(jsonl_path: Path, significant_digits: int = 2) -> LatencyStats:
+    """LatencyStats of a results JSONL (side-table aware)."""
+    from scripts.jsonl_to_csv_metrics import to_flat_row
+    from scripts.results_io import iter_records
+
+    stats = LatencyStats(significant_digits=significant_digits)
+    for rec in iter_records(jsonl_path):
+        row = to_flat_row(rec)
+        stats.add(row["dataset"], latency_sample(row))
+    return stats
+
+
+# -----------------------------
+# Figures
+# -----------------------------
+
+def _log_bins(h: HdrHistogram, per_decade: int = 20) -> tuple[list[float], list[int]]:
+    """HDR buckets re-binned to `per_decade` log-spaced bins for display (edges, counts)."""
+    buckets = h.buckets()
+    lo = max(buckets[0][0], h.lowest)
+    hi = max(buckets[-1][1], lo * 10)
+    n_bins = max(1, math.ceil(math.log10(hi / lo) * per_decade))
+    edges = np.geomspace(lo, hi, n_bins + 1)
+    mids = [max((b_lo + b_hi) / 2, lo) for b_lo, b_hi, _ in buckets]
+    counts, _ = np.histogram(mids, bins=edges, weights=[c for _, _, c in buckets])
+    return [float(e) for e in edges], [int(c) for c in counts]
+
+
+def figure_specs(stats: LatencyStats, tail: float, tag: str) -> list[dict]:
+    """plot_results figure specs: percentiles per latency, histograms and tail lift."""
+    specs = []
+    pct = pd.DataFrame(stats.percentile_rows())
+    if pct.empty:
+        return specs
+    tails = pd.DataFrame(stats.tail_rows(tail))
+    for dataset, d in pct.groupby("dataset", sort=True):
+        specs.append({
+            "kind": "bar_multi", "filename": f"{tag}__{dataset}__latency_percentiles.png",
+            "title": f"{dataset}: Latency percentiles ({tag})", "ylabel": "seconds (log)", "xlabel": "latency",
+            "labels": list(d["latency"]), "logy": True,
+            "series": {percentile_label(p): [float(v) for v in d[f"{percentile_label(p)}_s"]] for p in PERCENTILES},
+        })
+        for name in d["latency"]:
+            h = stats.histograms[(dataset, name)]
+            edges, counts = _log_bins(h)
+            specs.append({
+                "kind": "hist", "filename": f"{tag}__{dataset}__{name}__latency_hist.png",
+                "title": f"{dataset}: {name} latency ({tag})", "ylabel": "questions", "xlabel": "seconds (log)",
+                "edges": edges, "counts": counts,
+                "markers": {percentile_label(p): h.percentile(p) for p in PERCENTILES},
+            })
+            if tails.empty:
+                continue
+            t = tails[(tails["dataset"] == dataset) & (tails["latency"] == name) & tails["lift"].notna()]
+            if t.empty or not t["n_tail"].iloc[0]:
+                continue
+            specs.append({
+                "kind": "bar", "filename": f"{tag}__{dataset}__{name}__latency_tail_lift.png",
+                "title": f"{dataset}: {name} >= {percentile_label(tail * 100)} by attribute ({tag})",
+                "ylabel": "lift (tail share / overall share)", "xlabel": "attribute = level",
+                "labels": [f"{a} = {lv}" for a, lv in zip(t["attribute"], t["level"])],
+                "values": [float(v) for v in t["lift"]],
+            })
+    return specs
+
+
+def write_csv(path: Path, rows: list[dict]) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open("w", newline="", encoding="utf-8") as f:
+        if not rows:
+            return
+        writer = csv.DictWriter(f, fieldnames=list(rows[0]))
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--jsonl", type=str, required=True, help="Results JSONL of a baseline run.")
+    parser.add_argument("--out_dir", type=str, default=None, help="Directory of the CSVs (default: next to the JSONL).")
+    parser.add_argument("--fig_dir", type=str, default="docs/figures", help="Output directory for figures.")
+    parser.add_argument("--no_figures", action="store_true", help="Only write the CSVs.")
+    parser.add_argument("--tail", type=float, default=0.95, help="Tail quantile for attribution (e.g. 0.99).")
+    parser.add_argument("--significant_digits", type=int, default=2, help="Histogram precision (1-4).")
+    parser.add_argument("--tag", type=str, default=None, help="Figure filename tag (default: JSONL stem).")
+    parser.add_argument("--jobs", type=int, default=0, help="Worker processes for rendering (0 = CPU count).")
+    parser.add_argument("--force", action="store_true", help="Redraw all figures, even unchanged ones.")
+    args = parser.parse_args()
+
+    jsonl_path = Path(args.jsonl)
+    if not jsonl_path.exists():
+        print(f"❌ JSONL not found: {jsonl_path}")
+        return 1
+    if not 0 < args.tail < 1:
+        print("❌ --tail must be in (0, 1)")
+        return 1
+
+    stats = collect(jsonl_path, significant_digits=args.significant_digits)
+    out_dir = Path(args.out_dir) if args.out_dir else jsonl_path.parent
+    stem = jsonl_path.stem
+    outputs = {
+        f"{stem}_latency.csv": stats.percentile_rows(),
+        f"{stem}_latency_hist.csv": stats.histogram_rows(),
+        f"{stem}_latency_tail.csv": stats.tail_rows(args.tail),
+    }
+    for name, rows in outputs.items():
+        write_csv(out_dir / name, rows)
+        print(f"✅ {out_dir / name} ({len(rows)} rows)")
+
+    for row in stats.percentile_rows():
+        pcts = " ".join(
+            f"{percentile_label(p)}={row[f'{percentile_label(p)}_s']:.3f}" for p in PERCENTILES
+        )
+        print(f"📊 {row['dataset']} {row['latency']}: n={row['n']} {pcts} max={row['max_s']:.3f}")
+
+    if not args.no_figures:
+        # local import: rendering pulls in matplotlib, the CSVs do not need it
+        from scripts.plot_results import render_figures
+
+        fig_dir = Path(args.fig_dir)
+        res = render_figures(figure_specs(stats, args.tail, args.tag or stem), fig_dir, jobs=args.jobs, force=args.force)
+        print(f"✅ Figures saved to: {fig_dir.resolve()} ({res['rendered']} rendered, {res['skipped']} unchanged)")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
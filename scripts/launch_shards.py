@@ -0,0 +1,142 @@
+"""
+scripts/launch_shards.py
+
+Run a baseline evaluation as N local worker processes and merge the results.
+
+Each worker is scripts/run_baseline.py with --shards N --shard_index i, its
+own torch thread count (cores split evenly unless --threads_per_shard is
+given), its own model copy and its own DB connection pool. All other
+options are passed through unchanged. When every worker succeeded, the shard
+files are merged into the usual result file (ordered by global id).
+
+Usage:
+  python scripts/launch_shards.py --shards 4 -- --models gpt2xl --limit_entries 200 --rdbms both
+
+Worker output goes to results/logs/<dataset>_shard<i>of<N>.log.
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+# Add project root to path for imports
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from models.registry import parse_model_list
+from scripts.merge_shards import merge_shards
+from scripts.run_baseline import build_parser, out_path_for
+
+
+RUNNER = Path(__file__).resolve().parent / "run_baseline.py"
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--shards",
+        type=int,
+        default=max(1, (os.cpu_count() or 2) // 4),
+        help="Number of worker processes.",
+    )
+    parser.add_argument(
+        "--threads_per_shard",
+        "--threads-per-shard",
+        type=int,
+        default=0,
+        help="torch threads per worker (0 = cpu_count // shards).",
+    )
+    parser.add_argument(
+        "--log_dir",
+        type=str,
+        default="results/logs",
+        help="Directory for per-shard worker logs.",
+    )
+    parser.add_argument(
+        "--no_merge",
+        action="store_true",
+        help="Keep the shard files only.",
+    )
+    parser.add_argument(
+        "runner_args",
+        nargs=argparse.REMAINDER,
+        help="Options for scripts/run_baseline.py (after '--').",
+    )
+    args = parser.parse_args()
+
+    runner_args = [a for a in args.runner_args if a != "--"]
+    # validate the runner options once, before starting N processes
+    run_args = build_parser().parse_args(runner_args)
+    if args.shards < 1:
+        print(f"❌ --shards must be >= 1, got {args.shards}")
+        return 1
+    try:
+        models = parse_model_list(run_args.models)
+    except ValueError as e:
+        print(f"❌ {e}")
+        return 1
+
+    threads = args.threads_per_shard or max(1, (os.cpu_count() or 1) // args.shards)
+    dataset_name = Path(run_args.dataset).stem
+    log_dir = Path(args.log_dir)
+    log_dir.mkdir(parents=True, exist_ok=True)
+
+    print("🚀 Sharded baseline launcher")
+    print("=" * 70)
+    print(f"Shards: {args.shards} | torch threads per shard: {threads}")
+    print(f"Runner args: {' '.join(runner_args) or '(defaults)'}")
+    print("=" * 70)
+
+    env = dict(os.environ)
+    # thread pools of the BLAS/OpenMP backends are sized before torch is imported
+    env["OMP_NUM_THREADS"] = str(threads)
+    env["MKL_NUM_THREADS"] = str(threads)
+
+    procs = []
+    t0 = time.time()
+    for i in range(args.shards):
+        log_path = log_dir / f"{dataset_name}_shard{i}of{args.shards}.log"
+        cmd = [
+            sys.executable, str(RUNNER), *runner_args,
+            "--shards", str(args.shards), "--shard_index", str(i), "--num_threads", str(threads),
+        ]
+        log_file = log_path.open("w", encoding="utf-8")
+        procs.append((i, subprocess.Popen(cmd, stdout=log_file, stderr=subprocess.STDOUT, env=env), log_file, log_path))
+        print(f"▶️  Shard {i} started (log: {log_path})")
+
+    failed = []
+    for i, proc, log_file, log_path in procs:
+        rc = proc.wait()
+        log_file.close()
+        if rc == 0:
+            print(f"✅ Shard {i} finished ({time.time() - t0:.1f}s)")
+        else:
+            print(f"❌ Shard {i} failed with exit code {rc} (see {log_path})")
+            failed.append(i)
+
+    if failed:
+        print("❌ Not merging: re-run the launcher with --resume in the runner args to finish the failed shards.")
+        return 1
+    if args.no_merge or args.shards == 1:
+        return 0
+
+    for model in models:
+        shard_paths = [
+            out_path_for(model, dataset_name, run_args.rdbms, run_args.out, args.shards, i)
+            for i in range(args.shards)
+        ]
+        out_path = out_path_for(model, dataset_name, run_args.rdbms, run_args.out)
+        try:
+            stats = merge_shards(shard_paths, out_path)
+        except ValueError as e:
+            print(f"❌ {e}")
+            return 1
+        print(f"✅ [{model}] merged {stats['records']} records -> {out_path}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,13 +1,22 @@
+import argparse
 import sys
 from pathlib import Path
 
 # Add project root
 sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
 
-from models.gpt2xl_agent import GPT2XLAgent
 from database.db_manager import DatabaseManager
 
 def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--server",
+        type=str,
+        default="",
+        help="URL of a running inference server (scripts/serve_agent.py); loads GPT-2 XL locally if omitted.",
+    )
+    args = parser.parse_args()
+
     # 1) Connect to DB (choose mysql first)
     db = DatabaseManager("mysql", "advising")   # change to 'text2sql_db' if you want
     # 2) Pick one question (manual for now)
@@ -16,7 +25,12 @@ def main():
     print(schema)
     
     # 3) Generate SQL
-    agent = GPT2XLAgent()
+    if args.server:
+        from models.inference_server import RemoteAgent
+        agent = RemoteAgent(args.server)
+    else:
+        from models.gpt2xl_agent import GPT2XLAgent
+        agent = GPT2XLAgent()
     sql = agent.generate_sql(schema, question, max_new_tokens=80)
 
     print("\nQuestion:")
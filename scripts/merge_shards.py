@@ -0,0 +1,153 @@
+"""
+scripts/merge_shards.py
+
+Merge the shard JSONLs of a sharded baseline run into one result file.
+
+Shard files of a plain run are already ordered by global id (see
+run_baseline.py --shards), so the shards are k-way merged by id without
+loading them in memory. Runs with --sample or --time_budget write their
+records in sampling / interleaved-stratum order instead; such a shard is
+sorted in memory before the merge. The merged file gets a manifest (dataset
+hash, model, config) like an unsharded run, after checking that all shards
+belong to the same run.
+
+Usage:
+  python scripts/merge_shards.py --inputs "results/gpt2xl_baseline_advising_mysql.shard*of4.jsonl" \
+      --out results/gpt2xl_baseline_advising_mysql.jsonl
+"""
+
+import argparse
+import glob
+import heapq
+import sys
+from pathlib import Path
+
+# Add project root to path for imports
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from scripts.checkpoint import CheckpointWriter, manifest_mismatch, read_manifest, write_manifest
+from scripts.results_io import BlobWriter, is_side_table, iter_records
+
+
+def _record_key(record: dict) -> tuple:
+    return record["id"], record.get("model", "")
+
+
+def _is_ordered(path: Path) -> bool:
+    """True if the shard's records are ascending by (id, model)."""
+    last = None
+    for record in iter_records(path, resolve=False):
+        key = _record_key(record)
+        if last is not None and key < last:
+            return False
+        last = key
+    return True
+
+
+def _ordered_records(path: Path):
+    """Records of a shard by (id, model): streamed if already ordered, else sorted in memory."""
+    if _is_ordered(path):
+        return iter_records(path)
+    return iter(sorted(iter_records(path), key=_record_key))
+
+
+def merge_shards(shard_paths: list[Path], out_path: Path) -> dict:
+    """
+    Merge shard files into out_path ordered by global id.
+
+    Returns:
+        dict: {'records': int, 'shards': int, 'duplicates': int, 'missing_shards': list[int]}
+
+    Raises:
+        ValueError: if the shards come from different runs, or the merge
+            would not be ordered by id.
+    """
+    manifests = [read_manifest(p) for p in shard_paths]
+    merged_manifest = None
+    seen_shards = set()
+    for path, manifest in zip(shard_paths, manifests):
+        if manifest is None:
+            continue
+        config = dict(manifest.get("config", {}))
+        seen_shards.add(config.pop("shard_index", None))
+        candidate = {**manifest, "config": config}
+        if merged_manifest is None:
+            merged_manifest = candidate
+        elif manifest_mismatch(merged_manifest, candidate):
+            diffs = ", ".join(manifest_mismatch(merged_manifest, candidate))
+            raise ValueError(f"{path} belongs to a different run ({diffs}).")
+
+    n_shards = (merged_manifest or {}).get("config", {}).get("shards", len(shard_paths))
+    missing = sorted(set(range(n_shards)) - seen_shards) if merged_manifest else []
+
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    # shard side tables are resolved on read and merged into one for the output
+    writer = CheckpointWriter(out_path, append=False, fsync_every=1024, blobs=BlobWriter(out_path, append=False))
+    n_records = 0
+    duplicates = 0
+    last_key = None
+    try:
+        streams = [_ordered_records(p) for p in shard_paths]
+        for record in heapq.merge(*streams, key=_record_key):
+            key = _record_key(record)
+            if last_key is not None and key < last_key:
+                # heapq.merge needs ordered inputs; never write a mis-ordered file silently
+                raise ValueError(f"Shard records are not ordered by id (id {key[0]} after {last_key[0]}).")
+            if key == last_key:
+                duplicates += 1
+                continue
+            last_key = key
+            writer.write(record)
+            n_records += 1
+    finally:
+        writer.close()
+
+    if merged_manifest is not None:
+        # same config as an unsharded run
+        merged_manifest["config"].update({"shards": 1, "shard_index": 0})
+        merged_manifest["merged_from"] = [str(p) for p in shard_paths]
+        write_manifest(out_path, merged_manifest)
+
+    return {"records": n_records, "shards": len(shard_paths), "duplicates": duplicates, "missing_shards": missing}
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--inputs",
+        type=str,
+        required=True,
+        help="Glob (or comma-separated list) of shard JSONL files.",
+    )
+    parser.add_argument(
+        "--out",
+        type=str,
+        required=True,
+        help="Merged JSONL path.",
+    )
+    args = parser.parse_args()
+
+    paths = []
+    for part in args.inputs.split(","):
+        paths.extend(sorted(glob.glob(part.strip())) or [part.strip()])
+    shard_paths = [Path(p) for p in dict.fromkeys(paths) if p and Path(p).exists() and not is_side_table(p)]
+    if not shard_paths:
+        print(f"❌ No shard files match: {args.inputs}")
+        return 1
+
+    try:
+        stats = merge_shards(shard_paths, Path(args.out))
+    except ValueError as e:
+        print(f"❌ {e}")
+        return 1
+
+    print(f"✅ Merged {stats['shards']} shard(s), {stats['records']} records -> {args.out}")
+    if stats["duplicates"]:
+        print(f"⚠️  Skipped {stats['duplicates']} duplicate record(s)")
+    if stats["missing_shards"]:
+        print(f"⚠️  Missing shard(s): {', '.join(str(i) for i in stats['missing_shards'])}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
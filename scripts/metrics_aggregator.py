@@ -0,0 +1,248 @@
+"""
+scripts/metrics_aggregator.py
+
+Single-pass streaming aggregation of flattened result rows
+(jsonl_to_csv_metrics.to_flat_row) into the summary CSV rows.
+
+Every row is consumed once: per dataset (and per dataset x complexity
+bucket) the aggregator keeps integer counters, running sums and KLL quantile
+sketches (scripts/quantile_sketch.py), so memory does not grow with the run
+size. Aggregators of different files/shards can be merged.
+
+Rates and means are exact; medians/p90 are exact up to ~1k values per
+dataset and KLL approximations (rank error well under 1%) beyond that.
+
+The state (counters, sums, sketches) is JSON-serializable (to_dict /
+from_dict), so a summary can be updated with new rows later.
+
+Usage:
+    agg = SummaryAggregator()
+    for row in rows:
+        agg.add(row)
+    summary_rows = agg.summary_rows()
+"""
+
+from scripts.quantile_sketch import KLLSketch
+
+BUCKETS = ("simple", "medium", "complex", "unknown")
+
+# flattened columns with mean + quantiles in the summary
+DISTRIBUTIONS = (
+    "gen_time_s",
+    "mysql_pred_execution_time_s",
+    "mariadb_pred_execution_time_s",
+    "tables_in_schema_compact",
+)
+
+# summary counters, in row_flags() order
+COUNTERS = (
+    "mysql_pred_succ", "maria_pred_succ", "mysql_ex_true", "maria_ex_true",
+    "mysql_ex_gs_denom", "maria_ex_gs_denom", "mysql_ex_gs_true", "maria_ex_gs_true",
+    "match_denom", "match_true", "mysql_only", "maria_only", "both", "neither",
+)
+
+# the complexity breakdown rows only report these
+_BUCKET_COUNTERS = COUNTERS[:4]
+
+
+def row_flags(r: dict) -> tuple[bool, ...]:
+    """0/1 contribution of one flattened row to every counter (COUNTERS order)."""
+    both = bool(r["pred_both_success"])
+    match = r["mysql_vs_mariadb_match"]
+    mysql_gs = r["mysql_ex_given_success"]
+    maria_gs = r["mariadb_ex_given_success"]
+    return (
+        r["mysql_pred_success"] is True,
+        r["mariadb_pred_success"] is True,
+        r["mysql_ex"] is True,
+        r["mariadb_ex"] is True,
+        mysql_gs is not None,
+        maria_gs is not None,
+        mysql_gs is True,
+        maria_gs is True,
+        both and match is not None,
+        both and match is True,
+        bool(r["pred_mysql_only_success"]),
+        bool(r["pred_mariadb_only_success"]),
+        both,
+        bool(r["pred_neither_success"]),
+    )
+
+
+def _rate(k: int, n: int) -> float | None:
+    return k / n if n else None
+
+
+class _Group:
+    def __init__(self, counters: tuple[str, ...], with_distributions: bool, sketch_k: int):
+        self.n = 0
+        self.names = counters
+        self.totals = [0] * len(counters)
+        self.sums = {col: 0.0 for col in DISTRIBUTIONS} if with_distributions else {}
+        self.sketches = {col: KLLSketch(k=sketch_k) for col in DISTRIBUTIONS} if with_distributions else {}
+
+    @property
+    def counts(self) -> dict[str, int]:
+        return dict(zip(self.names, self.totals))
+
+    def add(self, row: dict, flags: tuple[bool, ...]) -> None:
+        self.n += 1
+        totals = self.totals
+        for i in range(len(totals)):
+            totals[i] += flags[i]
+        for col, sketch in self.sketches.items():
+            x = row.get(col)
+            if x is not None:
+                x = float(x)
+                sketch.update(x)
+                self.sums[col] += x
+
+    def merge(self, other: "_Group") -> None:
+        self.n += other.n
+        self.totals = [a + b for a, b in zip(self.totals, other.totals)]
+        for col, sketch in other.sketches.items():
+            self.sketches[col].merge(sketch)
+            self.sums[col] += other.sums[col]
+
+    def to_dict(self) -> dict:
+        return {
+            "n": self.n,
+            "totals": dict(zip(self.names, self.totals)),
+            "sums": self.sums,
+            "sketches": {col: sketch.to_dict() for col, sketch in self.sketches.items()},
+        }
+
+    @classmethod
+    def from_dict(cls, d: dict, counters: tuple[str, ...], sketch_k: int) -> "_Group":
+        g = cls(counters, bool(d["sketches"]), sketch_k)
+        g.n = d["n"]
+        g.totals = [d["totals"][name] for name in counters]
+        g.sums = dict(d["sums"])
+        g.sketches = {col: KLLSketch.from_dict(sd) for col, sd in d["sketches"].items()}
+        return g
+
+    def mean(self, col: str) -> float | None:
+        sketch = self.sketches[col]
+        return self.sums[col] / sketch.count if sketch.count else None
+
+
+class SummaryAggregator:
+    """
+    Args:
+        sketch_k: KLL accuracy parameter (memory per sketch is O(sketch_k))
+    """
+
+    def __init__(self, sketch_k: int = 1024):
+        self.sketch_k = sketch_k
+        self._datasets: dict[str, _Group] = {}
+        self._buckets: dict[tuple[str, str], _Group] = {}
+
+    def add(self, row: dict) -> None:
+        dataset = row["dataset"]
+        flags = row_flags(row)
+        group = self._datasets.get(dataset)
+        if group is None:
+            group = self._datasets[dataset] = _Group(COUNTERS, True, self.sketch_k)
+        group.add(row, flags)
+
+        key = (dataset, row["complexity_bucket"])
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = _Group(_BUCKET_COUNTERS, False, self.sketch_k)
+        bucket.add(row, flags)
+
+    def merge(self, other: "SummaryAggregator") -> None:
+        for dataset, group in other._datasets.items():
+            if dataset in self._datasets:
+                self._datasets[dataset].merge(group)
+            else:
+                self._datasets[dataset] = group
+        for key, group in other._buckets.items():
+            if key in self._buckets:
+                self._buckets[key].merge(group)
+            else:
+                self._buckets[key] = group
+
+    def to_dict(self) -> dict:
+        return {
+            "sketch_k": self.sketch_k,
+            "datasets": {dataset: g.to_dict() for dataset, g in self._datasets.items()},
+            "buckets": [[dataset, bucket, g.to_dict()] for (dataset, bucket), g in self._buckets.items()],
+        }
+
+    @classmethod
+    def from_dict(cls, d: dict) -> "SummaryAggregator":
+        agg = cls(sketch_k=d["sketch_k"])
+        agg._datasets = {
+            dataset: _Group.from_dict(gd, COUNTERS, agg.sketch_k) for dataset, gd in d["datasets"].items()
+        }
+        agg._buckets = {
+            (dataset, bucket): _Group.from_dict(gd, _BUCKET_COUNTERS, agg.sketch_k)
+            for dataset, bucket, gd in d["buckets"]
+        }
+        return agg
+
+    def summary_rows(self) -> list[dict]:
+        """Per-dataset summary rows, each followed by its complexity breakdown rows."""
+        summaries = []
+        for dataset, g in sorted(self._datasets.items()):
+            n, c = g.n, g.counts
+            s = g.sketches
+            summaries.append({
+                "dataset": dataset,
+                "n_questions": n,
+
+                # 1) Execution success rate
+                "mysql_pred_success_rate": _rate(c["mysql_pred_succ"], n),
+                "mariadb_pred_success_rate": _rate(c["maria_pred_succ"], n),
+
+                # 2) EX overall
+                "mysql_execution_accuracy_ex": _rate(c["mysql_ex_true"], n),
+                "mariadb_execution_accuracy_ex": _rate(c["maria_ex_true"], n),
+
+                # 3) EX | success
+                "mysql_ex_given_success": _rate(c["mysql_ex_gs_true"], c["mysql_ex_gs_denom"]),
+                "mariadb_ex_given_success": _rate(c["maria_ex_gs_true"], c["maria_ex_gs_denom"]),
+
+                # 4) Cross-RDBMS agreement among both-success
+                "mysql_vs_mariadb_match_rate": _rate(c["match_true"], c["match_denom"]),
+
+                # 5) Failure asymmetry (pred)
+                "mysql_only_success_rate": _rate(c["mysql_only"], n),
+                "mariadb_only_success_rate": _rate(c["maria_only"], n),
+                "both_success_rate": _rate(c["both"], n),
+                "neither_success_rate": _rate(c["neither"], n),
+
+                # 6) Generation time stats
+                "gen_time_mean_s": g.mean("gen_time_s"),
+                "gen_time_median_s": s["gen_time_s"].quantile(0.5),
+                "gen_time_p90_s": s["gen_time_s"].quantile(0.90),
+
+                # 7) Execution time stats
+                "mysql_exec_time_mean_s": g.mean("mysql_pred_execution_time_s"),
+                "mysql_exec_time_median_s": s["mysql_pred_execution_time_s"].quantile(0.5),
+                "mariadb_exec_time_mean_s": g.mean("mariadb_pred_execution_time_s"),
+                "mariadb_exec_time_median_s": s["mariadb_pred_execution_time_s"].quantile(0.5),
+
+                # 9) Schema size stats (for sensitivity)
+                "schema_tables_mean": g.mean("tables_in_schema_compact"),
+                "schema_tables_median": s["tables_in_schema_compact"].quantile(0.5),
+            })
+
+            # 8) Complexity breakdown rows
+            for bucket in BUCKETS:
+                b = self._buckets.get((dataset, bucket))
+                if b is None:
+                    continue
+                bn, bc = b.n, b.counts
+                summaries.append({
+                    "dataset": dataset,
+                    "n_questions": bn,
+                    "breakdown": "complexity",
+                    "bucket": bucket,
+                    "mysql_pred_success_rate": bc["mysql_pred_succ"] / bn,
+                    "mariadb_pred_success_rate": bc["maria_pred_succ"] / bn,
+                    "mysql_execution_accuracy_ex": bc["mysql_ex_true"] / bn,
+                    "mariadb_execution_accuracy_ex": bc["maria_ex_true"] / bn,
+                })
+        return summaries
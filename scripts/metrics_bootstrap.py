@@ -0,0 +1,241 @@
+"""
+scripts/metrics_bootstrap.py
+
+Vectorized (NumPy) summary backend for jsonl_to_csv_metrics.py with
+bootstrap confidence intervals.
+
+Flattened rows are loaded once into columnar arrays (ColumnarRows): the
+0/1 contribution of every row to every summary counter (metrics_aggregator
+row_flags, so the definitions are shared with the streaming backend) plus
+the values of the timing / schema-size columns. Every rate and mean of the
+summary is then a ratio of two column sums, so all of them are bootstrapped
+together:
+
+    counts (B x n, how often each question is drawn per resample) @ X (n x m)
+
+gives the column sums of B resamples in one matrix product; ratios of those
+columns are the bootstrap distributions, and their percentiles the CIs
+(<metric>_ci_low / <metric>_ci_high). Resamples are generated in chunks so
+memory stays bounded for large runs.
+
+Paired differences between two runs (same questions, joined on dataset + id)
+use the same resample of questions for both runs, so the CI of
+run A - run B accounts for the per-question correlation.
+
+Usage:
+    cols = ColumnarRows()
+    for row in rows:
+        cols.add(row)
+    summary_rows = summarize_columns(cols, n_boot=2000)
+    summary_rows += paired_diff_rows(cols, other_cols, label="qwen1.5b_baseline_advising_mysql")
+"""
+
+import numpy as np
+
+from scripts.metrics_aggregator import BUCKETS, COUNTERS, DISTRIBUTIONS, row_flags
+
+# X columns: one per question, then the counters, then per distribution sum + count
+_COLUMNS = ("n", *COUNTERS, *(f"sum:{c}" for c in DISTRIBUTIONS), *(f"cnt:{c}" for c in DISTRIBUTIONS))
+_IDX = {name: i for i, name in enumerate(_COLUMNS)}
+
+# summary metric -> (numerator column, denominator column), in summary order
+RATIOS = {
+    "mysql_pred_success_rate": ("mysql_pred_succ", "n"),
+    "mariadb_pred_success_rate": ("maria_pred_succ", "n"),
+    "mysql_execution_accuracy_ex": ("mysql_ex_true", "n"),
+    "mariadb_execution_accuracy_ex": ("maria_ex_true", "n"),
+    "mysql_ex_given_success": ("mysql_ex_gs_true", "mysql_ex_gs_denom"),
+    "mariadb_ex_given_success": ("maria_ex_gs_true", "maria_ex_gs_denom"),
+    "mysql_vs_mariadb_match_rate": ("match_true", "match_denom"),
+    "mysql_only_success_rate": ("mysql_only", "n"),
+    "mariadb_only_success_rate": ("maria_only", "n"),
+    "both_success_rate": ("both", "n"),
+    "neither_success_rate": ("neither", "n"),
+    "gen_time_mean_s": ("sum:gen_time_s", "cnt:gen_time_s"),
+    "mysql_exec_time_mean_s": ("sum:mysql_pred_execution_time_s", "cnt:mysql_pred_execution_time_s"),
+    "mariadb_exec_time_mean_s": ("sum:mariadb_pred_execution_time_s", "cnt:mariadb_pred_execution_time_s"),
+    "schema_tables_mean": ("sum:tables_in_schema_compact", "cnt:tables_in_schema_compact"),
+}
+
+# complexity breakdown rows only report these
+_BUCKET_RATIOS = tuple(RATIOS)[:4]
+
+# summary metric -> (column, quantile); nearest-rank like the streaming backend
+QUANTILES = {
+    "gen_time_median_s": ("gen_time_s", 0.5),
+    "gen_time_p90_s": ("gen_time_s", 0.9),
+    "mysql_exec_time_median_s": ("mysql_pred_execution_time_s", 0.5),
+    "mariadb_exec_time_median_s": ("mariadb_pred_execution_time_s", 0.5),
+    "schema_tables_median": ("tables_in_schema_compact", 0.5),
+}
+
+# bootstrap resamples are drawn this many (question, resample) cells at a time
+_CHUNK_CELLS = 1 << 22
+
+
+class ColumnarRows:
+    """Flattened rows collected column-wise; arrays are built once on first use."""
+
+    def __init__(self):
+        self._keys: list[tuple] = []
+        self._flags: list[tuple[bool, ...]] = []
+        self._values: list[tuple] = []
+        self._arrays = None
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def add(self, row: dict) -> None:
+        self._keys.append((row["dataset"], row["complexity_bucket"], row.get("id")))
+        self._flags.append(row_flags(row))
+        self._values.append(tuple(row.get(c) for c in DISTRIBUTIONS))
+        self._arrays = None
+
+    def arrays(self) -> dict:
+        """{'dataset', 'bucket', 'id': object arrays, 'values': n x d float (nan = missing), 'X': n x m}."""
+        if self._arrays is None:
+            n = len(self._keys)
+            keys = [np.array([k[i] for k in self._keys], dtype=object) for i in range(3)]
+            values = np.array(self._values, dtype=float).reshape(n, len(DISTRIBUTIONS))
+            present = ~np.isnan(values)
+            X = np.hstack([
+                np.ones((n, 1)),
+                np.array(self._flags, dtype=float).reshape(n, len(COUNTERS)),
+                np.where(present, values, 0.0),
+                present.astype(float),
+            ])
+            self._arrays = {"dataset": keys[0], "bucket": keys[1], "id": keys[2], "values": values, "X": X}
+        return self._arrays
+
+
+def _ratio(sums: np.ndarray, num: str, den: str) -> np.ndarray:
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(sums[..., _IDX[den]] > 0, sums[..., _IDX[num]] / sums[..., _IDX[den]], np.nan)
+
+
+def _none(x: float) -> float | None:
+    return None if np.isnan(x) else float(x)
+
+
+def bootstrap_sums(X: np.ndarray, n_boot: int, rng: np.random.Generator) -> np.ndarray:
+    """
+    Column sums of `n_boot` bootstrap resamples of the rows of X (n_boot x m).
+
+    Each chunk draws the resampled row indices, turns them into per-row draw
+    counts with one bincount, and multiplies: counts @ X.
+    """
+    n = X.shape[0]
+    out = np.empty((n_boot, X.shape[1]))
+    if n == 0:
+        out[:] = 0.0
+        return out
+    step = max(1, _CHUNK_CELLS // n)
+    for start in range(0, n_boot, step):
+        b = min(step, n_boot - start)
+        idx = rng.integers(0, n, size=(b, n))
+        idx += (np.arange(b) * n)[:, None]
+        counts = np.bincount(idx.ravel(), minlength=b * n).reshape(b, n)
+        out[start:start + b] = counts @ X
+    return out
+
+
+def _ci(dist: np.ndarray, ci: float) -> tuple[float | None, float | None]:
+    if np.isnan(dist).all():
+        return None, None
+    alpha = (1 - ci) / 2 * 100
+    lo, hi = np.nanpercentile(dist, [alpha, 100 - alpha])
+    return float(lo), float(hi)
+
+
+def _ratio_stats(X: np.ndarray, metrics, n_boot: int, ci: float, rng: np.random.Generator) -> dict:
+    """Point estimate (+ bootstrap CI) of every metric in `metrics` over the rows of X."""
+    point = X.sum(axis=0)
+    boots = bootstrap_sums(X, n_boot, rng) if n_boot else None
+    out = {}
+    for name in metrics:
+        num, den = RATIOS[name]
+        out[name] = _none(_ratio(point, num, den))
+        if boots is not None:
+            out[f"{name}_ci_low"], out[f"{name}_ci_high"] = _ci(_ratio(boots, num, den), ci)
+    return out
+
+
+def _quantile(values: np.ndarray, q: float) -> float | None:
+    values = values[~np.isnan(values)]
+    if not len(values):
+        return None
+    return float(np.percentile(values, q * 100, method="inverted_cdf"))
+
+
+def summarize_columns(cols: ColumnarRows, n_boot: int = 2000, ci: float = 0.95, seed: int = 0) -> list[dict]:
+    """
+    Per-dataset summary rows (same keys as the streaming summary) plus
+    <metric>_ci_low/_ci_high for every rate and mean, each dataset followed
+    by its complexity breakdown rows.
+    """
+    a = cols.arrays()
+    rng = np.random.default_rng(seed)
+    summaries = []
+    for dataset in sorted(set(a["dataset"])):
+        mask = a["dataset"] == dataset
+        X = a["X"][mask]
+        row = {"dataset": dataset, "n_questions": int(mask.sum())}
+        row.update(_ratio_stats(X, RATIOS, n_boot, ci, rng))
+        values = a["values"][mask]
+        for name, (col, q) in QUANTILES.items():
+            row[name] = _quantile(values[:, DISTRIBUTIONS.index(col)], q)
+        summaries.append(row)
+
+        buckets = a["bucket"][mask]
+        for bucket in BUCKETS:
+            bmask = buckets == bucket
+            if not bmask.any():
+                continue
+            summaries.append({
+                "dataset": dataset,
+                "n_questions": int(bmask.sum()),
+                "breakdown": "complexity",
+                "bucket": bucket,
+                **_ratio_stats(X[bmask], _BUCKET_RATIOS, n_boot, ci, rng),
+            })
+    return summaries
+
+
+def paired_diff_rows(
+    cols: ColumnarRows,
+    other: ColumnarRows,
+    label: str,
+    n_boot: int = 2000,
+    ci: float = 0.95,
+    seed: int = 0,
+) -> list[dict]:
+    """
+    Per-dataset paired differences (this run - `other`) of every rate and
+    mean over the questions both runs answered (joined on dataset + id):
+    <metric>_diff with <metric>_diff_ci_low/_diff_ci_high.
+    """
+    a, b = cols.arrays(), other.arrays()
+    rng = np.random.default_rng(seed)
+    b_pos = {(d, i): k for k, (d, i) in enumerate(zip(b["dataset"], b["id"])) if i is not None}
+    rows = []
+    for dataset in sorted(set(a["dataset"])):
+        ia, ib = [], []
+        for k in np.flatnonzero(a["dataset"] == dataset):
+            j = b_pos.get((dataset, a["id"][k]))
+            if j is not None:
+                ia.append(k)
+                ib.append(j)
+        row = {"dataset": dataset, "n_questions": len(ia), "breakdown": "paired_diff", "bucket": label}
+        if ia:
+            m = a["X"].shape[1]
+            # same resampled questions for both runs: bootstrap the side-by-side matrix
+            X = np.hstack([a["X"][ia], b["X"][ib]])
+            point = X.sum(axis=0)
+            boots = bootstrap_sums(X, n_boot, rng) if n_boot else None
+            for name, (num, den) in RATIOS.items():
+                row[f"{name}_diff"] = _none(_ratio(point[:m], num, den) - _ratio(point[m:], num, den))
+                if boots is not None:
+                    dist = _ratio(boots[:, :m], num, den) - _ratio(boots[:, m:], num, den)
+                    row[f"{name}_diff_ci_low"], row[f"{name}_diff_ci_high"] = _ci(dist, ci)
+        rows.append(row)
+    return rows
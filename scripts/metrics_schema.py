@@ -0,0 +1,195 @@
+"""
+scripts/metrics_schema.py
+
+Typed column schema of the per-question metrics rows
+(jsonl_to_csv_metrics.to_flat_row) and the columnar (Parquet) store.
+
+FLAT_COLUMNS is the contract between the converter and its readers: to_flat_row
+emits exactly these columns, and plot_results.py / latency_stats.py name the
+columns they read through columns(), which fails on a name that is not in the
+schema instead of silently plotting NaN.
+
+The JSONL stays the source of truth (append/resume friendly); the Parquet
+file is written next to it from the flattened rows, with a stable schema:
+
+  - booleans are nullable booleans (None = not executed / not compared)
+  - times are float64, counts int64
+  - low-cardinality labels (dataset, splits, rdbms_mode, complexity) are
+    dictionary-encoded (pandas: category)
+
+Readers ask only for the columns they use (column projection), so a plot
+does not parse SQL strings or question texts at all.
+
+Parquet needs pyarrow (optional): without it ParquetRowWriter is unavailable
+and read_metrics() only reads CSV.
+
+Usage:
+    with ParquetRowWriter(Path("results/run.parquet")) as w:
+        for row in rows:
+            w.write(row)
+    df = read_metrics(Path("results/run.parquet"), columns=["dataset", "mysql_ex"])
+"""
+
+from pathlib import Path
+
+import pandas as pd
+
+BOOL = "bool"
+FLOAT = "float"
+INT = "int"
+CATEGORY = "category"
+STRING = "string"
+
+# flattened row column -> kind (to_flat_row order)
+FLAT_COLUMNS = {
+    "id": INT,
+    "dataset": CATEGORY,
+    "rdbms_mode": CATEGORY,
+    "query_split": CATEGORY,
+    "question_split": CATEGORY,
+    "question_text": STRING,
+    "tables_in_schema_compact": INT,
+    "schema_tables_included": INT,
+    "schema_columns_included": INT,
+    "complexity_bucket": CATEGORY,
+    "pred_sql": STRING,
+    "gold_sql_exec": STRING,
+    "gen_time_s": FLOAT,
+    "cache_hit": BOOL,
+    "prompt_tokens": INT,
+    "output_tokens": INT,
+    "tokens_per_s": FLOAT,
+    "peak_rss_mb": FLOAT,
+    "mysql_pred_success": BOOL,
+    "mariadb_pred_success": BOOL,
+    "mysql_gold_success": BOOL,
+    "mariadb_gold_success": BOOL,
+    "mysql_pred_execution_time_s": FLOAT,
+    "mariadb_pred_execution_time_s": FLOAT,
+    "mysql_gold_execution_time_s": FLOAT,
+    "mariadb_gold_execution_time_s": FLOAT,
+    "mysql_pred_rows_examined": INT,
+    "mariadb_pred_rows_examined": INT,
+    "mysql_gold_rows_examined": INT,
+    "mariadb_gold_rows_examined": INT,
+    "mysql_ex": BOOL,
+    "mariadb_ex": BOOL,
+    "mysql_ex_given_success": BOOL,
+    "mariadb_ex_given_success": BOOL,
+    "mysql_vs_mariadb_match": BOOL,
+    "pred_mysql_only_success": BOOL,
+    "pred_mariadb_only_success": BOOL,
+    "pred_both_success": BOOL,
+    "pred_neither_success": BOOL,
+}
+
+_PANDAS_DTYPES = {BOOL: "boolean", FLOAT: "float64", INT: "Int64", CATEGORY: "category", STRING: "string"}
+
+
+def columns(*names: str) -> list[str]:
+    """The given column names, checked against FLAT_COLUMNS (KeyError on an unknown name)."""
+    unknown = [n for n in names if n not in FLAT_COLUMNS]
+    if unknown:
+        raise KeyError(f"Not metrics columns: {', '.join(unknown)}")
+    return list(names)
+
+
+def _pyarrow():
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise RuntimeError("Parquet output needs pyarrow (pip install pyarrow).") from None
+    return pa, pq
+
+
+def has_parquet() -> bool:
+    try:
+        _pyarrow()
+    except RuntimeError:
+        return False
+    return True
+
+
+def arrow_schema():
+    """pyarrow schema of FLAT_COLUMNS."""
+    pa, _ = _pyarrow()
+    types = {
+        BOOL: pa.bool_(),
+        FLOAT: pa.float64(),
+        INT: pa.int64(),
+        CATEGORY: pa.dictionary(pa.int32(), pa.string()),
+        STRING: pa.string(),
+    }
+    return pa.schema([(name, types[kind]) for name, kind in FLAT_COLUMNS.items()])
+
+
+class ParquetRowWriter:
+    """
+    Write flattened rows to Parquet in row groups of `batch_rows`
+    (rows are buffered column-wise, memory is O(batch_rows)).
+    """
+
+    def __init__(self, path: Path, batch_rows: int = 8192):
+        pa, pq = _pyarrow()
+        self._pa = pa
+        self.path = path
+        self.batch_rows = batch_rows
+        self.rows = 0
+        self.schema = arrow_schema()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._writer = pq.ParquetWriter(str(path), self.schema, compression="zstd")
+        self._buf: dict[str, list] = {name: [] for name in FLAT_COLUMNS}
+        self._buffered = 0
+
+    def write(self, row: dict) -> None:
+        for name, values in self._buf.items():
+            values.append(row.get(name))
+        self._buffered += 1
+        self.rows += 1
+        if self._buffered >= self.batch_rows:
+            self._flush()
+
+    def _flush(self) -> None:
+        if not self._buffered:
+            return
+        table = self._pa.Table.from_pydict(self._buf, schema=self.schema)
+        self._writer.write_table(table)
+        self._buf = {name: [] for name in FLAT_COLUMNS}
+        self._buffered = 0
+
+    def close(self) -> None:
+        self._flush()
+        self._writer.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def read_metrics(path: Path, columns: list[str] | None = None) -> pd.DataFrame:
+    """
+    Metrics rows as a typed DataFrame from .parquet (projected: only
+    `columns` that exist in the file are read) or a converter CSV; both get
+    the same pandas dtypes (nullable boolean/Int64, float64, category, string).
+    """
+    if path.suffix == ".parquet":
+        _, pq = _pyarrow()
+        if columns is not None:
+            available = set(pq.read_schema(str(path)).names)
+            columns = [c for c in columns if c in available]
+        df = pq.read_table(str(path), columns=columns).to_pandas()
+    else:
+        usecols = None if columns is None else (lambda c: c in columns)
+        df = pd.read_csv(path, usecols=usecols)
+
+    for col in df.columns:
+        kind = FLAT_COLUMNS.get(col)
+        if kind == BOOL:
+            # CSV booleans come back as True/False strings or objects with NaN
+            df[col] = df[col].map({True: True, False: False, "True": True, "False": False}).astype("boolean")
+        elif kind is not None:
+            df[col] = df[col].astype(_PANDAS_DTYPES[kind])
+    return df
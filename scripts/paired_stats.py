@@ -0,0 +1,222 @@
+"""
+scripts/paired_stats.py
+
+Paired A/B comparison of models evaluated on the same questions.
+
+Joins the per-model result JSONLs of one run by question id into paired
+records (one line per question, one entry per model) and runs McNemar's test
+for every model pair on the primary-RDBMS execution accuracy (EX):
+
+                     model B right   model B wrong
+    model A right        both           a_only
+    model A wrong       b_only          neither
+
+Only the discordant pairs (a_only, b_only) carry information; the exact
+two-sided binomial p-value is reported (plus the continuity-corrected
+chi-square statistic).
+
+Each paired record also says whether all models were scored against the same
+gold result fingerprint (gold executed once per question by run_baseline.py).
+
+Usage:
+  python scripts/paired_stats.py \
+      --inputs results/gpt2xl_baseline_advising_mysql.jsonl,results/qwen1.5b_baseline_advising_mysql.jsonl \
+      --out results/paired_baseline_advising_mysql.jsonl
+"""
+
+import argparse
+import glob
+import json
+import math
+import sys
+from itertools import combinations
+from pathlib import Path
+
+# Add project root to path for imports
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from scripts.results_io import is_side_table
+
+
+def primary_ex(record: dict) -> bool:
+    """EX on the primary RDBMS of the record (failed/incomparable = wrong)."""
+    if record.get("rdbms_mode") == "mariadb":
+        return bool(record.get("mariadb_pred_vs_gold_match"))
+    return bool(record.get("mysql_pred_vs_gold_match"))
+
+
+def _primary(record: dict, key: str) -> dict | None:
+    prefix = "mariadb" if record.get("rdbms_mode") == "mariadb" else "mysql"
+    return record.get(f"{prefix}{key}")
+
+
+def _slim(record: dict) -> dict:
+    pred = _primary(record, "") or {}
+    gold = _primary(record, "_gold") or {}
+    return {
+        "pred_sql": record.get("pred_sql"),
+        "success": pred.get("success"),
+        "ex": primary_ex(record),
+        "pred_fingerprint": pred.get("fingerprint"),
+        "gold_fingerprint": gold.get("fingerprint"),
+    }
+
+
+def load_model_results(path: Path) -> tuple[str, dict[int, dict]]:
+    """(model, {id: record}) with the question fields and a slim per-model result."""
+    model = None
+    by_id = {}
+    with path.open("r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            rec = json.loads(line)
+            model = model or rec.get("model") or path.stem
+            by_id[rec["id"]] = {
+                "id": rec["id"],
+                "entry_idx": rec.get("entry_idx"),
+                "sentence_idx": rec.get("sentence_idx"),
+                "question_text": rec.get("question_text"),
+                "query_split": rec.get("query_split"),
+                "question_split": rec.get("question_split"),
+                "stratum": rec.get("stratum"),
+                "result": _slim(rec),
+            }
+    return model or path.stem, by_id
+
+
+def pair_results(paths: list[Path]) -> tuple[list[str], list[dict], int]:
+    """
+    Join per-model results on question id.
+
+    Returns:
+        (models, paired_records, n_unpaired) - only questions answered by every model are paired.
+    """
+    loaded = [load_model_results(p) for p in paths]
+    models = [m for m, _ in loaded]
+    common = set.intersection(*(set(by_id) for _, by_id in loaded)) if loaded else set()
+    all_ids = set().union(*(set(by_id) for _, by_id in loaded)) if loaded else set()
+
+    paired = []
+    for qid in sorted(common):
+        base = dict(loaded[0][1][qid])
+        base.pop("result")
+        results = {m: by_id[qid]["result"] for m, by_id in loaded}
+        golds = {r["gold_fingerprint"] for r in results.values()}
+        paired.append({
+            **base,
+            "models": results,
+            "gold_consistent": len(golds) == 1,
+        })
+    return models, paired, len(all_ids) - len(common)
+
+
+def mcnemar(a_only: int, b_only: int) -> dict:
+    """McNemar's test on the discordant counts (exact binomial p + corrected chi2)."""
+    n = a_only + b_only
+    if n == 0:
+        return {"chi2": 0.0, "p_value": 1.0}
+    k = min(a_only, b_only)
+    p = sum(math.comb(n, i) for i in range(k + 1)) / 2 ** n
+    chi2 = (abs(a_only - b_only) - 1) ** 2 / n
+    return {"chi2": chi2, "p_value": min(1.0, 2 * p)}
+
+
+def pairwise_mcnemar(models: list[str], paired: list[dict]) -> list[dict]:
+    out = []
+    for a, b in combinations(models, 2):
+        both = a_only = b_only = neither = 0
+        for rec in paired:
+            ra, rb = rec["models"][a]["ex"], rec["models"][b]["ex"]
+            if ra and rb:
+                both += 1
+            elif ra:
+                a_only += 1
+            elif rb:
+                b_only += 1
+            else:
+                neither += 1
+        n = len(paired)
+        out.append({
+            "model_a": a,
+            "model_b": b,
+            "n": n,
+            "both": both,
+            "a_only": a_only,
+            "b_only": b_only,
+            "neither": neither,
+            "ex_a": (both + a_only) / n if n else None,
+            "ex_b": (both + b_only) / n if n else None,
+            **mcnemar(a_only, b_only),
+        })
+    return out
+
+
+def write_paired(paths: list[Path], out_path: Path) -> dict:
+    """
+    Write the paired JSONL and <out>.mcnemar.json; return the summary dict.
+    """
+    models, paired, n_unpaired = pair_results(paths)
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    with out_path.open("w", encoding="utf-8") as f:
+        for rec in paired:
+            f.write(json.dumps(rec, ensure_ascii=False) + "\n")
+
+    summary = {
+        "models": models,
+        "paired": len(paired),
+        "unpaired": n_unpaired,
+        "gold_inconsistent": sum(1 for r in paired if not r["gold_consistent"]),
+        "mcnemar": pairwise_mcnemar(models, paired),
+    }
+    summary_path = out_path.with_name(out_path.name + ".mcnemar.json")
+    summary_path.write_text(json.dumps(summary, indent=2), encoding="utf-8")
+    return summary
+
+
+def print_summary(summary: dict) -> None:
+    print(f"\n🔀 Paired comparison: {summary['paired']} questions ({summary['unpaired']} unpaired)")
+    if summary["gold_inconsistent"]:
+        print(f"⚠️  {summary['gold_inconsistent']} question(s) with different gold results across models")
+    for row in summary["mcnemar"]:
+        if not row["n"]:
+            continue
+        print(
+            f"  {row['model_a']} vs {row['model_b']}: EX {row['ex_a']*100:.1f}% vs {row['ex_b']*100:.1f}% | "
+            f"only A={row['a_only']} only B={row['b_only']} | McNemar p={row['p_value']:.4f}"
+        )
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--inputs",
+        type=str,
+        required=True,
+        help="Glob (or comma-separated list) of per-model JSONL files from the same run.",
+    )
+    parser.add_argument(
+        "--out",
+        type=str,
+        required=True,
+        help="Paired JSONL output path.",
+    )
+    args = parser.parse_args()
+
+    paths = []
+    for part in args.inputs.split(","):
+        paths.extend(sorted(glob.glob(part.strip())) or [part.strip()])
+    paths = [Path(p) for p in dict.fromkeys(paths) if p and Path(p).exists() and not is_side_table(p)]
+    if len(paths) < 2:
+        print(f"❌ Need at least two result files, got: {len(paths)}")
+        return 1
+
+    summary = write_paired(paths, Path(args.out))
+    print_summary(summary)
+    print(f"✅ Wrote paired records to: {args.out}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,189 +1,188 @@
 """
 scripts/plot_results.py
 
-Read a metrics CSV (from jsonl->csv step) and generate plots into docs/figures/.
+Read a metrics CSV or Parquet file (from jsonl->csv step) and generate plots into docs/figures/.
+Parquet is read with column projection (only PLOT_COLUMNS), already typed
+(scripts/metrics_schema.py).
 
-Assumptions about CSV columns (from the converter we discussed):
+Columns read (names and types from scripts/metrics_schema.FLAT_COLUMNS, the
+converter's output; files from older converters simply lack the newer ones):
 Core identifiers:
   - dataset
   - rdbms_mode  (optional; if missing, plots still work grouped by dataset only)
 
-Gold/pred execution:
-  - mysql_pred_success, mysql_gold_success, mysql_ex, mysql_ex_given_success, mysql_exec_time_s, mysql_gold_exec_time_s
-  - mariadb_pred_success, mariadb_gold_success, mariadb_ex, mariadb_ex_given_success, mariadb_exec_time_s, mariadb_gold_exec_time_s
+Gold/pred execution, per RDBMS (mysql_ / mariadb_):
+  - pred_success, gold_success, ex, ex_given_success
+  - pred_execution_time_s, gold_execution_time_s
+  - pred_rows_examined  (runner --rows_examined)
   - mysql_vs_mariadb_match  (only when both executed)
 
 Generation + prompt:
-  - gen_time_s
-  - prompt_chars (or prompt_tokens if you added)
-  - schema_tables_included
-  - schema_columns_included
+  - gen_time_s, prompt_tokens, output_tokens, tokens_per_s, peak_rss_mb
+  - schema_tables_included, schema_columns_included
   - complexity_bucket  in {"simple","medium","complex"} (or empty)
 
 Output:
   - PNG files into docs/figures/ with consistent filenames.
+
+All metrics come from one grouped aggregation; figures are drawn with the
+Agg canvas (no pyplot state) over a process pool, and a figure is only
+redrawn when the hash of its data changed (docs/figures/.figures_cache.json).
+
+Comparison mode (--compare GLOB) loads several runs' summary or per-question
+files in parallel into a model x dataset x rdbms x complexity cube
+(scripts/compare_runs.py, written to <tag>__cube.csv) and draws grouped
+model charts: EX, EX by complexity, latency and throughput, with CI error bars.
+
+Usage:
+    python scripts/plot_results.py --csv results/run.parquet --out_dir docs/figures --jobs 4
+    python scripts/plot_results.py --csv results/run.csv --force
+    python scripts/plot_results.py --compare "results/*_baseline_advising_mysql_summary.csv"
 """
 
 from __future__ import annotations
 
 import argparse
+import glob
+import hashlib
+import json
 import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from typing import Iterable
 
 import pandas as pd
-import matplotlib.pyplot as plt
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+from matplotlib.ticker import NullFormatter
+
+# Add project root to path for imports
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from scripts.compare_runs import ALL, load_cube
+from scripts.metrics_schema import columns, read_metrics
+
+RDBMS = ("mysql", "mariadb")
+
+# per-RDBMS columns: rates over all rows (missing = False) and numeric ones
+_RATE_COLS = ("pred_success", "gold_success", "ex", "ex_given_success")
+_NUM_COLS = ("pred_execution_time_s", "gold_execution_time_s", "pred_rows_examined")
+_SHARED_NUM_COLS = (
+    "gen_time_s", "prompt_tokens", "output_tokens", "tokens_per_s", "peak_rss_mb",
+    "schema_tables_included", "schema_columns_included",
+)
+
+# columns the plots read (missing ones are skipped); unknown names fail here
+PLOT_COLUMNS = columns(
+    "dataset", "rdbms_mode", "complexity_bucket", "mysql_vs_mariadb_match", *_SHARED_NUM_COLS,
+    *(f"{rdbms}_{col}" for rdbms in RDBMS for col in (*_RATE_COLS, *_NUM_COLS)),
+)
 
 
 # --------------------------
 # Helpers
 # --------------------------
 
+BUCKETS = ["simple", "medium", "complex"]
+
+# bump when the rendering below changes, so cached figures are redrawn
+RENDER_VERSION = 1
+CACHE_FILE = ".figures_cache.json"
+
+
 def _ensure_dir(path: Path) -> None:
     path.mkdir(parents=True, exist_ok=True)
 
-def _safe_col(df: pd.DataFrame, col: str, default=0):
-    if col in df.columns:
-        return df[col]
-    return default
-
 def _as_bool_series(df: pd.DataFrame, col: str) -> pd.Series:
     if col not in df.columns:
-        return pd.Series([False] * len(df), index=df.index)
+        return pd.Series(False, index=df.index)
     # handle "True"/"False" strings or NaNs
     return df[col].fillna(False).astype(bool)
 
 def _as_num_series(df: pd.DataFrame, col: str) -> pd.Series:
     if col not in df.columns:
-        return pd.Series([pd.NA] * len(df), index=df.index)
-    return pd.to_numeric(df[col], errors="coerce")
+        return pd.Series(float("nan"), index=df.index)
+    return pd.to_numeric(df[col], errors="coerce").astype(float)
 
-def _agg_rate(df: pd.DataFrame, flag_col: str) -> float:
-    s = _as_bool_series(df, flag_col)
-    return float(s.mean()) if len(s) else 0.0
+def _has_values(df: pd.DataFrame, col: str) -> bool:
+    return col in df.columns and bool(df[col].notna().any())
 
-def _agg_mean(df: pd.DataFrame, num_col: str) -> float:
-    s = _as_num_series(df, num_col)
-    return float(s.dropna().mean()) if s.notna().any() else float("nan")
-
-def _agg_median(df: pd.DataFrame, num_col: str) -> float:
-    s = _as_num_series(df, num_col)
-    return float(s.dropna().median()) if s.notna().any() else float("nan")
-
-def _agg_p95(df: pd.DataFrame, num_col: str) -> float:
-    s = _as_num_series(df, num_col).dropna()
-    return float(s.quantile(0.95)) if len(s) else float("nan")
-
-def _filter_complexity(df: pd.DataFrame, bucket: str) -> pd.DataFrame:
-    if "complexity_bucket" not in df.columns:
-        return df.iloc[0:0]
-    return df[df["complexity_bucket"].fillna("") == bucket]
-
-def _savefig(out_path: Path) -> None:
-    plt.tight_layout()
-    plt.savefig(out_path, dpi=200)
-    plt.close()
-
-def _bar_plot(series: pd.Series, title: str, ylabel: str, out_path: Path) -> None:
-    plt.figure()
-    series = series.sort_values(ascending=False)
-    series.plot(kind="bar")
-    plt.title(title)
-    plt.ylabel(ylabel)
-    plt.xlabel("dataset")
-    _savefig(out_path)
-
-def _bar_plot_multi(df: pd.DataFrame, title: str, ylabel: str, out_path: Path) -> None:
-    """
-    Expects df indexed by dataset and columns as categories (e.g. rdbms or complexity).
+def _numeric_frame(df: pd.DataFrame) -> pd.DataFrame:
     """
-    plt.figure()
-    df = df.sort_index()
-    df.plot(kind="bar")
-    plt.title(title)
-    plt.ylabel(ylabel)
-    plt.xlabel("dataset")
-    plt.legend()
-    _savefig(out_path)
-
-def _line_plot_by_bucket(df: pd.DataFrame, y_col: str, title: str, ylabel: str, out_path: Path) -> None:
-    """
-    Plot y (mean) across complexity buckets: simple->medium->complex.
+    One float column per metric input: rate flags as 0/1 (so a group mean is
+    the rate), timings / sizes / counts as floats with NaN for missing values.
     """
-    buckets = ["simple", "medium", "complex"]
-    vals = []
-    for b in buckets:
-        sub = _filter_complexity(df, b)
-        vals.append(_agg_rate(sub, y_col))
-    plt.figure()
-    plt.plot(buckets, vals, marker="o")
-    plt.title(title)
-    plt.ylabel(ylabel)
-    plt.xlabel("complexity_bucket")
-    _savefig(out_path)
+    cols = {}
+    for rdbms in RDBMS:
+        for col in _RATE_COLS:
+            cols[f"{rdbms}_{col}"] = _as_bool_series(df, f"{rdbms}_{col}").astype(float)
+        for col in _NUM_COLS:
+            cols[f"{rdbms}_{col}"] = _as_num_series(df, f"{rdbms}_{col}")
+    for col in _SHARED_NUM_COLS:
+        cols[col] = _as_num_series(df, col)
+    return pd.DataFrame(cols, index=df.index)
 
 
 # --------------------------
 # Metric computation
 # --------------------------
 
-def compute_metrics_by_dataset(df: pd.DataFrame, rdbms: str) -> pd.DataFrame:
+def compute_all_metrics(df: pd.DataFrame) -> dict[str, pd.DataFrame]:
     """
-    rdbms in {"mysql","mariadb"}.
-    Returns per-dataset aggregated metrics (one row per dataset).
+    Per-dataset aggregated metrics for both RDBMS ({"mysql": ..., "mariadb": ...},
+    one row per dataset), from a single grouped aggregation over all columns.
     """
-    assert rdbms in {"mysql", "mariadb"}
-    pref = f"{rdbms}_"
-
-    out_rows = []
-    for dataset, g in df.groupby("dataset", dropna=False):
-        total = len(g)
-
-        pred_success = _agg_rate(g, pref + "pred_success")
-        gold_success = _agg_rate(g, pref + "gold_success")
-        ex = _agg_rate(g, pref + "ex")
-        ex_given_success = _agg_rate(g, pref + "ex_given_success")
-
-        exec_mean = _agg_mean(g, pref + "exec_time_s")
-        exec_median = _agg_median(g, pref + "exec_time_s")
-        exec_p95 = _agg_p95(g, pref + "exec_time_s")
-
-        gold_exec_mean = _agg_mean(g, pref + "gold_exec_time_s")
-
-        gen_mean = _agg_mean(g, "gen_time_s")
-        gen_median = _agg_median(g, "gen_time_s")
-        gen_p95 = _agg_p95(g, "gen_time_s")
-
-        prompt_chars_mean = _agg_mean(g, "prompt_chars") if "prompt_chars" in g.columns else float("nan")
-        tables_mean = _agg_mean(g, "schema_tables_included") if "schema_tables_included" in g.columns else float("nan")
-        cols_mean = _agg_mean(g, "schema_columns_included") if "schema_columns_included" in g.columns else float("nan")
-
-        out_rows.append({
-            "dataset": dataset,
-            "n": total,
+    grouped = _numeric_frame(df).groupby(df["dataset"].astype(object), dropna=False)
+    n = grouped.size()
+    mean = grouped.mean()
+    median = grouped.median()
+    p95 = grouped.quantile(0.95)
+    peak = grouped.max()
+
+    out = {}
+    for rdbms in RDBMS:
+        pref = f"{rdbms}_"
+        m = pd.DataFrame({
+            "n": n,
 
             # Metrics (aligning to the 9 we discussed)
-            "pred_exec_rate": pred_success,          # 1) Exec success rate
-            "gold_exec_rate": gold_success,          # 2) Gold runnable rate
-            "ex": ex,                                # 3) EX
-            "ex_given_success": ex_given_success,    # 4) EX | pred success
-
-            "pred_exec_time_mean_s": exec_mean,      # 5) Pred exec time
-            "pred_exec_time_median_s": exec_median,
-            "pred_exec_time_p95_s": exec_p95,
-
-            "gold_exec_time_mean_s": gold_exec_mean, # 6) Gold exec time
-
-            "gen_time_mean_s": gen_mean,             # 7) Generation time
-            "gen_time_median_s": gen_median,
-            "gen_time_p95_s": gen_p95,
-
-            "prompt_chars_mean": prompt_chars_mean,  # 8) Prompt size proxy
-            "schema_tables_mean": tables_mean,       # 9) Schema compactness proxies
-            "schema_cols_mean": cols_mean,
+            "pred_exec_rate": mean[pref + "pred_success"],           # 1) Exec success rate
+            "gold_exec_rate": mean[pref + "gold_success"],           # 2) Gold runnable rate
+            "ex": mean[pref + "ex"],                                 # 3) EX
+            "ex_given_success": mean[pref + "ex_given_success"],     # 4) EX | pred success
+
+            "pred_exec_time_mean_s": mean[pref + "pred_execution_time_s"],  # 5) Pred exec time
+            "pred_exec_time_median_s": median[pref + "pred_execution_time_s"],
+            "pred_exec_time_p95_s": p95[pref + "pred_execution_time_s"],
+
+            "gold_exec_time_mean_s": mean[pref + "gold_execution_time_s"],  # 6) Gold exec time
+
+            "gen_time_mean_s": mean["gen_time_s"],                   # 7) Generation time
+            "gen_time_median_s": median["gen_time_s"],
+            "gen_time_p95_s": p95["gen_time_s"],
+
+            "prompt_tokens_mean": mean["prompt_tokens"],             # 8) Prompt size
+            "schema_tables_mean": mean["schema_tables_included"],    # 9) Schema compactness proxies
+            "schema_cols_mean": mean["schema_columns_included"],
+
+            # Throughput / resources
+            "output_tokens_mean": mean["output_tokens"],
+            "tokens_per_s_median": median["tokens_per_s"],
+            "peak_rss_mb_max": peak["peak_rss_mb"],
+            "pred_rows_examined_median": median[pref + "pred_rows_examined"],
         })
+        m.index.name = "dataset"
+        out[rdbms] = m.sort_index()
+    return out
 
-    return pd.DataFrame(out_rows).set_index("dataset").sort_index()
+
+def compute_metrics_by_dataset(df: pd.DataFrame, rdbms: str) -> pd.DataFrame:
+    """
+    rdbms in {"mysql","mariadb"}.
+    Returns per-dataset aggregated metrics (one row per dataset).
+    """
+    assert rdbms in {"mysql", "mariadb"}
+    return compute_all_metrics(df)[rdbms]
 
 
 def compute_cross_rdbms_match_by_dataset(df: pd.DataFrame) -> pd.Series:
@@ -201,105 +200,352 @@ def compute_cross_rdbms_match_by_dataset(df: pd.DataFrame) -> pd.Series:
         return pd.Series(dtype=float)
 
     valid["mysql_vs_mariadb_match"] = valid["mysql_vs_mariadb_match"].astype(bool)
-    return valid.groupby("dataset")["mysql_vs_mariadb_match"].mean().sort_index()
+    return valid.groupby("dataset", observed=True)["mysql_vs_mariadb_match"].mean().sort_index()
+
+
+def compute_ex_by_complexity(df: pd.DataFrame) -> pd.DataFrame:
+    """EX rate per complexity bucket (rows: BUCKETS, columns: mysql_ex / mariadb_ex; empty bucket = 0)."""
+    flags = pd.DataFrame({f"{r}_ex": _as_bool_series(df, f"{r}_ex").astype(float) for r in RDBMS}, index=df.index)
+    buckets = df["complexity_bucket"].astype(object).fillna("")
+    return flags.groupby(buckets).mean().reindex(BUCKETS).fillna(0.0)
 
 
 # --------------------------
 # Plotting
 # --------------------------
+# Figures are described by plain dicts (picklable, hashable as JSON) and
+# rendered with the object-oriented Agg API, so worker processes never touch
+# pyplot's global state.
 
-def make_plots(df: pd.DataFrame, out_dir: Path, tag: str) -> None:
+def _values(series: pd.Series) -> list:
+    return [float(v) for v in series]
+
+def _bar_spec(series: pd.Series, title: str, ylabel: str, filename: str) -> dict:
+    series = series.sort_values(ascending=False)
+    return {
+        "kind": "bar", "filename": filename, "title": title, "ylabel": ylabel, "xlabel": "dataset",
+        "labels": [str(i) for i in series.index], "values": _values(series),
+    }
+
+def _bar_multi_spec(df: pd.DataFrame, title: str, ylabel: str, filename: str) -> dict:
     """
-    Creates plots for MySQL, MariaDB, and cross-RDBMS match (if present).
-    tag is used in filenames so multiple runs don't overwrite each other.
+    Expects df indexed by dataset and columns as categories (e.g. rdbms or complexity).
     """
-    _ensure_dir(out_dir)
+    df = df.sort_index()
+    return {
+        "kind": "bar_multi", "filename": filename, "title": title, "ylabel": ylabel, "xlabel": "dataset",
+        "labels": [str(i) for i in df.index], "series": {str(c): _values(df[c]) for c in df.columns},
+    }
+
+def _errors(values: pd.Series, low: pd.Series, high: pd.Series) -> list[list[float]]:
+    """[below, above] error bar offsets from a CI (NaN where there is none)."""
+    return [_values((values - low).clip(lower=0)), _values((high - values).clip(lower=0))]
 
-    # Per-RDBMS aggregated tables
-    mysql_m = compute_metrics_by_dataset(df, "mysql")
-    maria_m = compute_metrics_by_dataset(df, "mariadb")
+def _line_spec(series: pd.Series, title: str, ylabel: str, filename: str) -> dict:
+    return {
+        "kind": "line", "filename": filename, "title": title, "ylabel": ylabel, "xlabel": "complexity_bucket",
+        "labels": [str(i) for i in series.index], "values": _values(series),
+    }
+
+
+def figure_specs(df: pd.DataFrame, tag: str) -> list[dict]:
+    """
+    Specs of the plots for MySQL, MariaDB, and cross-RDBMS match (if present).
+    tag is used in filenames so multiple runs don't overwrite each other.
+    """
+    metrics = compute_all_metrics(df)
+    mysql_m, maria_m = metrics["mysql"], metrics["mariadb"]
+    specs = []
 
     # 1) Exec success rate
-    _bar_plot(mysql_m["pred_exec_rate"], f"MySQL: Exec success rate ({tag})", "rate", out_dir / f"{tag}__mysql__exec_success_rate.png")
-    _bar_plot(maria_m["pred_exec_rate"], f"MariaDB: Exec success rate ({tag})", "rate", out_dir / f"{tag}__mariadb__exec_success_rate.png")
+    specs.append(_bar_spec(mysql_m["pred_exec_rate"], f"MySQL: Exec success rate ({tag})", "rate", f"{tag}__mysql__exec_success_rate.png"))
+    specs.append(_bar_spec(maria_m["pred_exec_rate"], f"MariaDB: Exec success rate ({tag})", "rate", f"{tag}__mariadb__exec_success_rate.png"))
 
     # 2) Gold runnable rate
-    _bar_plot(mysql_m["gold_exec_rate"], f"MySQL: Gold runnable rate ({tag})", "rate", out_dir / f"{tag}__mysql__gold_runnable_rate.png")
-    _bar_plot(maria_m["gold_exec_rate"], f"MariaDB: Gold runnable rate ({tag})", "rate", out_dir / f"{tag}__mariadb__gold_runnable_rate.png")
+    specs.append(_bar_spec(mysql_m["gold_exec_rate"], f"MySQL: Gold runnable rate ({tag})", "rate", f"{tag}__mysql__gold_runnable_rate.png"))
+    specs.append(_bar_spec(maria_m["gold_exec_rate"], f"MariaDB: Gold runnable rate ({tag})", "rate", f"{tag}__mariadb__gold_runnable_rate.png"))
 
     # 3) EX
-    _bar_plot(mysql_m["ex"], f"MySQL: EX ({tag})", "rate", out_dir / f"{tag}__mysql__ex.png")
-    _bar_plot(maria_m["ex"], f"MariaDB: EX ({tag})", "rate", out_dir / f"{tag}__mariadb__ex.png")
+    specs.append(_bar_spec(mysql_m["ex"], f"MySQL: EX ({tag})", "rate", f"{tag}__mysql__ex.png"))
+    specs.append(_bar_spec(maria_m["ex"], f"MariaDB: EX ({tag})", "rate", f"{tag}__mariadb__ex.png"))
 
     # 4) EX | success
-    _bar_plot(mysql_m["ex_given_success"], f"MySQL: EX | pred success ({tag})", "rate", out_dir / f"{tag}__mysql__ex_given_success.png")
-    _bar_plot(maria_m["ex_given_success"], f"MariaDB: EX | pred success ({tag})", "rate", out_dir / f"{tag}__mariadb__ex_given_success.png")
+    specs.append(_bar_spec(mysql_m["ex_given_success"], f"MySQL: EX | pred success ({tag})", "rate", f"{tag}__mysql__ex_given_success.png"))
+    specs.append(_bar_spec(maria_m["ex_given_success"], f"MariaDB: EX | pred success ({tag})", "rate", f"{tag}__mariadb__ex_given_success.png"))
 
     # 5) Pred exec time (median)
-    _bar_plot(mysql_m["pred_exec_time_median_s"], f"MySQL: Pred exec time (median) ({tag})", "seconds", out_dir / f"{tag}__mysql__pred_exec_time_median_s.png")
-    _bar_plot(maria_m["pred_exec_time_median_s"], f"MariaDB: Pred exec time (median) ({tag})", "seconds", out_dir / f"{tag}__mariadb__pred_exec_time_median_s.png")
+    specs.append(_bar_spec(mysql_m["pred_exec_time_median_s"], f"MySQL: Pred exec time (median) ({tag})", "seconds", f"{tag}__mysql__pred_exec_time_median_s.png"))
+    specs.append(_bar_spec(maria_m["pred_exec_time_median_s"], f"MariaDB: Pred exec time (median) ({tag})", "seconds", f"{tag}__mariadb__pred_exec_time_median_s.png"))
 
     # 6) Gold exec time (mean)
-    _bar_plot(mysql_m["gold_exec_time_mean_s"], f"MySQL: Gold exec time (mean) ({tag})", "seconds", out_dir / f"{tag}__mysql__gold_exec_time_mean_s.png")
-    _bar_plot(maria_m["gold_exec_time_mean_s"], f"MariaDB: Gold exec time (mean) ({tag})", "seconds", out_dir / f"{tag}__mariadb__gold_exec_time_mean_s.png")
+    specs.append(_bar_spec(mysql_m["gold_exec_time_mean_s"], f"MySQL: Gold exec time (mean) ({tag})", "seconds", f"{tag}__mysql__gold_exec_time_mean_s.png"))
+    specs.append(_bar_spec(maria_m["gold_exec_time_mean_s"], f"MariaDB: Gold exec time (mean) ({tag})", "seconds", f"{tag}__mariadb__gold_exec_time_mean_s.png"))
 
     # 7) Generation time (median)
-    _bar_plot(mysql_m["gen_time_median_s"], f"MySQL run: Generation time (median) ({tag})", "seconds", out_dir / f"{tag}__gen_time_median_s.png")
+    specs.append(_bar_spec(mysql_m["gen_time_median_s"], f"MySQL run: Generation time (median) ({tag})", "seconds", f"{tag}__gen_time_median_s.png"))
     # (gen time is model-side; same for both, but we plot once.)
 
-    # 8) Prompt size (mean chars)
-    if "prompt_chars" in df.columns:
-        _bar_plot(mysql_m["prompt_chars_mean"], f"Prompt size mean (chars) ({tag})", "chars", out_dir / f"{tag}__prompt_chars_mean.png")
+    # 8) Prompt size (mean tokens)
+    if _has_values(df, "prompt_tokens"):
+        specs.append(_bar_spec(mysql_m["prompt_tokens_mean"], f"Prompt size mean (tokens) ({tag})", "tokens", f"{tag}__prompt_tokens_mean.png"))
 
     # 9) Schema compactness (mean #tables and #cols)
     compact_cols = []
-    if "schema_tables_included" in df.columns:
+    if _has_values(df, "schema_tables_included"):
         compact_cols.append("schema_tables_mean")
-    if "schema_columns_included" in df.columns:
+    if _has_values(df, "schema_columns_included"):
         compact_cols.append("schema_cols_mean")
 
     if compact_cols:
         # combine into a multi-bar plot using mysql_m (same prompt builder)
         compact_df = mysql_m[compact_cols].copy()
         compact_df.columns = ["mean_tables" if c == "schema_tables_mean" else "mean_columns" for c in compact_df.columns]
-        _bar_plot_multi(compact_df, f"Schema compactness ({tag})", "count", out_dir / f"{tag}__schema_compactness.png")
+        specs.append(_bar_multi_spec(compact_df, f"Schema compactness ({tag})", "count", f"{tag}__schema_compactness.png"))
+
+    # Generation throughput + memory (model-side)
+    if _has_values(df, "tokens_per_s"):
+        specs.append(_bar_spec(mysql_m["tokens_per_s_median"], f"Generation throughput (median) ({tag})", "output tokens / s", f"{tag}__tokens_per_s_median.png"))
+    if _has_values(df, "peak_rss_mb"):
+        specs.append(_bar_spec(mysql_m["peak_rss_mb_max"], f"Peak RSS of the runner ({tag})", "MB", f"{tag}__peak_rss_mb.png"))
+
+    # Rows examined by the predicted SQL (median)
+    for rdbms, label, m in (("mysql", "MySQL", mysql_m), ("mariadb", "MariaDB", maria_m)):
+        if _has_values(df, f"{rdbms}_pred_rows_examined"):
+            specs.append(_bar_spec(m["pred_rows_examined_median"], f"{label}: Pred rows examined (median) ({tag})", "rows", f"{tag}__{rdbms}__pred_rows_examined_median.png"))
 
     # Cross-RDBMS match rate (extra plot, only if present)
     match = compute_cross_rdbms_match_by_dataset(df)
     if not match.empty:
-        _bar_plot(match, f"MySQL vs MariaDB: result match rate ({tag})", "rate", out_dir / f"{tag}__mysql_vs_mariadb__match_rate.png")
+        specs.append(_bar_spec(match, f"MySQL vs MariaDB: result match rate ({tag})", "rate", f"{tag}__mysql_vs_mariadb__match_rate.png"))
 
     # Complexity-bucket plots (optional, if complexity_bucket exists)
     if "complexity_bucket" in df.columns:
         # show EX by complexity for mysql and mariadb
-        _line_plot_by_bucket(df, "mysql_ex", f"MySQL: EX by complexity ({tag})", "rate", out_dir / f"{tag}__mysql__ex_by_complexity.png")
-        _line_plot_by_bucket(df, "mariadb_ex", f"MariaDB: EX by complexity ({tag})", "rate", out_dir / f"{tag}__mariadb__ex_by_complexity.png")
+        by_bucket = compute_ex_by_complexity(df)
+        specs.append(_line_spec(by_bucket["mysql_ex"], f"MySQL: EX by complexity ({tag})", "rate", f"{tag}__mysql__ex_by_complexity.png"))
+        specs.append(_line_spec(by_bucket["mariadb_ex"], f"MariaDB: EX by complexity ({tag})", "rate", f"{tag}__mariadb__ex_by_complexity.png"))
+
+    return specs
+
+
+def comparison_specs(cube: pd.DataFrame, tag: str) -> list[dict]:
+    """
+    Grouped model comparison charts per dataset from a compare_runs cube:
+    EX per RDBMS, EX per complexity bucket, generation / execution latency
+    (mean with CI, p50, p90) and generation throughput, CI error bars where
+    the inputs have them.
+    """
+    specs = []
+    for dataset in cube.index.get_level_values("dataset").unique():
+        d = cube.xs(dataset, level="dataset")
+        overall = d.xs(ALL, level="complexity")
+        models = sorted(overall.index.get_level_values("model").unique())
+
+        def series(frame: pd.DataFrame, col: str) -> pd.Series:
+            return frame[col].reindex(models)
+
+        def multi(frames: dict, col: str, title: str, ylabel: str, filename: str, ci: bool = True) -> None:
+            frames = {name: f for name, f in frames.items() if f[col].notna().any()}
+            if not frames:
+                return
+            spec = {
+                "kind": "bar_multi", "filename": filename, "title": title, "ylabel": ylabel, "xlabel": "model",
+                "labels": models, "series": {name: _values(series(f, col)) for name, f in frames.items()},
+            }
+            if ci:
+                spec["errors"] = {
+                    name: _errors(series(f, col), series(f, f"{col}_ci_low"), series(f, f"{col}_ci_high"))
+                    for name, f in frames.items()
+                }
+            specs.append(spec)
+
+        engines = {r: overall.xs(r, level="rdbms") for r in overall.index.get_level_values("rdbms").unique()}
+        multi(engines, "ex", f"{dataset}: EX by model ({tag})", "rate", f"{tag}__{dataset}__ex_by_model.png")
+
+        for rdbms in engines:
+            by_bucket = d.xs(rdbms, level="rdbms")
+            buckets = {
+                str(b): by_bucket.xs(b, level="complexity")
+                for b in by_bucket.index.get_level_values("complexity").unique() if b != ALL
+            }
+            multi(
+                buckets, "ex", f"{dataset}: {rdbms} EX by complexity ({tag})", "rate",
+                f"{tag}__{dataset}__{rdbms}__ex_by_complexity_by_model.png",
+            )
+
+        # generation is model-side: one row per model (whichever engine comes first)
+        gen = overall.groupby(level="model").first()
+        specs.append({
+            "kind": "bar_multi", "filename": f"{tag}__{dataset}__gen_latency_by_model.png",
+            "title": f"{dataset}: Generation latency by model ({tag})", "ylabel": "seconds", "xlabel": "model",
+            "labels": models,
+            "series": {
+                "mean": _values(series(gen, "gen_time_mean_s")),
+                "p50": _values(series(gen, "gen_time_p50_s")),
+                "p90": _values(series(gen, "gen_time_p90_s")),
+            },
+            "errors": {"mean": _errors(
+                series(gen, "gen_time_mean_s"), series(gen, "gen_time_mean_s_ci_low"), series(gen, "gen_time_mean_s_ci_high"),
+            )},
+        })
+
+        multi(
+            engines, "exec_time_mean_s", f"{dataset}: Pred exec time (mean) by model ({tag})", "seconds",
+            f"{tag}__{dataset}__exec_latency_by_model.png",
+        )
+
+        qps = series(gen, "throughput_qps")
+        specs.append({
+            "kind": "bar", "filename": f"{tag}__{dataset}__throughput_by_model.png",
+            "title": f"{dataset}: Generation throughput by model ({tag})", "ylabel": "questions / s", "xlabel": "model",
+            "labels": models, "values": _values(qps),
+            "errors": _errors(qps, series(gen, "throughput_qps_ci_low"), series(gen, "throughput_qps_ci_high")),
+        })
+    return specs
+
+
+def spec_hash(spec: dict, dpi: int) -> str:
+    """Hash of everything a figure is drawn from (data, labels, dpi, renderer version)."""
+    data = json.dumps({"spec": spec, "dpi": dpi, "version": RENDER_VERSION}, sort_keys=True)
+    return hashlib.sha256(data.encode("utf-8")).hexdigest()
+
+
+def render_figure(spec: dict, out_dir: str, dpi: int = 200) -> str:
+    """Draw one figure spec to out_dir/<filename> (no pyplot); returns the filename."""
+    fig = Figure()
+    FigureCanvasAgg(fig)
+    ax = fig.add_subplot()
+    labels = spec.get("labels", [])
+    x = list(range(len(labels)))
+
+    # optional error bars: [below, above] offsets per bar (NaN = none)
+    errors = spec.get("errors")
+    if spec["kind"] == "bar":
+        ax.bar(x, spec["values"], width=0.5, yerr=errors, capsize=3 if errors else 0)
+    elif spec["kind"] == "bar_multi":
+        series = spec["series"]
+        width = (0.8 if errors is not None else 0.5) / max(1, len(series))
+        for k, (name, values) in enumerate(series.items()):
+            offset = (k - (len(series) - 1) / 2) * width
+            yerr = errors.get(name) if errors else None
+            ax.bar([i + offset for i in x], values, width=width, label=name, yerr=yerr, capsize=3 if yerr else 0)
+        ax.legend()
+    elif spec["kind"] == "line":
+        ax.plot(labels, spec["values"], marker="o")
+    elif spec["kind"] == "hist":
+        # pre-binned counts over log-spaced edges, with labelled vertical markers (e.g. percentiles)
+        ax.stairs(spec["counts"], spec["edges"], fill=True, alpha=0.6)
+        ax.set_xscale("log")
+        ax.xaxis.set_minor_formatter(NullFormatter())
+        colors = ["C1", "C2", "C3", "C4", "C5", "C6"]
+        for k, (name, value) in enumerate(spec.get("markers", {}).items()):
+            if value is not None:
+                ax.axvline(value, color=colors[k % len(colors)], linestyle="--", linewidth=1, label=f"{name} = {value:.3g}")
+        if spec.get("markers"):
+            ax.legend(fontsize="small")
+    else:
+        raise ValueError(f"Unknown figure kind: {spec['kind']}")
+
+    if spec["kind"] in ("bar", "bar_multi"):
+        ax.set_xticks(x, labels, rotation=90)
+    if spec.get("logy"):
+        ax.set_yscale("log")
+    ax.set_title(spec["title"])
+    ax.set_ylabel(spec["ylabel"])
+    ax.set_xlabel(spec["xlabel"])
+    fig.tight_layout()
+    fig.savefig(Path(out_dir) / spec["filename"], dpi=dpi)
+    return spec["filename"]
+
+
+def _load_cache(out_dir: Path) -> dict:
+    try:
+        return json.loads((out_dir / CACHE_FILE).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+
+
+def render_figures(specs: list[dict], out_dir: Path, jobs: int = 0, dpi: int = 200, force: bool = False) -> dict:
+    """
+    Render the specs whose hash changed since the last run (or whose PNG is
+    missing), over a process pool of `jobs` workers (0 = CPU count).
+    Returns {"rendered": n, "skipped": n}.
+    """
+    _ensure_dir(out_dir)
+    cache = _load_cache(out_dir)
+    todo = []
+    for spec in specs:
+        h = spec_hash(spec, dpi)
+        if not force and cache.get(spec["filename"]) == h and (out_dir / spec["filename"]).exists():
+            continue
+        todo.append((spec, h))
+
+    jobs = jobs or os.cpu_count() or 1
+    if len(todo) > 1 and jobs > 1:
+        with ProcessPoolExecutor(max_workers=min(jobs, len(todo))) as pool:
+            futures = [pool.submit(render_figure, spec, str(out_dir), dpi) for spec, _ in todo]
+            for f in futures:
+                f.result()
+    else:
+        for spec, _ in todo:
+            render_figure(spec, str(out_dir), dpi)
+
+    for spec, h in todo:
+        cache[spec["filename"]] = h
+    if todo:
+        (out_dir / CACHE_FILE).write_text(json.dumps(cache, indent=2, sort_keys=True), encoding="utf-8")
+    return {"rendered": len(todo), "skipped": len(specs) - len(todo)}
+
+
+def make_plots(df: pd.DataFrame, out_dir: Path, tag: str, jobs: int = 0, force: bool = False) -> dict:
+    """
+    Creates plots for MySQL, MariaDB, and cross-RDBMS match (if present).
+    tag is used in filenames so multiple runs don't overwrite each other.
+    Figures whose data did not change since the last run are not redrawn.
+    """
+    return render_figures(figure_specs(df, tag), out_dir, jobs=jobs, force=force)
 
 
 def main() -> int:
     parser = argparse.ArgumentParser()
-    parser.add_argument("--csv", type=str, required=True, help="Path to metrics CSV (from jsonl->csv).")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--csv", type=str, help="Path to metrics CSV or .parquet (from jsonl->csv).")
+    source.add_argument(
+        "--compare",
+        type=str,
+        help="Glob of summary / metrics CSV or .parquet files of several runs: model comparison charts.",
+    )
     parser.add_argument("--out_dir", type=str, default="docs/figures", help="Output directory for plots.")
     parser.add_argument(
         "--tag",
         type=str,
         default=None,
-        help="Filename tag (default: basename of CSV without extension).",
+        help="Filename tag (default: basename of CSV without extension; 'compare' with --compare).",
     )
+    parser.add_argument("--jobs", type=int, default=0, help="Worker processes for rendering (0 = CPU count).")
+    parser.add_argument("--force", action="store_true", help="Redraw all figures, even unchanged ones.")
+    parser.add_argument("--n_boot", type=int, default=2000, help="Bootstrap resamples for per-question files in --compare.")
     args = parser.parse_args()
 
+    if args.compare:
+        return _run_compare(args)
+
     csv_path = Path(args.csv)
     if not csv_path.exists():
-        print(f"❌ CSV not found: {csv_path}")
+        print(f"❌ Metrics file not found: {csv_path}")
         return 1
 
     out_dir = Path(args.out_dir)
     tag = args.tag or csv_path.stem
 
-    df = pd.read_csv(csv_path)
+    try:
+        df = read_metrics(csv_path, columns=PLOT_COLUMNS)
+    except RuntimeError as e:
+        print(f"❌ {e}")
+        return 1
 
     if "dataset" not in df.columns:
-        print("❌ CSV must contain a 'dataset' column.")
+        print("❌ Metrics file must contain a 'dataset' column.")
         return 1
 
     # Normalize types for safety
@@ -310,9 +556,38 @@ def main() -> int:
         if col in df.columns:
             df[col] = df[col].fillna(False).astype(bool)
 
-    make_plots(df, out_dir=out_dir, tag=tag)
+    stats = make_plots(df, out_dir=out_dir, tag=tag, jobs=args.jobs, force=args.force)
+
+    print(f"✅ Plots saved to: {out_dir.resolve()} ({stats['rendered']} rendered, {stats['skipped']} unchanged)")
+    return 0
+
+
+def _run_compare(args) -> int:
+    paths = sorted(p for p in glob.glob(args.compare) if Path(p).suffix in (".csv", ".parquet"))
+    if not paths:
+        print(f"❌ No .csv / .parquet files match: {args.compare}")
+        return 1
+
+    out_dir = Path(args.out_dir)
+    tag = args.tag or "compare"
+    print(f"🔄 Loading {len(paths)} files...")
+    try:
+        cube = load_cube(paths, jobs=args.jobs, n_boot=args.n_boot)
+    except RuntimeError as e:
+        print(f"❌ {e}")
+        return 1
+    if cube.empty:
+        print("❌ No summary rows in the matched files.")
+        return 1
+
+    _ensure_dir(out_dir)
+    cube_path = out_dir / f"{tag}__cube.csv"
+    cube.to_csv(cube_path)
+    models = cube.index.get_level_values("model").unique()
+    print(f"📊 Cube: {len(models)} models, {len(cube)} cells -> {cube_path}")
 
-    print(f"✅ Plots saved to: {out_dir.resolve()}")
+    stats = render_figures(comparison_specs(cube, tag), out_dir, jobs=args.jobs, force=args.force)
+    print(f"✅ Plots saved to: {out_dir.resolve()} ({stats['rendered']} rendered, {stats['skipped']} unchanged)")
     return 0
 
 
@@ -0,0 +1,135 @@
+"""
+scripts/quantile_sketch.py
+
+KLL quantile sketch (Karnin, Lang, Liberty 2016): bounded-memory, mergeable
+quantiles for streaming metric aggregation.
+
+Items are kept in levels ("compactors"); an item at level h stands for 2**h
+original values. When the sketch is full, the lowest full level is sorted
+and every other item (random offset) moves up a level. Rank error is about
+1.7 / k with high probability; memory is O(k) items whatever the stream
+length.
+
+Until the first compaction (fewer than k values) the sketch is exact, so small
+runs give the same nearest-rank quantiles as sorting the data.
+
+Usage:
+    s = KLLSketch()
+    for x in values:
+        s.update(x)
+    s.quantile(0.9)
+    s.merge(other_sketch)        # e.g. per-shard sketches
+    KLLSketch.from_dict(s.to_dict())  # JSON-serializable state
+"""
+
+import math
+import random
+
+
+class KLLSketch:
+    """
+    Args:
+        k: accuracy/memory parameter (top level capacity)
+        seed: compaction coin seed (deterministic output)
+    """
+
+    def __init__(self, k: int = 1024, seed: int = 0):
+        self.k = k
+        self.count = 0
+        self.min: float | None = None
+        self.max: float | None = None
+        self._rng = random.Random(seed)
+        self._levels: list[list[float]] = [[]]
+        self._size = 0
+        self._max_size = self._capacity(0)
+
+    def _capacity(self, level: int) -> int:
+        depth = len(self._levels) - level - 1
+        return max(2, int(math.ceil(self.k * (2 / 3) ** depth)))
+
+    def _grow(self) -> None:
+        self._levels.append([])
+        self._max_size = sum(self._capacity(h) for h in range(len(self._levels)))
+
+    def update(self, x: float) -> None:
+        x = float(x)
+        self.count += 1
+        self.min = x if self.min is None or x < self.min else self.min
+        self.max = x if self.max is None or x > self.max else self.max
+        self._levels[0].append(x)
+        self._size += 1
+        if self._size >= self._max_size:
+            self._compress()
+
+    def _compress(self) -> None:
+        for h in range(len(self._levels)):
+            if len(self._levels[h]) >= self._capacity(h):
+                if h + 1 >= len(self._levels):
+                    self._grow()
+                items = sorted(self._levels[h])
+                # odd item out stays at this level
+                keep = [items.pop()] if len(items) % 2 else []
+                offset = self._rng.randint(0, 1)
+                promoted = items[offset::2]
+                self._levels[h] = keep
+                self._levels[h + 1].extend(promoted)
+                self._size += len(promoted) - len(items)
+                if self._size < self._max_size:
+                    break
+
+    def merge(self, other: "KLLSketch") -> None:
+        """Add another sketch's values to this one."""
+        if other.count == 0:
+            return
+        while len(self._levels) < len(other._levels):
+            self._grow()
+        for h, items in enumerate(other._levels):
+            self._levels[h].extend(items)
+        self._size = sum(len(items) for items in self._levels)
+        self.count += other.count
+        self.min = other.min if self.min is None or other.min < self.min else self.min
+        self.max = other.max if self.max is None or other.max > self.max else self.max
+        while self._size >= self._max_size:
+            self._compress()
+
+    def to_dict(self) -> dict:
+        version, state, gauss = self._rng.getstate()
+        return {
+            "k": self.k,
+            "count": self.count,
+            "min": self.min,
+            "max": self.max,
+            "levels": self._levels,
+            "rng": [version, list(state), gauss],
+        }
+
+    @classmethod
+    def from_dict(cls, d: dict) -> "KLLSketch":
+        s = cls(k=d["k"])
+        s.count = d["count"]
+        s.min = d["min"]
+        s.max = d["max"]
+        s._levels = [list(items) for items in d["levels"]]
+        s._size = sum(len(items) for items in s._levels)
+        s._max_size = sum(s._capacity(h) for h in range(len(s._levels)))
+        version, state, gauss = d["rng"]
+        s._rng.setstate((version, tuple(state), gauss))
+        return s
+
+    def quantile(self, q: float) -> float | None:
+        """Nearest-rank quantile (same convention as the exact summary helper)."""
+        if self.count == 0:
+            return None
+        if q <= 0:
+            return self.min
+        if q >= 1:
+            return self.max
+        weighted = sorted((x, 1 << h) for h, items in enumerate(self._levels) for x in items)
+        total = sum(w for _, w in weighted)
+        target = max(1, int(math.ceil(q * total)))
+        cum = 0
+        for x, w in weighted:
+            cum += w
+            if cum >= target:
+                return x
+        return weighted[-1][0]
@@ -0,0 +1,89 @@
+"""
+scripts/repair.py
+
+Execution-feedback repair for the baseline runner (--repair K).
+
+When the predicted SQL fails on the primary RDBMS, the DB worker does not
+score the question yet: it queues a repair request and hands the writer a
+Future instead of the record. The model thread picks the requests up between
+batches (or whenever it waits on the pipeline), regenerates with the failed
+SQL and the DB error appended to the question (models/base.py
+build_repair_question, same schema prefix) and sends the new SQL back to the
+DB pool. This repeats up to K times; other questions keep flowing meanwhile.
+
+Per question the record gets:
+
+    repair_attempts    retries used (0 = first SQL executed fine)
+    repair_history     [{pred_sql, error}] of every failed attempt
+    repair_tokens      extra prompt + output tokens of the retries
+    repair_gen_time_s  extra generation time of the retries
+    repair_latency_s   time from the first failure to the final result
+"""
+
+import threading
+import time
+from concurrent.futures import Future
+
+
+def primary_exec(record: dict) -> dict | None:
+    """Predicted-SQL execution result on the primary RDBMS of the record."""
+    return record["mariadb"] if record.get("rdbms_mode") == "mariadb" else record["mysql"]
+
+
+def new_state(gen_time: float) -> dict:
+    """Repair bookkeeping of one question, carried from attempt to attempt."""
+    return {"gen_time": gen_time, "attempts": 0, "history": [], "tokens": 0, "repair_gen_time": 0.0, "t0": None}
+
+
+def finish_record(record: dict, state: dict) -> dict:
+    """Add the repair fields to the final record of a question."""
+    record["repair_attempts"] = state["attempts"]
+    record["repair_history"] = state["history"]
+    record["repair_tokens"] = state["tokens"]
+    record["repair_gen_time_s"] = round(state["repair_gen_time"], 4)
+    record["repair_latency_s"] = round(time.time() - state["t0"], 4) if state["t0"] is not None else 0.0
+    return record
+
+
+class RepairScheduler:
+    """
+    Args:
+        max_attempts: retries per question (K)
+    """
+
+    def __init__(self, max_attempts: int):
+        self.max_attempts = max_attempts
+        self._queue: list[tuple[str, dict, dict, Future]] = []
+        self._lock = threading.Lock()
+
+    def needs_repair(self, record: dict, state: dict) -> bool:
+        res = primary_exec(record)
+        return res is not None and not res.get("success") and state["attempts"] < self.max_attempts
+
+    def schedule(self, model: str, q: dict, record: dict, state: dict) -> Future:
+        """Queue a retry for a failed record (DB worker thread); the Future resolves to the next attempt."""
+        if state["t0"] is None:
+            state["t0"] = time.time()
+        res = primary_exec(record) or {}
+        state["history"].append({"pred_sql": record["pred_sql"], "error": res.get("error")})
+        future = Future()
+        with self._lock:
+            self._queue.append((model, q, state, future))
+        return future
+
+    def pending(self) -> int:
+        with self._lock:
+            return len(self._queue)
+
+    def take(self, models: list[str] | None = None) -> dict[str, list[tuple[dict, dict, Future]]]:
+        """Remove and return queued requests ({model: [(q, state, future)]}), only for `models` if given."""
+        out: dict[str, list] = {}
+        with self._lock:
+            keep = []
+            for model, q, state, future in self._queue:
+                if models is None or model in models:
+                    out.setdefault(model, []).append((q, state, future))
+                else:
+                    keep.append((model, q, state, future))
+            self._queue = keep
+        return out
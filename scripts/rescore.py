@@ -0,0 +1,274 @@
+"""
+scripts/rescore.py
+
+Offline re-scoring of an existing baseline results JSONL, without the model.
+
+Records store the raw prediction (pred_sql_raw) and the gold SQL
+(gold_sql_exec). Re-scoring streams the file and, per record, re-runs only:
+
+  - normalize_pred_sql on pred_sql_raw (older files, e.g. of the Qwen runner,
+    have no pred_sql_raw: their stored, already normalized pred_sql is
+    re-normalized instead, so only comparison / gold changes apply to them)
+  - (with --dataset) fill_gold_sql on the dataset entry, to pick up gold fixes
+  - pred + gold execution and compare_results
+
+on a pool of --db_workers threads (scripts/eval_pipeline.py, output in input
+order). Generation fields (raw output, timings, tokens, spec/cache stats) are
+kept as they are, so changes to normalization / comparison logic only cost DB
+time.
+
+Provenance: the output gets a manifest (source file + hash, hash of the
+evaluation code, time) and every record gets a "rescore" entry with the
+previous prediction/EX values and the field the prediction was taken from
+("pred_source"), so before/after can be compared per question.
+
+Usage:
+  python scripts/rescore.py --input results/gpt2xl_baseline_advising_mysql.jsonl \
+      --out results/gpt2xl_baseline_advising_mysql.rescored.jsonl --db_workers 8
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+# Add project root to path for imports
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from database.db_manager import DatabaseManager
+from scripts.checkpoint import CheckpointWriter, file_sha256, read_manifest, write_manifest
+from scripts.dataset_utils import iter_sentences, load_dataset
+from scripts.eval_pipeline import EvalPipeline
+from scripts.paired_stats import primary_ex
+from scripts.results_io import BlobWriter, iter_records
+from scripts.sql_utils import (
+    compare_results,
+    fill_gold_sql,
+    normalize_pred_sql,
+    pack_exec_result,
+    result_fingerprint,
+    results_match,
+)
+
+# code whose changes a re-score is meant to pick up
+EVAL_CODE = [Path(__file__).resolve().parent / "sql_utils.py"]
+
+
+def _execute(db, sql: str) -> dict | None:
+    if db is None:
+        return None
+    res = db.execute_query(sql)
+    if res.get("success"):
+        res["fingerprint"] = result_fingerprint(res.get("result"))
+    return res
+
+
+def rescore_record(record: dict, schema_tables: list[str], gold_sql_exec: str, mysql_db, maria_db) -> dict:
+    """
+    Re-normalize, re-execute and re-compare one record; return the updated record.
+    Runs on a DB worker thread.
+    """
+    pred_source = "pred_sql_raw" if record.get("pred_sql_raw") is not None else "pred_sql"
+    pred_sql = normalize_pred_sql(record.get(pred_source) or "", schema_tables)
+
+    mysql_pred = _execute(mysql_db, pred_sql)
+    maria_pred = _execute(maria_db, pred_sql)
+    mysql_gold = _execute(mysql_db, gold_sql_exec)
+    maria_gold = _execute(maria_db, gold_sql_exec)
+
+    match = None
+    if mysql_pred is not None and maria_pred is not None:
+        if mysql_pred.get("success") and maria_pred.get("success"):
+            if mysql_pred.get("result") is not None and maria_pred.get("result") is not None:
+                match = compare_results(mysql_pred["result"], maria_pred["result"])
+
+    previous = {
+        "pred_sql": record.get("pred_sql"),
+        "gold_sql_exec": record.get("gold_sql_exec"),
+        "mysql_pred_vs_gold_match": record.get("mysql_pred_vs_gold_match"),
+        "mariadb_pred_vs_gold_match": record.get("mariadb_pred_vs_gold_match"),
+    }
+    return {
+        **record,
+        "gold_sql_exec": gold_sql_exec,
+        "pred_sql": pred_sql,
+        "mysql": pack_exec_result(mysql_pred),
+        "mariadb": pack_exec_result(maria_pred),
+        "mysql_gold": pack_exec_result(mysql_gold),
+        "mariadb_gold": pack_exec_result(maria_gold),
+        "mysql_pred_vs_gold_match": results_match(mysql_pred, mysql_gold),
+        "mariadb_pred_vs_gold_match": results_match(maria_pred, maria_gold),
+        "mysql_vs_mariadb_match": match,
+        "rescore": {
+            "previous": previous,
+            "previous_ex": primary_ex({**record, **previous}),
+            "pred_source": pred_source,
+        },
+    }
+
+
+def _default_out(in_path: Path) -> Path:
+    return in_path.with_name(f"{in_path.stem}.rescored{in_path.suffix}")
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--input",
+        type=str,
+        required=True,
+        help="Results JSONL written by run_baseline.py.",
+    )
+    parser.add_argument(
+        "--out",
+        type=str,
+        default="",
+        help="Output JSONL (default: <input>.rescored.jsonl).",
+    )
+    parser.add_argument(
+        "--rdbms",
+        type=str,
+        default="",
+        choices=["", "mysql", "mariadb", "both"],
+        help="RDBMS to execute on (default: the rdbms_mode of the records).",
+    )
+    parser.add_argument(
+        "--dataset",
+        type=str,
+        default="",
+        help="Dataset JSON; if given, gold SQL is re-filled with fill_gold_sql instead of taken from the records.",
+    )
+    parser.add_argument(
+        "--db_workers",
+        type=int,
+        default=4,
+        help="DB worker threads for execution.",
+    )
+    parser.add_argument(
+        "--max_pending",
+        type=int,
+        default=64,
+        help="Max records read ahead of the writer.",
+    )
+    parser.add_argument(
+        "--quiet",
+        action="store_true",
+        help="Only print records whose EX changed.",
+    )
+    args = parser.parse_args(argv)
+
+    in_path = Path(args.input)
+    if not in_path.exists():
+        print(f"❌ Input not found: {in_path}")
+        return 1
+    out_path = Path(args.out) if args.out else _default_out(in_path)
+    if out_path.resolve() == in_path.resolve():
+        print("❌ --out must differ from --input")
+        return 1
+
+    first = next(iter_records(in_path), None)
+    if first is None:
+        print(f"❌ No records in: {in_path}")
+        return 1
+    dataset_name = first["dataset"]
+    rdbms = args.rdbms or first.get("rdbms_mode") or "mysql"
+
+    entries = None
+    if args.dataset:
+        dataset_path = Path(args.dataset)
+        if not dataset_path.exists():
+            print(f"❌ Dataset not found: {dataset_path}")
+            return 1
+        entries = load_dataset(dataset_path)
+
+    source_manifest = read_manifest(in_path) or {}
+    manifest = {
+        **source_manifest,
+        "rescored_from": str(in_path),
+        "source_sha256": file_sha256(in_path),
+        "eval_code_sha256": {p.name: file_sha256(p) for p in EVAL_CODE},
+        "rescore_rdbms": rdbms,
+        "gold_refilled_from": args.dataset or None,
+        "rescored_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+
+    print("🔁 Offline re-scoring")
+    print("=" * 70)
+    print(f"Input: {in_path}")
+    print(f"Output: {out_path}")
+    print(f"Dataset name (DB): {dataset_name}")
+    print(f"RDBMS: {rdbms}")
+    print(f"Gold SQL: {'re-filled from ' + args.dataset if entries is not None else 'from records'}")
+    print(f"DB workers: {args.db_workers} (max pending: {args.max_pending})")
+    print("=" * 70)
+
+    schema_helper = DatabaseManager("mysql", dataset_name)
+    schema_tables = schema_helper.get_table_names()
+    schema_helper.close()
+
+    mysql_db = DatabaseManager("mysql", dataset_name) if rdbms in ("mysql", "both") else None
+    maria_db = DatabaseManager("mariadb", dataset_name) if rdbms in ("mariadb", "both") else None
+
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    write_manifest(out_path, manifest)
+    writer = CheckpointWriter(out_path, append=False, blobs=BlobWriter(out_path, append=False))
+    counts = {"n": 0, "ex_before": 0, "ex_after": 0, "gained": 0, "lost": 0, "pred_changed": 0, "from_pred_sql": 0}
+
+    # per-record provenance (the manifest has the full hashes)
+    provenance = {
+        "source_sha256": manifest["source_sha256"][:16],
+        "eval_code_sha256": {name: h[:16] for name, h in manifest["eval_code_sha256"].items()},
+        "rescored_at": manifest["rescored_at"],
+    }
+
+    def on_record(_stream: str, record: dict) -> None:
+        record["rescore"].update(provenance)
+        writer.write(record)
+        before = record["rescore"]["previous_ex"]
+        after = primary_ex(record)
+        counts["n"] += 1
+        counts["ex_before"] += before
+        counts["ex_after"] += after
+        counts["gained"] += after and not before
+        counts["lost"] += before and not after
+        counts["pred_changed"] += record["pred_sql"] != record["rescore"]["previous"]["pred_sql"]
+        counts["from_pred_sql"] += record["rescore"]["pred_source"] == "pred_sql"
+        if before != after or not args.quiet:
+            flip = "" if before == after else (" (gained)" if after else " (lost)")
+            print(f"[{record['id']}] {record.get('model', '-')} EX {'✔' if before else '✘'} -> {'✔' if after else '✘'}{flip}")
+
+    t_start = time.time()
+    pipeline = EvalPipeline(rescore_record, on_record, db_workers=args.db_workers, max_pending=args.max_pending)
+    try:
+        for record in iter_records(in_path):
+            gold_sql_exec = record.get("gold_sql_exec") or ""
+            if entries is not None:
+                entry = entries[record["entry_idx"]]
+                gold_sql_exec = fill_gold_sql(entry, list(iter_sentences(entry))[record["sentence_idx"]])
+            pipeline.submit("rescore", record, schema_tables, gold_sql_exec, mysql_db, maria_db)
+    finally:
+        pipeline.close()
+        writer.close()
+        if mysql_db is not None:
+            mysql_db.close()
+        if maria_db is not None:
+            maria_db.close()
+
+    n = counts["n"]
+    print("\n" + "=" * 70)
+    print("📊 Summary")
+    print("=" * 70)
+    print(f"Records: {n} | normalized SQL changed: {counts['pred_changed']}")
+    if n:
+        print(f"EX before: {counts['ex_before']}/{n} ({counts['ex_before']/n*100:.1f}%)")
+        print(f"EX after:  {counts['ex_after']}/{n} ({counts['ex_after']/n*100:.1f}%)")
+        print(f"Gained: {counts['gained']} | lost: {counts['lost']}")
+    if counts["from_pred_sql"]:
+        print(f"⚠️  {counts['from_pred_sql']} record(s) have no pred_sql_raw; re-scored from the stored pred_sql")
+    print(f"⏱️  Wall: {time.time() - t_start:.1f}s")
+    print(f"✅ Wrote re-scored results to: {out_path}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,207 @@
+"""
+scripts/results_io.py
+
+Side table for the large fields that repeat across result records.
+
+Every baseline record used to embed the compact schema (identical for the
+whole dataset) and the gold SQL templates of its entry (shared by all of the
+entry's sentences); together with gold_sql_first (= the first template) that
+was most of a results JSONL. Records are now written with references:
+
+    schema_compact     -> schema_ref
+    gold_sql_variants  -> gold_sql_variants_ref     (gold_sql_first dropped)
+
+and each distinct value is stored once in <out>.blobs.jsonl, keyed by its
+content hash:
+
+    {"ref": "3f0c9a1e5b7d2c44", "field": "schema_compact", "value": "AREA(course_id, area)\\n..."}
+
+The blob line is flushed before any record referencing it, and fsynced before
+the records file is, so a crash never leaves a record with a missing blob.
+
+Readers use iter_records() / resolve_record(), which restore the original
+fields; records without references (older files) pass through unchanged.
+
+Usage:
+    writer = CheckpointWriter(out_path, append=False, blobs=BlobWriter(out_path, append=False))
+    for record in iter_records(out_path):
+        ...
+
+  Repack an older results file (inline fields) into the side-table format:
+    python scripts/results_io.py --input results/gpt2xl_baseline_advising_mysql.jsonl \
+        --out results/gpt2xl_baseline_advising_mysql.packed.jsonl
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+from pathlib import Path
+
+# record field -> reference field
+BLOB_FIELDS = {
+    "schema_compact": "schema_ref",
+    "gold_sql_variants": "gold_sql_variants_ref",
+}
+
+
+def blobs_path(out_path: Path) -> Path:
+    return out_path.with_name(out_path.name + ".blobs.jsonl")
+
+
+def is_side_table(path) -> bool:
+    """True for <out>.blobs.jsonl files (so result-file globs can skip them)."""
+    return str(path).endswith(".blobs.jsonl")
+
+
+def content_ref(value) -> str:
+    """Content hash of a JSON value (16 hex chars of SHA-256)."""
+    data = json.dumps(value, sort_keys=True, ensure_ascii=False).encode("utf-8")
+    return hashlib.sha256(data).hexdigest()[:16]
+
+
+def load_blobs(out_path: Path) -> dict:
+    """{ref: value} of the side table of a results file ({} if there is none)."""
+    path = blobs_path(out_path)
+    blobs = {}
+    if not path.exists():
+        return blobs
+    with path.open("r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                blob = json.loads(line)
+            except json.JSONDecodeError:
+                # torn last line: its records were never written
+                break
+            blobs[blob["ref"]] = blob["value"]
+    return blobs
+
+
+def resolve_record(record: dict, blobs: dict) -> dict:
+    """Record with the referenced fields restored (same dict if it has no references)."""
+    if not any(ref in record for ref in BLOB_FIELDS.values()):
+        return record
+    record = dict(record)
+    for field, ref_field in BLOB_FIELDS.items():
+        ref = record.pop(ref_field, None)
+        if ref is not None:
+            if ref not in blobs:
+                raise KeyError(f"Blob {ref} ({field}) missing from the side table.")
+            record[field] = blobs[ref]
+    if "gold_sql_variants" in record and "gold_sql_first" not in record:
+        variants = record["gold_sql_variants"]
+        record["gold_sql_first"] = variants[0] if variants else ""
+    return record
+
+
+def iter_records(path: Path, resolve: bool = True):
+    """Records of a results JSONL, with side-table fields restored."""
+    blobs = load_blobs(path) if resolve else {}
+    with path.open("r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                record = json.loads(line)
+                yield resolve_record(record, blobs) if resolve else record
+
+
+class BlobWriter:
+    """
+    Writes new blobs to <out>.blobs.jsonl and replaces them by references in
+    records (pack). With append, blobs already in the file are not rewritten.
+    """
+
+    def __init__(self, out_path: Path, append: bool):
+        self.path = blobs_path(out_path)
+        self._known = set(load_blobs(out_path)) if append else set()
+        if append and self.path.exists():
+            self._drop_torn_tail()
+        self._f = self.path.open("a" if append else "w", encoding="utf-8")
+
+    def _drop_torn_tail(self) -> None:
+        data = self.path.read_bytes()
+        end = data.rfind(b"\n") + 1
+        if end < len(data):
+            with self.path.open("r+b") as f:
+                f.truncate(end)
+
+    def _ref(self, field: str, value) -> str:
+        ref = content_ref(value)
+        if ref not in self._known:
+            self._f.write(json.dumps({"ref": ref, "field": field, "value": value}, ensure_ascii=False) + "\n")
+            # before the record that references it
+            self._f.flush()
+            self._known.add(ref)
+        return ref
+
+    def pack(self, record: dict) -> dict:
+        """Record with the BLOB_FIELDS replaced by references (gold_sql_first dropped)."""
+        if not any(field in record for field in BLOB_FIELDS):
+            return record
+        packed = {}
+        for key, value in record.items():
+            if key in BLOB_FIELDS:
+                packed[BLOB_FIELDS[key]] = self._ref(key, value)
+            elif key == "gold_sql_first" and "gold_sql_variants" in record:
+                continue
+            else:
+                packed[key] = value
+        return packed
+
+    def sync(self) -> None:
+        self._f.flush()
+        os.fsync(self._f.fileno())
+
+    def close(self) -> None:
+        if self._f.closed:
+            return
+        self.sync()
+        self._f.close()
+
+
+def repack(in_path: Path, out_path: Path) -> int:
+    """Rewrite a results file (inline or packed) in the side-table format; returns the record count."""
+    # local import: checkpoint's writer takes a BlobWriter from this module
+    from scripts.checkpoint import CheckpointWriter, read_manifest, write_manifest
+
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    manifest = read_manifest(in_path)
+    if manifest is not None:
+        write_manifest(out_path, manifest)
+    writer = CheckpointWriter(out_path, append=False, fsync_every=1024, blobs=BlobWriter(out_path, append=False))
+    n = 0
+    try:
+        for record in iter_records(in_path):
+            writer.write(record)
+            n += 1
+    finally:
+        writer.close()
+    return n
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--input", type=str, required=True, help="Results JSONL to repack.")
+    parser.add_argument("--out", type=str, required=True, help="Output JSONL (gets <out>.blobs.jsonl next to it).")
+    args = parser.parse_args()
+
+    in_path, out_path = Path(args.input), Path(args.out)
+    if not in_path.exists():
+        print(f"❌ Input not found: {in_path}")
+        return 1
+    if out_path.resolve() == in_path.resolve():
+        print("❌ --out must differ from --input")
+        return 1
+
+    n = repack(in_path, out_path)
+    size_in = in_path.stat().st_size
+    size_out = out_path.stat().st_size + blobs_path(out_path).stat().st_size
+    print(f"✅ Repacked {n} records: {size_in / 1e6:.2f} MB -> {size_out / 1e6:.2f} MB ({out_path})")
+    return 0
+
+
+if __name__ == "__main__":
+    # Add project root to path for imports
+    sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+    raise SystemExit(main())
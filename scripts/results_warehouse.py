@@ -0,0 +1,330 @@
+"""
+scripts/results_warehouse.py
+
+Local SQLite warehouse of baseline results, for cross-run comparisons
+without re-loading every JSONL.
+
+Fed by the converter (jsonl_to_csv_metrics.py --warehouse results/warehouse.sqlite),
+one run per results file:
+
+    runs         run_id, label (file stem), source, source_sha256, model, model_id,
+                 dataset, rdbms_mode, loaded_at
+    questions    question_pk, dataset, question_id, entry_idx, sentence_idx,
+                 question_text, query_split, question_split, complexity_bucket, gold_sql_exec
+    predictions  run_id, question_pk, pred_sql, gen_time_s, prompt_tokens,
+                 output_tokens, ex (primary RDBMS, 0/1)
+    executions   run_id, question_pk, rdbms, kind ('pred' | 'gold'), success,
+                 execution_time_s, rows, error, fingerprint, match (pred vs gold)
+
+Questions are identified by (dataset, question id) and shared by all runs on
+that dataset; indexes cover (dataset, question_id), (question_pk, run_id)
+and (model, dataset, rdbms_mode). Loading a file again replaces its run
+(unchanged files, same SHA-256, are skipped). Run model, dataset and RDBMS
+mode come from the manifest, then the records, then the file name
+(<model>_baseline_<dataset>_<rdbms>, as in compare_runs.py).
+
+Usage:
+  # questions qwen1.5b gets right that gpt2xl misses, by complexity
+  python scripts/results_warehouse.py --db results/warehouse.sqlite --wins qwen1.5b,gpt2xl --dataset advising
+  python scripts/results_warehouse.py --db results/warehouse.sqlite --runs
+  python scripts/results_warehouse.py --db results/warehouse.sqlite --sql "SELECT model, AVG(ex) FROM predictions JOIN runs USING (run_id) GROUP BY model"
+"""
+
+import argparse
+import sqlite3
+import sys
+import time
+from pathlib import Path
+
+# Add project root to path for imports
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from scripts.checkpoint import file_sha256, read_manifest
+from scripts.compare_runs import parse_run_name
+from scripts.paired_stats import primary_ex
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id        INTEGER PRIMARY KEY,
+    label         TEXT NOT NULL,
+    source        TEXT NOT NULL UNIQUE,
+    source_sha256 TEXT,
+    model         TEXT,
+    model_id      TEXT,
+    dataset       TEXT,
+    rdbms_mode    TEXT,
+    loaded_at     REAL
+);
+CREATE INDEX IF NOT EXISTS runs_model ON runs (model, dataset, rdbms_mode);
+
+CREATE TABLE IF NOT EXISTS questions (
+    question_pk       INTEGER PRIMARY KEY,
+    dataset           TEXT NOT NULL,
+    question_id       INTEGER NOT NULL,
+    entry_idx         INTEGER,
+    sentence_idx      INTEGER,
+    question_text     TEXT,
+    query_split       TEXT,
+    question_split    TEXT,
+    complexity_bucket TEXT,
+    gold_sql_exec     TEXT,
+    UNIQUE (dataset, question_id)
+);
+
+CREATE TABLE IF NOT EXISTS predictions (
+    run_id        INTEGER NOT NULL REFERENCES runs (run_id),
+    question_pk   INTEGER NOT NULL REFERENCES questions (question_pk),
+    pred_sql      TEXT,
+    gen_time_s    REAL,
+    prompt_tokens INTEGER,
+    output_tokens INTEGER,
+    ex            INTEGER,
+    PRIMARY KEY (run_id, question_pk)
+);
+CREATE INDEX IF NOT EXISTS predictions_question ON predictions (question_pk, run_id);
+
+CREATE TABLE IF NOT EXISTS executions (
+    run_id           INTEGER NOT NULL REFERENCES runs (run_id),
+    question_pk      INTEGER NOT NULL REFERENCES questions (question_pk),
+    rdbms            TEXT NOT NULL,
+    kind             TEXT NOT NULL,
+    success          INTEGER,
+    execution_time_s REAL,
+    rows             INTEGER,
+    error            TEXT,
+    fingerprint      TEXT,
+    match            INTEGER,
+    PRIMARY KEY (run_id, question_pk, rdbms, kind)
+);
+"""
+
+# questions model A gets right and model B misses (same dataset + RDBMS), by complexity
+WINS_SQL = """
+SELECT q.complexity_bucket, COUNT(*) AS n, GROUP_CONCAT(q.question_id) AS question_ids
+FROM runs ra
+JOIN predictions pa ON pa.run_id = ra.run_id
+JOIN predictions pb ON pb.question_pk = pa.question_pk
+JOIN runs rb ON rb.run_id = pb.run_id
+JOIN questions q ON q.question_pk = pa.question_pk
+WHERE (ra.model = :a OR ra.label = :a) AND (rb.model = :b OR rb.label = :b)
+  AND ra.dataset = rb.dataset AND ra.rdbms_mode IS rb.rdbms_mode
+  AND (:dataset IS NULL OR ra.dataset = :dataset)
+  AND pa.ex = 1 AND pb.ex = 0
+GROUP BY q.complexity_bucket
+ORDER BY q.complexity_bucket
+"""
+
+
+def _flag(x) -> int | None:
+    return None if x is None else int(bool(x))
+
+
+class ResultsWarehouse:
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.path))
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        self._conn.commit()
+        self._question_pks: dict[tuple[str, int], int] = {}
+        self._described: set[int] = set()
+        # run_id -> {'model', 'dataset', 'mode'} parsed from the file name (last-resort labels)
+        self._names: dict[int, dict] = {}
+
+    def begin_run(self, jsonl_path: Path) -> int | None:
+        """
+        Start (re)loading the run of a results file; returns its run_id, or
+        None if the same file content is already loaded.
+        """
+        source = str(jsonl_path.resolve())
+        sha = file_sha256(jsonl_path)
+        row = self._conn.execute("SELECT run_id, source_sha256 FROM runs WHERE source = ?", (source,)).fetchone()
+        if row is not None and row[1] == sha:
+            return None
+        if row is not None:
+            self._delete_run(row[0])
+        manifest = read_manifest(jsonl_path) or {}
+        cur = self._conn.execute(
+            "INSERT INTO runs (label, source, source_sha256, model, loaded_at) VALUES (?, ?, ?, ?, ?)",
+            (jsonl_path.stem, source, sha, manifest.get("model"), time.time()),
+        )
+        self._names[cur.lastrowid] = parse_run_name(jsonl_path)
+        return cur.lastrowid
+
+    def _delete_run(self, run_id: int) -> None:
+        for table in ("executions", "predictions", "runs"):
+            self._conn.execute(f"DELETE FROM {table} WHERE run_id = ?", (run_id,))
+
+    def _question_pk(self, record: dict, row: dict) -> int:
+        key = (record["dataset"], record["id"])
+        pk = self._question_pks.get(key)
+        if pk is None:
+            self._conn.execute(
+                """
+                INSERT INTO questions (dataset, question_id, entry_idx, sentence_idx, question_text,
+                                       query_split, question_split, complexity_bucket, gold_sql_exec)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (dataset, question_id) DO NOTHING
+                """,
+                (
+                    record["dataset"], record["id"], record.get("entry_idx"), record.get("sentence_idx"),
+                    record.get("question_text"), record.get("query_split"), record.get("question_split"),
+                    row["complexity_bucket"], record.get("gold_sql_exec"),
+                ),
+            )
+            (pk,) = self._conn.execute(
+                "SELECT question_pk FROM questions WHERE dataset = ? AND question_id = ?", key
+            ).fetchone()
+            self._question_pks[key] = pk
+        return pk
+
+    def add(self, run_id: int, record: dict, row: dict) -> None:
+        """Add one results record (and its flattened row, for the complexity bucket) to a run."""
+        if record.get("id") is None:
+            return
+        qpk = self._question_pk(record, row)
+        self._conn.execute(
+            "INSERT OR REPLACE INTO predictions VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (
+                # cache hits were not generated in this run: no generation time
+                run_id, qpk, record.get("pred_sql"), None if record.get("cache_hit") else record.get("gen_time_s"),
+                record.get("prompt_tokens"), record.get("output_tokens"), int(primary_ex(record)),
+            ),
+        )
+        for rdbms in ("mysql", "mariadb"):
+            for kind, key in (("pred", rdbms), ("gold", f"{rdbms}_gold")):
+                res = record.get(key)
+                if res is None:
+                    continue
+                match = record.get(f"{rdbms}_pred_vs_gold_match") if kind == "pred" else None
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO executions VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        run_id, qpk, rdbms, kind, _flag(res.get("success")), res.get("execution_time_s"),
+                        res.get("rows"), res.get("error"), res.get("fingerprint"), _flag(match),
+                    ),
+                )
+        if run_id not in self._described:
+            # run-level fields from the first record (older files have no manifest)
+            self._described.add(run_id)
+            self._conn.execute(
+                """
+                UPDATE runs SET model = COALESCE(model, ?), model_id = ?, dataset = ?, rdbms_mode = ?
+                WHERE run_id = ?
+                """,
+                (record.get("model"), record.get("model_id"), record["dataset"], record.get("rdbms_mode"), run_id),
+            )
+
+    def finish_run(self, run_id: int) -> None:
+        # <model>_baseline_<dataset>_<rdbms> file name when neither manifest nor records say
+        name = self._names.pop(run_id, {})
+        self._conn.execute(
+            """
+            UPDATE runs SET model = COALESCE(model, ?, label), dataset = COALESCE(dataset, ?),
+                            rdbms_mode = COALESCE(rdbms_mode, ?)
+            WHERE run_id = ?
+            """,
+            (name.get("model"), name.get("dataset"), name.get("mode"), run_id),
+        )
+        self._conn.commit()
+
+    def runs(self) -> list[tuple]:
+        return self._conn.execute(
+            """
+            SELECT r.run_id, r.label, r.model, r.dataset, r.rdbms_mode, COUNT(p.question_pk), AVG(p.ex)
+            FROM runs r LEFT JOIN predictions p ON p.run_id = r.run_id
+            GROUP BY r.run_id ORDER BY r.run_id
+            """
+        ).fetchall()
+
+    def wins(self, model_a: str, model_b: str, dataset: str | None = None) -> list[tuple]:
+        """[(complexity_bucket, n, 'id,id,...')] of questions A gets right and B misses."""
+        return self._conn.execute(WINS_SQL, {"a": model_a, "b": model_b, "dataset": dataset}).fetchall()
+
+    def query(self, sql: str) -> tuple[list[str], list[tuple]]:
+        cur = self._conn.execute(sql)
+        return [d[0] for d in cur.description or []], cur.fetchall()
+
+    def close(self) -> None:
+        self._conn.commit()
+        self._conn.close()
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--db",
+        type=str,
+        default="results/warehouse.sqlite",
+        help="Warehouse SQLite file (filled by jsonl_to_csv_metrics.py --warehouse).",
+    )
+    parser.add_argument(
+        "--runs",
+        action="store_true",
+        help="List the loaded runs.",
+    )
+    parser.add_argument(
+        "--wins",
+        type=str,
+        default="",
+        help="A,B: questions model (or run label) A gets right and B misses, by complexity.",
+    )
+    parser.add_argument(
+        "--dataset",
+        type=str,
+        default="",
+        help="Restrict --wins to one dataset.",
+    )
+    parser.add_argument(
+        "--sql",
+        type=str,
+        default="",
+        help="Run an arbitrary read query and print the rows.",
+    )
+    args = parser.parse_args()
+
+    db_path = Path(args.db)
+    if not db_path.exists():
+        print(f"❌ Warehouse not found: {db_path}")
+        return 1
+    wh = ResultsWarehouse(db_path)
+    try:
+        if args.runs:
+            print("📚 Runs")
+            for run_id, label, model, dataset, rdbms, n, ex in wh.runs():
+                ex_s = f"{ex*100:.1f}%" if ex is not None else "-"
+                print(f"  [{run_id}] {label}: {model} | {dataset} | {rdbms} | {n} questions | EX {ex_s}")
+
+        if args.wins:
+            parts = [p.strip() for p in args.wins.split(",")]
+            if len(parts) != 2 or not all(parts):
+                print("❌ --wins needs two models: A,B")
+                return 1
+            a, b = parts
+            t0 = time.perf_counter()
+            rows = wh.wins(a, b, args.dataset or None)
+            ms = (time.perf_counter() - t0) * 1000
+            total = sum(n for _, n, _ in rows)
+            print(f"\n🏆 {a} right, {b} wrong: {total} questions ({ms:.1f} ms)")
+            for bucket, n, ids in rows:
+                ids = ids.split(",")
+                more = f" ... (+{len(ids) - 20})" if len(ids) > 20 else ""
+                print(f"  {bucket}: {n}  ids: {','.join(ids[:20])}{more}")
+
+        if args.sql:
+            columns, rows = wh.query(args.sql)
+            print(" | ".join(columns))
+            for row in rows:
+                print(" | ".join("" if v is None else str(v) for v in row))
+    except sqlite3.Error as e:
+        print(f"❌ {e}")
+        return 1
+    finally:
+        wh.close()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,1038 @@
+"""
+scripts/run_baseline.py
+
+Model-agnostic Text2SQL baseline runner.
+
+Evaluates one or more registered agents (see models/registry.py) in a single
+pass over a text2sql-data dataset:
+
+  --models gpt2xl,qwen1.5b
+
+Per question, the schema, the filled gold SQL and the gold execution are
+computed once and shared by all models; only generation, normalization and
+predicted-SQL execution are done per model.
+
+Questions are processed in chunks: for each chunk every model generates all
+of its questions before the next model is used, so with --max_resident 1 each
+model is (re)loaded at most once per chunk instead of once per question.
+
+Evaluation is pipelined (scripts/eval_pipeline.py): the main thread only
+generates; a pool of --db_workers threads normalizes and executes pred/gold
+SQL for earlier questions while the next batch is generated, and a writer
+thread serializes the JSONL records in order. End-to-end wall time therefore
+approaches pure generation time.
+
+Models can also be served by a shared inference server (scripts/serve_agent.py):
+
+  --server gpt2xl=http://127.0.0.1:8765
+
+in which case the runner acts as a lightweight client for that model.
+
+Speculative decoding: use a '-spec' model (e.g. qwen1.5b-spec) or pass
+--draft_model. Per question the record gets the draft acceptance rate; with
+--spec_check plain greedy decoding is also run to verify identical output and
+report the speed-up.
+
+Output: one JSONL per model, by default
+  results/<model>_baseline_<dataset>_<rdbms>.jsonl
+
+Checkpoint/resume (scripts/checkpoint.py): every output gets a manifest
+(dataset hash, model, run config) and records are appended with batched
+fsync. After a crash or Ctrl+C, re-run the same command with --resume: the
+completed (entry_idx, sentence_idx) questions are skipped and the counters
+are rebuilt from the existing records.
+
+Sharding: --shards N --shard_index i evaluates only the dataset entries with
+entry_idx % N == i (global ids are kept) and writes
+results/<model>_baseline_<dataset>_<rdbms>.shard<i>of<N>.jsonl.
+scripts/launch_shards.py starts N such workers (each with its own
+--num_threads, model copy and DB pool) and merges the shard files with
+scripts/merge_shards.py.
+
+Sampling mode (--sample, scripts/sampling.py): instead of every question,
+draw questions stratified by gold-SQL complexity and split, update the EX
+confidence interval of every stratum as results arrive and stop once all
+of them are narrower than --ci_width. The stratified EX estimate is written
+to <out>.sampling.json.
+
+Paired A/B mode (--paired, with two or more models): all models answer the
+same questions, scored against one gold execution (result fingerprint), and
+results/paired_baseline_<dataset>_<rdbms>.jsonl gets one record per
+question with every model's outcome, plus McNemar's test per model pair
+(scripts/paired_stats.py).
+
+Budgets (scripts/budget.py): --time_budget SECONDS and/or --token_budget
+TOKENS stop the run before the budget is exceeded, from rolling per-question
+generation/DB costs, and still end with a complete summary. With a budget the
+remaining questions are interleaved across complexity/split strata, so an
+early stop leaves every stratum covered. Continue later with --resume.
+
+Generation cache (--cache PATH, models/generation_cache.py): greedy
+completions are stored in a SQLite file keyed by model id/revision, decoding
+parameters and the exact prompt token ids. Re-running after a change to SQL
+normalization, comparison or metrics reuses the cached tokens (SQL extraction
+is redone) and skips generation; identical prompts within a batch are
+generated once. Hits are marked cache_hit with gen_time_s 0 (the batch time
+goes to the generated questions) and are left out of generation latency
+and throughput metrics.
+
+Repair (--repair K, scripts/repair.py): when the predicted SQL fails on the
+primary RDBMS, the DB error and the failed SQL are fed back to the model and
+the SQL is regenerated, up to K times. Retries are queued by the DB workers
+and generated by the model thread between batches, so other questions keep
+flowing. Only resident models serve retries: before a model switch that
+would evict one, the pipeline is flushed so its retries are done first
+(--max_resident stays a hard bound). Records get the attempts, extra tokens
+and latency. --prefix_cache N keeps the KV cache of the shared schema prompt
+prefix (first attempts and retries alike).
+
+run_gpt2xl_baseline.py / run_qwen_baseline.py are thin wrappers around this script.
+"""
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# Add project root to path for imports
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from models.generation_cache import GenerationCache, generation_times
+from models.base import build_repair_question
+from models.registry import AgentRegistry, available_models, parse_model_list, register_agent
+from database.db_manager import DatabaseManager
+from scripts.budget import BudgetGovernor
+from scripts.checkpoint import (
+    CheckpointWriter,
+    file_sha256,
+    load_records,
+    manifest_mismatch,
+    question_key,
+    read_manifest,
+    write_manifest,
+)
+from scripts.dataset_utils import get_sentence_variables, get_sql_variants, iter_questions, load_dataset
+from scripts.eval_pipeline import EvalPipeline
+from scripts.jsonl_to_csv_metrics import jsonl_to_parquet
+from scripts.metrics_schema import has_parquet
+from scripts.paired_stats import primary_ex, print_summary, write_paired
+from scripts.results_io import BlobWriter
+from scripts.repair import RepairScheduler, finish_record, new_state, primary_exec
+from scripts.sampling import StratifiedSampler, interleave_strata
+from scripts.sql_utils import (
+    compare_results,
+    fill_gold_sql,
+    normalize_pred_sql,
+    pack_exec_result,
+    result_fingerprint,
+    results_match,
+)
+
+
+def peak_rss_mb() -> float | None:
+    """Peak resident set size of this process so far, in MB (None where `resource` is unavailable)."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def out_path_for(
+    model: str,
+    dataset_name: str,
+    rdbms: str,
+    out_template: str,
+    shards: int = 1,
+    shard_index: int = 0,
+) -> Path:
+    """
+    results/<model>_baseline_<dataset>_<rdbms>.jsonl, or --out.
+    --out may contain '{model}', '{dataset}' and '{rdbms}'; '{model}' is
+    required when several models are evaluated.
+    With shards > 1 the shard is added before the suffix (.shard<i>of<N>.jsonl).
+    """
+    if out_template.strip():
+        path = Path(out_template.format(model=model, dataset=dataset_name, rdbms=rdbms))
+    else:
+        path = Path("results") / f"{model}_baseline_{dataset_name}_{rdbms}.jsonl"
+    if shards > 1:
+        path = path.with_name(f"{path.stem}.shard{shard_index}of{shards}{path.suffix}")
+    return path
+
+
+def _parse_servers(value: str) -> dict[str, str]:
+    """'gpt2xl=http://127.0.0.1:8765,qwen1.5b=http://...' -> {name: url}"""
+    servers = {}
+    for part in value.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        if "=" not in part:
+            raise ValueError(f"--server entries must look like name=url, got: {part!r}")
+        name, url = part.split("=", 1)
+        servers[name.strip().lower()] = url.strip()
+    return servers
+
+
+def _chunks(items: list, size: int):
+    size = size if size > 0 else max(1, len(items))
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+def _model_order(models: list[str], registry: AgentRegistry) -> list[str]:
+    """Already-loaded models first, so a chunk starts without a reload."""
+    return sorted(models, key=lambda m: 0 if registry.is_resident(m) else 1)
+
+
+def _new_counters() -> dict:
+    return {
+        "n": 0, "ok_mysql": 0, "ok_maria": 0, "both_ok": 0, "match": 0, "ex_mysql": 0, "ex_maria": 0,
+        # speculative decoding
+        "spec_draft": 0, "spec_accepted": 0, "spec_time": 0.0, "greedy_time": 0.0, "spec_checked": 0, "spec_identical": 0,
+        # execution-feedback repair
+        "repaired": 0, "repair_attempts": 0, "repair_fixed_exec": 0, "repair_fixed_ex": 0,
+        "repair_tokens": 0, "repair_gen_time": 0.0,
+    }
+
+
+def _run_config(args) -> dict:
+    """Options that change the records; a resumed run must use the same ones."""
+    return {
+        "rdbms": args.rdbms,
+        "max_tables": args.max_tables,
+        "max_new_tokens": args.max_new_tokens,
+        "draft_model": args.draft_model,
+        "num_draft_tokens": args.num_draft_tokens if args.draft_model else None,
+        "constrained": args.constrained,
+        "repair": args.repair or None,
+        "shards": args.shards,
+        "shard_index": args.shard_index,
+        "sample": (
+            {"ci_width": args.ci_width, "min_per_stratum": args.min_per_stratum, "ci_method": args.ci_method,
+             "strata": args.strata, "seed": args.seed}
+            if args.sample else None
+        ),
+    }
+
+
+def _iter_chunks(pending: list[dict], size: int, sampler=None, governor=None):
+    """
+    Chunks of the questions still to run. With a sampler, keep drawing until every
+    stratum's CI is narrow enough; with a budget governor, shrink/stop chunks so
+    the run ends within budget. Both are asked right before each chunk.
+    """
+    size = size if size > 0 else max(1, len(pending))
+    pos = 0
+    while True:
+        n = governor.affordable(size) if governor is not None else size
+        if n <= 0:
+            return
+        if sampler is not None:
+            chunk = sampler.next_batch(n)
+        else:
+            chunk = pending[pos:pos + n]
+            pos += len(chunk)
+        if not chunk:
+            return
+        yield chunk
+
+
+def _print_sampling_report(report: dict) -> None:
+    print(f"\n[{report['model']}] stratified EX ({report['ci_method']} CI, target width {report['target_width']})")
+    for row in report["strata"]:
+        ex = "-" if row["ex"] is None else f"{row['ex']*100:.1f}%"
+        print(
+            f"  {row['stratum']:<24} n={row['n']:>4}/{row['population']:<5} EX={ex:>6} "
+            f"CI=[{row['ci_low']*100:.1f}, {row['ci_high']*100:.1f}]"
+        )
+    if report["ex"] is not None:
+        print(
+            f"  Overall EX: {report['ex']*100:.1f}% [{report['ci_low']*100:.1f}, {report['ci_high']*100:.1f}] "
+            f"from {report['evaluated']}/{report['population']} questions"
+        )
+
+
+def _set_num_threads(n: int) -> None:
+    try:
+        import torch
+    except ImportError:
+        return
+    torch.set_num_threads(n)
+
+
+def _open_outputs(models, out_paths, manifests, resume, fsync_every, counters, replay=None) -> tuple[dict, dict]:
+    """
+    Write manifests and open the output writers.
+    With resume, rebuild counters and return the completed question keys per model;
+    replay(model, record) is called for every existing record.
+
+    Raises:
+        ValueError: if an existing output belongs to a different run.
+    """
+    done = {m: set() for m in models}
+    for m in models:
+        out_path = out_paths[m]
+        if resume and out_path.exists():
+            old = read_manifest(out_path)
+            if old is None:
+                raise ValueError(f"{out_path} has no manifest; cannot resume it safely.")
+            diffs = manifest_mismatch(old, manifests[m])
+            if diffs:
+                raise ValueError(f"{out_path} was written by a different run ({', '.join(diffs)}).")
+            for record in load_records(out_path):
+                if question_key(record) not in done[m]:
+                    done[m].add(question_key(record))
+                    _count_record(counters[m], record)
+                    if replay is not None:
+                        replay(m, record)
+            print(f"↩️  Resuming [{m}]: {len(done[m])} questions already done")
+
+    writers = {}
+    for m in models:
+        write_manifest(out_paths[m], manifests[m])
+        # schema + gold templates once per file in <out>.blobs.jsonl (scripts/results_io.py)
+        writers[m] = CheckpointWriter(
+            out_paths[m], append=resume, fsync_every=fsync_every, blobs=BlobWriter(out_paths[m], append=resume),
+        )
+    return writers, done
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--dataset",
+        type=str,
+        default="datasets_source/data/advising.json",
+        help="Path to dataset JSON file (text2sql-data format).",
+    )
+    parser.add_argument(
+        "--models",
+        type=str,
+        default="gpt2xl",
+        help=f"Comma-separated model names. Available: {', '.join(available_models())}",
+    )
+    parser.add_argument(
+        "--max_resident",
+        type=int,
+        default=1,
+        help="Max number of models kept loaded at once (LRU eviction).",
+    )
+    parser.add_argument(
+        "--rdbms",
+        type=str,
+        default="mysql",
+        choices=["mysql", "mariadb", "both"],
+        help="RDBMS to use for execution.",
+    )
+    parser.add_argument(
+        "--limit_entries",
+        type=int,
+        default=1,
+        help="Process only the first N entries (each entry may contain multiple sentences).",
+    )
+    parser.add_argument(
+        "--max_tables",
+        type=int,
+        default=12,
+        help="Max tables to include in compact schema.",
+    )
+    parser.add_argument(
+        "--max_new_tokens",
+        type=int,
+        default=0,
+        help="Max tokens to generate for SQL (0 = each model's default).",
+    )
+    parser.add_argument(
+        "--batch_size",
+        type=int,
+        default=1,
+        help="Questions per generate_batch() call.",
+    )
+    parser.add_argument(
+        "--chunk_size",
+        type=int,
+        default=64,
+        help="Questions evaluated per model before switching to the next model (0 = whole dataset).",
+    )
+    parser.add_argument(
+        "--db_workers",
+        type=int,
+        default=4,
+        help="DB worker threads executing/comparing SQL while the model generates.",
+    )
+    parser.add_argument(
+        "--max_pending",
+        type=int,
+        default=64,
+        help="Max generated questions waiting for DB evaluation (back-pressure on the model).",
+    )
+    parser.add_argument(
+        "--draft_model",
+        type=str,
+        default="",
+        help="HF id of a draft model for speculative decoding (applies to all local models).",
+    )
+    parser.add_argument(
+        "--num_draft_tokens",
+        type=int,
+        default=4,
+        help="Initial number of draft tokens per speculative step.",
+    )
+    parser.add_argument(
+        "--spec_check",
+        action="store_true",
+        help="Also run plain greedy decoding to verify speculative output and measure speed-up.",
+    )
+    parser.add_argument(
+        "--constrained",
+        action="store_true",
+        help="Schema-aware constrained decoding: only schema tables/columns at identifier positions.",
+    )
+    parser.add_argument(
+        "--cache",
+        type=str,
+        default="",
+        help="SQLite generation cache path (e.g. results/generation_cache.sqlite); reuses identical generations.",
+    )
+    parser.add_argument(
+        "--prefix_cache",
+        type=int,
+        default=0,
+        help="Keep the KV cache of the shared schema prompt prefix (N prefixes; 0 = off).",
+    )
+    parser.add_argument(
+        "--repair",
+        type=int,
+        default=0,
+        help="Retry up to K times with the DB error fed back when the predicted SQL fails (0 = off).",
+    )
+    parser.add_argument(
+        "--server",
+        type=str,
+        default="",
+        help="Comma-separated name=url pairs of running inference servers (scripts/serve_agent.py).",
+    )
+    parser.add_argument(
+        "--out",
+        type=str,
+        default="",
+        help="Optional output JSONL path; use '{model}' in it when evaluating several models.",
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Continue an interrupted run: skip questions already in the output (same dataset/model/config).",
+    )
+    parser.add_argument(
+        "--fsync_every",
+        type=int,
+        default=32,
+        help="Flush + fsync the output every N records.",
+    )
+    parser.add_argument(
+        "--shards",
+        type=int,
+        default=1,
+        help="Split the dataset entries into N shards (see scripts/launch_shards.py).",
+    )
+    parser.add_argument(
+        "--shard_index",
+        "--shard-index",
+        type=int,
+        default=0,
+        help="Shard evaluated by this process (0..N-1).",
+    )
+    parser.add_argument(
+        "--num_threads",
+        type=int,
+        default=0,
+        help="torch intra-op threads for this process (0 = torch default).",
+    )
+    parser.add_argument(
+        "--paired",
+        action="store_true",
+        help="Write paired per-question records for all models and McNemar's test per model pair.",
+    )
+    parser.add_argument(
+        "--parquet",
+        action="store_true",
+        help="After the run, also write each model's results as typed Parquet next to the JSONL (needs pyarrow).",
+    )
+    parser.add_argument(
+        "--rows_examined",
+        action="store_true",
+        help="Record rows read by the storage engine per execution (Handler_read%% deltas; 2 extra status queries each).",
+    )
+    parser.add_argument(
+        "--time_budget",
+        "--time-budget",
+        type=float,
+        default=0.0,
+        help="Wall-clock budget in seconds; the run stops in time to write a complete summary (0 = none).",
+    )
+    parser.add_argument(
+        "--token_budget",
+        "--token-budget",
+        type=int,
+        default=0,
+        help="Budget of prompt + output tokens over all models (0 = none).",
+    )
+    parser.add_argument(
+        "--sample",
+        action="store_true",
+        help="Stratified sequential sampling: stop once every stratum's EX CI is narrower than --ci_width.",
+    )
+    parser.add_argument(
+        "--ci_width",
+        type=float,
+        default=0.1,
+        help="Target CI width per stratum in sampling mode (0.1 = +/-5 points).",
+    )
+    parser.add_argument(
+        "--min_per_stratum",
+        type=int,
+        default=10,
+        help="Minimum results per stratum before it may stop (sampling mode).",
+    )
+    parser.add_argument(
+        "--ci_method",
+        type=str,
+        default="wilson",
+        choices=["wilson", "bootstrap"],
+        help="Confidence interval used in sampling mode.",
+    )
+    parser.add_argument(
+        "--strata",
+        type=str,
+        default="complexity,split",
+        help="Comma-separated stratification dimensions (complexity, split).",
+    )
+    parser.add_argument(
+        "--seed",
+        type=int,
+        default=0,
+        help="Sampling order seed.",
+    )
+    return parser
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = build_parser().parse_args(argv)
+
+    try:
+        for name, url in _parse_servers(args.server).items():
+            register_agent(name, "models.inference_server:RemoteAgent", url=url)
+        models = parse_model_list(args.models)
+    except ValueError as e:
+        print(f"❌ {e}")
+        return 1
+
+    if len(models) > 1 and args.out.strip() and "{model}" not in args.out:
+        print("❌ --out must contain '{model}' when several models are evaluated.")
+        return 1
+
+    if args.paired and len(models) < 2:
+        print("❌ --paired needs at least two models.")
+        return 1
+
+    if args.parquet and not has_parquet():
+        print("❌ --parquet needs pyarrow (pip install pyarrow).")
+        return 1
+
+    if args.shards < 1 or not 0 <= args.shard_index < args.shards:
+        print(f"❌ Invalid shard {args.shard_index} of {args.shards}.")
+        return 1
+
+    if args.num_threads > 0:
+        _set_num_threads(args.num_threads)
+
+    dataset_path = Path(args.dataset)
+    if not dataset_path.exists():
+        print(f"❌ Dataset not found: {dataset_path}")
+        return 1
+
+    dataset_name = dataset_path.stem  # used as DB name convention
+    max_new_tokens = args.max_new_tokens or None
+
+    out_paths = {
+        m: out_path_for(m, dataset_name, args.rdbms, args.out, args.shards, args.shard_index)
+        for m in models
+    }
+    for p in out_paths.values():
+        p.parent.mkdir(parents=True, exist_ok=True)
+
+    print("🧪 Text2SQL Baseline Runner")
+    print("=" * 70)
+    print(f"Dataset file: {dataset_path}")
+    print(f"Dataset name (DB): {dataset_name}")
+    print(f"Models: {', '.join(models)} (max resident: {args.max_resident})")
+    print(f"RDBMS: {args.rdbms}")
+    for m, p in out_paths.items():
+        print(f"Output [{m}]: {p}")
+    print(f"Entry limit: {args.limit_entries}")
+    if args.shards > 1:
+        print(f"Shard: {args.shard_index} of {args.shards} (threads: {args.num_threads or 'default'})")
+    print(f"Schema max tables: {args.max_tables}")
+    print(f"Max new tokens: {args.max_new_tokens or 'model default'}")
+    print(f"DB workers: {args.db_workers} (max pending: {args.max_pending})")
+    print(f"Resume: {'yes' if args.resume else 'no'}")
+    print("=" * 70)
+
+    data = load_dataset(dataset_path)
+    questions = list(iter_questions(data, args.limit_entries))
+    # global ids follow dataset order, so they are stable across resumed runs
+    for row_id, q in enumerate(questions):
+        q["id"] = row_id
+    if args.shards > 1:
+        # whole entries per shard: all paraphrases of a query stay together
+        questions = [q for q in questions if q["entry_idx"] % args.shards == args.shard_index]
+
+    dataset_sha256 = file_sha256(dataset_path)
+    manifests = {
+        m: {
+            "dataset": str(dataset_path),
+            "dataset_sha256": dataset_sha256,
+            "model": m,
+            "config": _run_config(args),
+            "args": vars(args),
+            "started_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        }
+        for m in models
+    }
+    sampler = None
+    if args.sample:
+        try:
+            sampler = StratifiedSampler(
+                questions,
+                models,
+                target_width=args.ci_width,
+                min_per_stratum=args.min_per_stratum,
+                ci_method=args.ci_method,
+                strata_by=tuple(d.strip() for d in args.strata.split(",") if d.strip()),
+                seed=args.seed,
+            )
+        except ValueError as e:
+            print(f"❌ {e}")
+            return 1
+
+    def replay(model: str, record: dict) -> None:
+        if sampler is not None and "stratum" in record:
+            sampler.observe(model, record["stratum"], primary_ex(record))
+
+    counters = {m: _new_counters() for m in models}
+    try:
+        writers, done = _open_outputs(
+            models, out_paths, manifests, args.resume, args.fsync_every, counters, replay=replay
+        )
+    except ValueError as e:
+        print(f"❌ {e}")
+        return 1
+
+    pending = [q for q in questions if any(question_key(q) not in done[m] for m in models)]
+    if sampler is not None:
+        finished = {question_key(q) for q in questions} - {question_key(q) for q in pending}
+        sampler.discard(lambda q: question_key(q) in finished)
+        print(f"Questions: {len(questions)} | strata: {len(sampler.population)} | sampling until CI width <= {args.ci_width}")
+    else:
+        print(f"Questions: {len(questions)} | to run: {len(pending)}")
+
+    governor = BudgetGovernor(
+        time_budget_s=args.time_budget,
+        token_budget=args.token_budget,
+        models=[m for m in models if any(question_key(q) not in done[m] for q in pending)],
+        db_workers=args.db_workers,
+        warmup=args.batch_size,
+    )
+    if governor.enabled:
+        print(f"Budget: time={args.time_budget or '-'}s tokens={args.token_budget or '-'}")
+        if sampler is None:
+            # an early stop should still leave every stratum covered
+            pending = interleave_strata(pending, seed=args.seed)
+
+    generation_cache = GenerationCache(args.cache) if args.cache else None
+    registry = AgentRegistry(
+        max_resident=args.max_resident,
+        draft_model_id=args.draft_model or None,
+        num_draft_tokens=args.num_draft_tokens,
+        spec_check=args.spec_check or None,
+        constrained=args.constrained or None,
+        generation_cache=generation_cache,
+        prefix_cache=args.prefix_cache or None,
+    )
+    repairs = RepairScheduler(args.repair) if args.repair > 0 else None
+
+    # Schema introspection always goes through MySQL (shared by all models/questions)
+    schema_helper = DatabaseManager("mysql", dataset_name)
+    schema_compact = schema_helper.get_compact_schema(max_tables=args.max_tables)
+    schema_tables = schema_helper.get_table_names()
+    schema_helper.close()
+
+    track = args.rows_examined
+    mysql_db = DatabaseManager("mysql", dataset_name, track_rows_examined=track) if args.rdbms in ("mysql", "both") else None
+    maria_db = DatabaseManager("mariadb", dataset_name, track_rows_examined=track) if args.rdbms in ("mariadb", "both") else None
+
+    def on_record(model: str, record: dict) -> None:
+        # writer thread only: files and counters need no locking
+        writers[model].write(record)
+        _count_record(counters[model], record)
+        governor.observe_evaluation(_db_seconds(record))
+        if sampler is not None:
+            sampler.observe(model, record["stratum"], primary_ex(record))
+        _print_record(record)
+
+    def service_repairs(only: list[str]) -> None:
+        # model thread only: regenerate queued repairs of `only` (resident models), send them back to the DB pool
+        nonlocal gen_time_total
+        if repairs is None or not repairs.pending():
+            return
+        queued = repairs.take(only)
+        for model, items in queued.items():
+            agent = registry.get(model)
+            model_info = agent.info()
+            for batch in _chunks(items, args.batch_size):
+                t0 = time.time()
+                gens = agent.generate_batch(
+                    [
+                        (schema_compact, build_repair_question(
+                            q["question_text"], state["history"][-1]["pred_sql"], state["history"][-1]["error"],
+                        ))
+                        for q, state, _ in batch
+                    ],
+                    max_new_tokens=max_new_tokens,
+                )
+                batch_time = time.time() - t0
+                gen_time_total += batch_time
+                for (q, state, future), gen in zip(batch, gens):
+                    tokens = (gen.get("prompt_tokens") or 0) + (gen.get("output_tokens") or 0)
+                    state["attempts"] += 1
+                    state["tokens"] += tokens
+                    state["repair_gen_time"] += batch_time / len(batch)
+                    governor.observe_repair(tokens)
+                    future.set_result(pipeline.run_db(
+                        _evaluate_prediction, q, gen, state["gen_time"], model, model_info, dataset_name,
+                        schema_compact, schema_tables, args.rdbms, mysql_db, maria_db, repairs, state,
+                    ))
+
+    pipeline = EvalPipeline(
+        _evaluate_prediction, on_record, db_workers=args.db_workers, max_pending=args.max_pending,
+        # never load a model from here: the model loop may be holding another one
+        on_wait=(lambda: service_repairs(registry.resident())) if repairs is not None else None,
+    )
+    gen_time_total = 0.0
+    n_run = 0
+    t_start = time.time()
+    try:
+        for chunk in _iter_chunks(pending, args.chunk_size, sampler=sampler, governor=governor):
+            n_run += len(chunk)
+            # --- Shared per-question work: gold SQL + gold execution (DB pool) ---
+            for q in chunk:
+                q["gold_sql_exec"] = fill_gold_sql(q["entry"], q["sentence"])
+                q["gold"] = pipeline.run_db(_execute_gold, q["gold_sql_exec"], mysql_db, maria_db)
+
+            # --- Per-model work: generate here, evaluate in the DB pool ----------
+            for model in _model_order(models, registry):
+                todo = [q for q in chunk if question_key(q) not in done[model]]
+                if not todo:
+                    continue
+                if repairs is not None and not registry.is_resident(model) and len(registry.resident()) >= args.max_resident:
+                    # the evicted model must finish its queued and in-flight retries first
+                    pipeline.flush()
+                agent = registry.get(model)
+                model_info = agent.info()
+
+                for batch in _chunks(todo, args.batch_size):
+                    t0 = time.time()
+                    gens = agent.generate_batch(
+                        [(schema_compact, q["question_text"]) for q in batch],
+                        max_new_tokens=max_new_tokens,
+                    )
+                    batch_time = time.time() - t0
+                    gen_time_total += batch_time
+                    governor.observe_generation(
+                        model, len(batch), batch_time,
+                        sum((g.get("prompt_tokens") or 0) + (g.get("output_tokens") or 0) for g in gens),
+                    )
+                    # amortized over the questions actually generated (cache hits: 0)
+                    for q, gen, gen_time in zip(batch, gens, generation_times(batch_time, gens)):
+                        pipeline.submit(
+                            model, q, gen, gen_time, model, model_info, dataset_name, schema_compact,
+                            schema_tables, args.rdbms, mysql_db, maria_db,
+                            repairs, new_state(gen_time) if repairs is not None else None,
+                        )
+                    # retries of this (loaded) model from earlier batches
+                    service_repairs([model])
+    finally:
+        pipeline.close()
+        for w in writers.values():
+            w.close()
+        if mysql_db is not None:
+            mysql_db.close()
+        if maria_db is not None:
+            maria_db.close()
+
+    wall_time = time.time() - t_start
+
+    print("\n" + "=" * 70)
+    print("📊 Summary")
+    print("=" * 70)
+    print(f"Total questions: {len(questions)} (run now: {n_run})")
+    if governor.stopped_reason:
+        print(f"⏹️  Stopped early: {governor.stopped_reason}. Re-run with --resume to continue.")
+    if governor.token_budget:
+        print(f"Tokens used: {governor.tokens_used}/{governor.token_budget}")
+    for model in models:
+        _print_model_summary(model, counters[model], args.rdbms)
+        if sampler is not None:
+            report = sampler.report(model)
+            _print_sampling_report(report)
+            sampling_path = out_paths[model].with_name(out_paths[model].name + ".sampling.json")
+            sampling_path.write_text(json.dumps(report, indent=2), encoding="utf-8")
+        print(f"✅ Wrote results to: {out_paths[model]}")
+        if args.parquet:
+            # from the complete JSONL (resumed runs included); Parquet files are not appendable
+            parquet_path = out_paths[model].with_suffix(".parquet")
+            n_rows = jsonl_to_parquet(out_paths[model], parquet_path)
+            print(f"✅ Wrote Parquet ({n_rows} rows) to: {parquet_path}")
+    print(f"Model loads: {registry.loads} | evictions: {registry.evictions}")
+    if generation_cache is not None:
+        stats = generation_cache.stats()
+        generation_cache.close()
+        print(f"🗄️  Generation cache: {stats['hits']} hits, {stats['misses']} misses, {stats['entries']} entries")
+
+    if args.paired:
+        paired_path = out_path_for("paired", dataset_name, args.rdbms, args.out, args.shards, args.shard_index)
+        print_summary(write_paired([out_paths[m] for m in models], paired_path))
+        print(f"✅ Wrote paired records to: {paired_path}")
+    print(
+        f"⏱️  Generation: {gen_time_total:.1f}s | wall: {wall_time:.1f}s | "
+        f"model waited on DB: {pipeline.wait_time_s:.1f}s"
+    )
+
+    return 0
+
+
+def _execute_gold(gold_sql_exec: str, mysql_db, maria_db) -> tuple:
+    """Gold execution + result fingerprint, once per question (shared by all models)."""
+    mysql_gold = mysql_db.execute_query(gold_sql_exec) if mysql_db is not None else None
+    maria_gold = maria_db.execute_query(gold_sql_exec) if maria_db is not None else None
+    for res in (mysql_gold, maria_gold):
+        if res is not None and res.get("success"):
+            res["fingerprint"] = result_fingerprint(res.get("result"))
+    return mysql_gold, maria_gold
+
+
+def _evaluate_prediction(
+    q: dict,
+    gen: dict,
+    gen_time: float,
+    model: str,
+    model_info: dict,
+    dataset_name: str,
+    schema_compact: str,
+    schema_tables: list[str],
+    rdbms: str,
+    mysql_db,
+    maria_db,
+    repairs: RepairScheduler | None = None,
+    repair_state: dict | None = None,
+):
+    """
+    Normalize + execute one prediction against the shared gold results; return the JSONL record.
+    Runs on a DB worker thread.
+
+    With repairs, a failed prediction returns a Future of the next attempt instead.
+    """
+    pred_sql_raw = gen["sql"]
+    pred_sql = normalize_pred_sql(pred_sql_raw, schema_tables)
+
+    mysql_pred = mysql_db.execute_query(pred_sql) if mysql_db is not None else None
+    maria_pred = maria_db.execute_query(pred_sql) if maria_db is not None else None
+    mysql_gold, maria_gold = q["gold"].result()
+
+    # Cross-RDBMS match only in "both" mode (predicted SQL)
+    match = None
+    if mysql_pred is not None and maria_pred is not None:
+        if mysql_pred.get("success") and maria_pred.get("success"):
+            if mysql_pred.get("result") is not None and maria_pred.get("result") is not None:
+                match = compare_results(mysql_pred["result"], maria_pred["result"])
+
+    # Execution accuracy: predicted vs gold per-RDBMS
+    mysql_exec_match = results_match(mysql_pred, mysql_gold)
+    maria_exec_match = results_match(maria_pred, maria_gold)
+
+    sql_variants = get_sql_variants(q["entry"])
+
+    record = {
+        "id": q["id"],
+        "entry_idx": q["entry_idx"],
+        "sentence_idx": q["sentence_idx"],
+        "dataset": dataset_name,
+        "model": model,
+        "model_id": model_info.get("model_id"),
+
+        # Dataset metadata
+        "query_split": q["query_split"],
+        "question_split": q["question_split"],
+        "question_text": q["question_text"],
+        "question_variables": get_sentence_variables(q["sentence"]),
+
+        # Gold SQL (raw + executable)
+        "gold_sql_first": sql_variants[0] if sql_variants else "",
+        "gold_sql_variants": sql_variants,
+        "gold_sql_exec": q["gold_sql_exec"],
+
+        # Prompt inputs
+        "schema_compact": schema_compact,
+        "schema_tables_included": gen.get("schema_tables_included"),
+        "schema_columns_included": gen.get("schema_columns_included"),
+
+        # Model output + timings
+        "pred_sql_raw": pred_sql_raw,  # unnormalized
+        "pred_sql": pred_sql,          # normalized used for execution
+        "gen_time_s": round(gen_time, 4),
+        "prompt_tokens": gen.get("prompt_tokens"),
+        "output_tokens": gen.get("output_tokens"),
+        "peak_rss_mb": peak_rss_mb(),
+
+        "rdbms_mode": rdbms,
+
+        # Pred exec results
+        "mysql": pack_exec_result(mysql_pred),
+        "mariadb": pack_exec_result(maria_pred),
+
+        # Gold exec results
+        "mysql_gold": pack_exec_result(mysql_gold),
+        "mariadb_gold": pack_exec_result(maria_gold),
+
+        # Execution match pred vs gold
+        "mysql_pred_vs_gold_match": mysql_exec_match,
+        "mariadb_pred_vs_gold_match": maria_exec_match,
+
+        # Only meaningful in both-mode (predicted cross-db match)
+        "mysql_vs_mariadb_match": match,
+    }
+
+    if "stratum" in q:
+        record["stratum"] = q["stratum"]
+
+    if "constrained_steps" in gen:
+        record["constrained_steps"] = gen["constrained_steps"]
+
+    if "cache_hit" in gen:
+        record["cache_hit"] = gen["cache_hit"]
+
+    # Speculative decoding stats (only present when a draft model is used)
+    for key in ("spec_draft_tokens", "spec_accepted_tokens", "spec_acceptance_rate", "spec_target_passes",
+                "spec_time_s", "greedy_time_s", "spec_speedup", "spec_identical"):
+        if key in gen:
+            record[key] = gen[key]
+
+    if repairs is not None:
+        if repairs.needs_repair(record, repair_state):
+            return repairs.schedule(model, q, record, repair_state)
+        finish_record(record, repair_state)
+
+    return record
+
+
+def _count_record(c: dict, record: dict) -> None:
+    """Update a model's counters from one written record (writer thread)."""
+    mysql_pred = record["mysql"]
+    maria_pred = record["mariadb"]
+
+    c["n"] += 1
+    if mysql_pred is not None and mysql_pred.get("success"):
+        c["ok_mysql"] += 1
+    if maria_pred is not None and maria_pred.get("success"):
+        c["ok_maria"] += 1
+    if mysql_pred is not None and maria_pred is not None and mysql_pred.get("success") and maria_pred.get("success"):
+        c["both_ok"] += 1
+    if record["mysql_vs_mariadb_match"]:
+        c["match"] += 1
+    if record["mysql_pred_vs_gold_match"]:
+        c["ex_mysql"] += 1
+    if record["mariadb_pred_vs_gold_match"]:
+        c["ex_maria"] += 1
+
+    if "spec_draft_tokens" in record:
+        c["spec_draft"] += record["spec_draft_tokens"]
+        c["spec_accepted"] += record["spec_accepted_tokens"]
+        c["spec_time"] += record["spec_time_s"]
+    if record.get("repair_attempts"):
+        c["repaired"] += 1
+        c["repair_attempts"] += record["repair_attempts"]
+        c["repair_tokens"] += record["repair_tokens"]
+        c["repair_gen_time"] += record["repair_gen_time_s"]
+        c["repair_fixed_exec"] += 1 if (primary_exec(record) or {}).get("success") else 0
+        c["repair_fixed_ex"] += 1 if primary_ex(record) else 0
+    if "greedy_time_s" in record:
+        c["greedy_time"] += record["greedy_time_s"]
+        c["spec_checked"] += 1
+        c["spec_identical"] += 1 if record.get("spec_identical") else 0
+
+
+def _db_seconds(record: dict) -> float:
+    """DB time spent on one record (pred + gold executions)."""
+    total = 0.0
+    for key in ("mysql", "mariadb", "mysql_gold", "mariadb_gold"):
+        res = record.get(key)
+        if res and res.get("execution_time_s"):
+            total += res["execution_time_s"]
+    return total
+
+
+def _print_record(record: dict) -> None:
+    mysql_pred = record["mysql"]
+    maria_pred = record["mariadb"]
+    mysql_exec_match = record["mysql_pred_vs_gold_match"]
+    maria_exec_match = record["mariadb_pred_vs_gold_match"]
+
+    mysql_status = "-" if mysql_pred is None else ("OK" if mysql_pred.get("success") else "FAIL")
+    maria_status = "-" if maria_pred is None else ("OK" if maria_pred.get("success") else "FAIL")
+    mysql_acc = "-" if mysql_exec_match is None else ("✔" if mysql_exec_match else "✘")
+    maria_acc = "-" if maria_exec_match is None else ("✔" if maria_exec_match else "✘")
+    print(
+        f"[{record['id']}] {record['model']} qsplit={record['query_split'] or '-'} "
+        f"ssplit={record['question_split'] or '-'} "
+        f"mysql={mysql_status}/{mysql_acc} maria={maria_status}/{maria_acc} ({record['gen_time_s']:.1f}s)"
+    )
+
+
+def _print_model_summary(model: str, c: dict, rdbms: str) -> None:
+    n = c["n"]
+    print(f"\n[{model}] questions: {n}")
+    if n == 0:
+        return
+    if rdbms in ("mysql", "both"):
+        print(f"  MySQL success rate:   {c['ok_mysql']}/{n} ({c['ok_mysql']/n*100:.1f}%)")
+        print(f"  MySQL EX:             {c['ex_mysql']}/{n} ({c['ex_mysql']/n*100:.1f}%)")
+    if rdbms in ("mariadb", "both"):
+        print(f"  MariaDB success rate: {c['ok_maria']}/{n} ({c['ok_maria']/n*100:.1f}%)")
+        print(f"  MariaDB EX:           {c['ex_maria']}/{n} ({c['ex_maria']/n*100:.1f}%)")
+    if rdbms == "both":
+        print(f"  Both succeeded:       {c['both_ok']}/{n} ({c['both_ok']/n*100:.1f}%)")
+        if c["both_ok"] > 0:
+            print(f"  Result match rate:    {c['match']}/{c['both_ok']} ({c['match']/c['both_ok']*100:.1f}%)")
+    if c["spec_draft"] > 0:
+        print(f"  Draft acceptance:     {c['spec_accepted']}/{c['spec_draft']} ({c['spec_accepted']/c['spec_draft']*100:.1f}%)")
+    if c["repaired"] > 0:
+        print(
+            f"  Repaired:             {c['repaired']} failed SQL, {c['repair_attempts']} retries -> "
+            f"{c['repair_fixed_exec']} executed, {c['repair_fixed_ex']} correct"
+        )
+        print(f"  Repair cost:          {c['repair_tokens']} tokens, {c['repair_gen_time']:.1f}s generation")
+    if c["spec_checked"] > 0 and c["spec_time"] > 0:
+        print(f"  Speculative speed-up: {c['greedy_time']/c['spec_time']:.2f}x vs greedy")
+        print(f"  Identical to greedy:  {c['spec_identical']}/{c['spec_checked']}")
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
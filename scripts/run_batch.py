@@ -0,0 +1,356 @@
+"""
+scripts/run_batch.py
+
+Batch Text2SQL over a JSONL of ad-hoc requests (production-style workload),
+with one model load for the whole file.
+
+Input: one JSON object per line
+
+    {"database": "advising", "question": "How many courses are there?", "gold_sql": "...", "id": "..."}
+
+(gold_sql and id are optional). The file is streamed in windows of
+--group_window requests; inside a window requests are grouped by database so
+consecutive generate_batch() calls see the same schema:
+
+  - the compact schema and DB connections are fetched once per database
+  - with --prefix_cache N the KV cache of the shared prompt prefix (header +
+    schema + question header) is computed once and reused by every batch of
+    that database (models/prefix_cache.py)
+
+Predicted SQL (and gold_sql when given) is executed on a pool of --db_workers
+threads (scripts/eval_pipeline.py) while the next batch is generated.
+Results are streamed to --out, one line per input line, in processing order
+(request_idx = input line number).
+
+Usage:
+  python scripts/run_batch.py --input requests/advising_questions.jsonl --model qwen1.5b \
+      --batch_size 8 --prefix_cache 2 --out results/batch_qwen1.5b.jsonl
+"""
+
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+# Add project root to path for imports
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from database.db_manager import DatabaseManager
+from models.generation_cache import generation_times
+from models.registry import available_models, build_agent, register_agent
+from scripts.checkpoint import CheckpointWriter
+from scripts.eval_pipeline import EvalPipeline
+from scripts.sql_utils import normalize_pred_sql, pack_exec_result, results_match
+
+
+def iter_requests(path: Path, limit: int = 0):
+    """Yield (request_idx, request dict or None, error) per non-empty input line."""
+    with path.open("r", encoding="utf-8") as f:
+        idx = 0
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            if limit and idx >= limit:
+                return
+            try:
+                req = json.loads(line)
+            except json.JSONDecodeError as e:
+                yield idx, None, f"invalid JSON: {e}"
+            else:
+                if not isinstance(req, dict) or not req.get("database") or not req.get("question"):
+                    yield idx, None, "request needs 'database' and 'question'"
+                else:
+                    yield idx, req, None
+            idx += 1
+
+
+def iter_groups(requests, window: int, batch_size: int):
+    """
+    Read `window` requests at a time and yield (database, batch) with the
+    window's requests grouped by database (first-seen order), plus invalid
+    requests as (None, [(idx, None, error)]).
+    """
+    buf = []
+
+    def flush():
+        groups: dict[str, list] = {}
+        for item in buf:
+            if item[1] is None:
+                yield None, [item]
+            else:
+                groups.setdefault(item[1]["database"], []).append(item)
+        for database, items in groups.items():
+            for i in range(0, len(items), batch_size):
+                yield database, items[i:i + batch_size]
+
+    for item in requests:
+        buf.append(item)
+        if len(buf) >= window:
+            yield from flush()
+            buf = []
+    if buf:
+        yield from flush()
+
+
+class _Databases:
+    """Schema + connections per database, created on first use."""
+
+    def __init__(self, rdbms: str, max_tables: int, execute: bool):
+        self.rdbms = rdbms
+        self.max_tables = max_tables
+        self.execute = execute
+        self._schemas: dict[str, tuple[str, list[str]]] = {}
+        self._conns: dict[str, DatabaseManager] = {}
+
+    def schema(self, database: str) -> tuple[str, list[str]]:
+        if database not in self._schemas:
+            # schema introspection always goes through MySQL, as in run_baseline.py
+            helper = DatabaseManager("mysql", database)
+            self._schemas[database] = (helper.get_compact_schema(max_tables=self.max_tables), helper.get_table_names())
+            helper.close()
+        return self._schemas[database]
+
+    def conn(self, database: str) -> DatabaseManager | None:
+        if not self.execute:
+            return None
+        if database not in self._conns:
+            self._conns[database] = DatabaseManager(self.rdbms, database)
+        return self._conns[database]
+
+    def close(self) -> None:
+        for db in self._conns.values():
+            db.close()
+
+
+def evaluate_request(idx: int, req: dict, gen: dict, gen_time: float, schema_tables: list[str], db) -> dict:
+    """Normalize + execute one prediction (and gold_sql if given); runs on a DB worker thread."""
+    if gen is None:
+        # invalid input line: keep its slot in the output
+        return {"request_idx": idx, "error": req["error"]}
+
+    pred_sql = normalize_pred_sql(gen["sql"], schema_tables)
+    gold_sql = req.get("gold_sql")
+
+    pred_res = db.execute_query(pred_sql) if db is not None else None
+    gold_res = db.execute_query(gold_sql) if db is not None and gold_sql else None
+
+    return {
+        "request_idx": idx,
+        "id": req.get("id"),
+        "database": req["database"],
+        "question": req["question"],
+        "pred_sql_raw": gen["sql"],
+        "pred_sql": pred_sql,
+        "gold_sql": gold_sql,
+        "gen_time_s": round(gen_time, 4),
+        "prompt_tokens": gen.get("prompt_tokens"),
+        "output_tokens": gen.get("output_tokens"),
+        "prefix_cached_tokens": gen.get("prefix_cached_tokens", 0),
+        "cache_hit": gen.get("cache_hit"),
+        "exec": pack_exec_result(pred_res),
+        "gold_exec": pack_exec_result(gold_res),
+        "pred_vs_gold_match": results_match(pred_res, gold_res),
+    }
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--input",
+        type=str,
+        required=True,
+        help="JSONL of {database, question, [gold_sql], [id]} requests.",
+    )
+    parser.add_argument(
+        "--out",
+        type=str,
+        default="results/batch_{model}.jsonl",
+        help="Output JSONL ({model} is replaced).",
+    )
+    parser.add_argument(
+        "--model",
+        type=str,
+        default="gpt2xl",
+        help=f"Model name. Available: {', '.join(available_models())}",
+    )
+    parser.add_argument(
+        "--rdbms",
+        type=str,
+        default="mysql",
+        choices=["mysql", "mariadb"],
+        help="RDBMS to execute predictions on.",
+    )
+    parser.add_argument(
+        "--no_execute",
+        action="store_true",
+        help="Only generate SQL (no DB execution).",
+    )
+    parser.add_argument(
+        "--limit",
+        type=int,
+        default=0,
+        help="Max requests to read (0 = all).",
+    )
+    parser.add_argument(
+        "--batch_size",
+        type=int,
+        default=8,
+        help="Requests per generate_batch() call (same database).",
+    )
+    parser.add_argument(
+        "--group_window",
+        type=int,
+        default=256,
+        help="Requests read ahead and grouped by database.",
+    )
+    parser.add_argument(
+        "--max_tables",
+        type=int,
+        default=12,
+        help="Max tables to include in compact schema.",
+    )
+    parser.add_argument(
+        "--max_new_tokens",
+        type=int,
+        default=0,
+        help="Max tokens to generate for SQL (0 = model default).",
+    )
+    parser.add_argument(
+        "--prefix_cache",
+        type=int,
+        default=2,
+        help="Shared-prefix KV caches kept in memory (one per database; 0 = off).",
+    )
+    parser.add_argument(
+        "--cache",
+        type=str,
+        default="",
+        help="SQLite generation cache path (see run_baseline.py --cache).",
+    )
+    parser.add_argument(
+        "--db_workers",
+        type=int,
+        default=4,
+        help="DB worker threads for SQL execution.",
+    )
+    parser.add_argument(
+        "--max_pending",
+        type=int,
+        default=64,
+        help="Max generated requests waiting for DB execution.",
+    )
+    parser.add_argument(
+        "--server",
+        type=str,
+        default="",
+        help="URL of a running inference server for --model (scripts/serve_agent.py).",
+    )
+    args = parser.parse_args(argv)
+
+    in_path = Path(args.input)
+    if not in_path.exists():
+        print(f"❌ Input not found: {in_path}")
+        return 1
+    if args.server:
+        register_agent(args.model, "models.inference_server:RemoteAgent", url=args.server)
+    out_path = Path(args.out.replace("{model}", args.model))
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+
+    print("📦 Batch Text2SQL")
+    print("=" * 70)
+    print(f"Input: {in_path}")
+    print(f"Output: {out_path}")
+    print(f"Model: {args.model}{' @ ' + args.server if args.server else ''}")
+    print(f"Batch size: {args.batch_size} (grouping window: {args.group_window})")
+    print(f"Prefix KV cache: {args.prefix_cache or 'off'}")
+    print(f"Execution: {'off' if args.no_execute else args.rdbms} (DB workers: {args.db_workers})")
+    print("=" * 70)
+
+    try:
+        agent = build_agent(args.model, generation_cache=args.cache or None, prefix_cache=args.prefix_cache)
+    except ValueError as e:
+        print(f"❌ {e}")
+        return 1
+
+    dbs = _Databases(args.rdbms, args.max_tables, execute=not args.no_execute)
+    writer = CheckpointWriter(out_path, append=False, fsync_every=256)
+    counts = {"n": 0, "invalid": 0, "ok": 0, "with_gold": 0, "ex": 0, "per_db": {}}
+
+    def on_record(_stream: str, record: dict) -> None:
+        writer.write(record)
+        if "error" in record:
+            counts["invalid"] += 1
+            print(f"⚠️  [{record['request_idx']}] {record['error']}")
+            return
+        counts["n"] += 1
+        counts["per_db"][record["database"]] = counts["per_db"].get(record["database"], 0) + 1
+        if record["exec"] and record["exec"]["success"]:
+            counts["ok"] += 1
+        if record["gold_sql"]:
+            counts["with_gold"] += 1
+            counts["ex"] += bool(record["pred_vs_gold_match"])
+        status = "-" if record["exec"] is None else ("OK" if record["exec"]["success"] else "FAIL")
+        match = record["pred_vs_gold_match"]
+        acc = "-" if match is None else ("✔" if match else "✘")
+        print(f"[{record['request_idx']}] {record['database']} {status}/{acc} ({record['gen_time_s']:.2f}s)")
+
+    max_new_tokens = args.max_new_tokens or None
+    gen_time_total = 0.0
+    tokens_total = 0
+    t_start = time.time()
+    pipeline = EvalPipeline(evaluate_request, on_record, db_workers=args.db_workers, max_pending=args.max_pending)
+    try:
+        requests = iter_requests(in_path, args.limit)
+        for database, batch in iter_groups(requests, max(1, args.group_window), max(1, args.batch_size)):
+            if database is None:
+                idx, _, error = batch[0]
+                pipeline.submit("batch", idx, {"error": error}, None, 0.0, [], None)
+                continue
+
+            schema_compact, schema_tables = dbs.schema(database)
+            t0 = time.time()
+            gens = agent.generate_batch(
+                [(schema_compact, req["question"]) for _, req, _ in batch],
+                max_new_tokens=max_new_tokens,
+            )
+            gen_time = time.time() - t0
+            gen_time_total += gen_time
+            tokens_total += sum(g.get("output_tokens") or 0 for g in gens if not g.get("cache_hit"))
+
+            db = dbs.conn(database)
+            for (idx, req, _), gen, row_time in zip(batch, gens, generation_times(gen_time, gens)):
+                pipeline.submit("batch", idx, req, gen, row_time, schema_tables, db)
+    finally:
+        pipeline.close()
+        writer.close()
+        dbs.close()
+
+    wall_time = time.time() - t_start
+    n = counts["n"]
+    print("\n" + "=" * 70)
+    print("📊 Summary")
+    print("=" * 70)
+    print(f"Requests: {n} ({counts['invalid']} invalid) over {len(counts['per_db'])} database(s)")
+    for database, k in sorted(counts["per_db"].items()):
+        print(f"  {database}: {k}")
+    if n and not args.no_execute:
+        print(f"Execution success: {counts['ok']}/{n} ({counts['ok']/n*100:.1f}%)")
+    if counts["with_gold"]:
+        print(f"EX (requests with gold_sql): {counts['ex']}/{counts['with_gold']} ({counts['ex']/counts['with_gold']*100:.1f}%)")
+    prefix_cache = getattr(agent, "prefix_cache", None)
+    if prefix_cache is not None:
+        stats = prefix_cache.stats()
+        print(f"Prefix KV cache: {stats['hits']} hits, {stats['misses']} misses, {stats['tokens_saved']} prompt tokens reused")
+    if wall_time > 0:
+        print(
+            f"⏱️  Throughput: {n / wall_time:.2f} requests/s | {tokens_total / gen_time_total if gen_time_total else 0:.1f} "
+            f"output tokens/s | generation: {gen_time_total:.1f}s | wall: {wall_time:.1f}s"
+        )
+    print(f"✅ Wrote results to: {out_path}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
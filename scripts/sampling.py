@@ -0,0 +1,250 @@
+"""
+scripts/sampling.py
+
+Stratified sequential sampling for the baseline runner (--sample).
+
+Questions are grouped into strata (complexity bucket of the gold SQL x
+question split by default) and drawn without replacement, in a seeded random
+order. After every result the per-stratum execution accuracy (EX) and its
+confidence interval are updated; a stratum stops being sampled once its CI
+is narrower than the target width for every model (or it is exhausted).
+
+The overall EX is the population-weighted (stratified) estimate, with a
+normal-approximation CI that includes the finite-population correction.
+
+CIs:
+  wilson     - Wilson score interval (default; good for small n and p near 0/1)
+  bootstrap  - percentile bootstrap over the stratum's outcomes
+"""
+
+import math
+import random
+import threading
+
+from scripts.sql_utils import fill_gold_sql, infer_sql_complexity
+
+
+def wilson_interval(k: int, n: int, z: float = 1.96) -> tuple[float, float]:
+    """Wilson score interval for k successes out of n."""
+    if n == 0:
+        return 0.0, 1.0
+    p = k / n
+    denom = 1 + z * z / n
+    center = (p + z * z / (2 * n)) / denom
+    half = z * math.sqrt(p * (1 - p) / n + z * z / (4 * n * n)) / denom
+    return max(0.0, center - half), min(1.0, center + half)
+
+
+def bootstrap_interval(
+    outcomes: list[bool],
+    iters: int = 1000,
+    alpha: float = 0.05,
+    rng: random.Random | None = None,
+) -> tuple[float, float]:
+    """Percentile bootstrap interval of the mean of 0/1 outcomes."""
+    n = len(outcomes)
+    if n == 0:
+        return 0.0, 1.0
+    rng = rng or random.Random(0)
+    k = sum(outcomes)
+    # resampling 0/1 outcomes = drawing n Bernoulli(k/n) values
+    p = k / n
+    means = sorted(sum(1 for _ in range(n) if rng.random() < p) / n for _ in range(iters))
+    lo = means[max(0, int(math.floor(alpha / 2 * iters)))]
+    hi = means[min(iters - 1, int(math.ceil((1 - alpha / 2) * iters)) - 1)]
+    return lo, hi
+
+
+def question_stratum(q: dict, by: tuple[str, ...] = ("complexity", "split")) -> str:
+    """Stratum label of a runner question, e.g. 'medium|test'."""
+    parts = []
+    for dim in by:
+        if dim == "complexity":
+            parts.append(infer_sql_complexity(fill_gold_sql(q["entry"], q["sentence"])))
+        elif dim == "split":
+            parts.append(q["question_split"] or q["query_split"] or "-")
+        else:
+            raise ValueError(f"Unknown stratification dimension: {dim!r}")
+    return "|".join(parts)
+
+
+def interleave_strata(
+    questions: list[dict],
+    strata_by: tuple[str, ...] = ("complexity", "split"),
+    seed: int = 0,
+) -> list[dict]:
+    """
+    Reorder questions round-robin across strata (seeded shuffle inside each),
+    so any prefix of the result covers every stratum. The runner writes records
+    in this order, not by id (merge_shards.py sorts such shards).
+    """
+    rng = random.Random(seed)
+    groups: dict[str, list[dict]] = {}
+    for q in questions:
+        groups.setdefault(question_stratum(q, strata_by), []).append(q)
+    for qs in groups.values():
+        rng.shuffle(qs)
+
+    out = []
+    queues = [qs for _, qs in sorted(groups.items())]
+    while queues:
+        for qs in queues:
+            out.append(qs.pop())
+        queues = [qs for qs in queues if qs]
+    return out
+
+
+class StratifiedSampler:
+    """
+    Questions come out in sampling order, not by id, and so do the runner's
+    records (merge_shards.py sorts such shards before merging).
+
+    Args:
+        questions: runner question dicts (not yet evaluated)
+        models: model names; every model must reach the target in a stratum
+        target_width: stop a stratum once (hi - lo) <= target_width
+        min_per_stratum: never stop a stratum before this many results
+        ci_method: 'wilson' or 'bootstrap'
+        strata_by: stratification dimensions ('complexity', 'split')
+        seed: sampling order seed
+    """
+
+    def __init__(
+        self,
+        questions: list[dict],
+        models: list[str],
+        target_width: float = 0.1,
+        min_per_stratum: int = 10,
+        ci_method: str = "wilson",
+        strata_by: tuple[str, ...] = ("complexity", "split"),
+        seed: int = 0,
+    ):
+        if ci_method not in ("wilson", "bootstrap"):
+            raise ValueError(f"Unknown CI method: {ci_method!r}")
+        self.models = list(models)
+        self.target_width = target_width
+        self.min_per_stratum = min_per_stratum
+        self.ci_method = ci_method
+        self.strata_by = tuple(strata_by)
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+        # stratum -> questions left to draw (shuffled once)
+        self._pool: dict[str, list[dict]] = {}
+        for q in questions:
+            q["stratum"] = question_stratum(q, self.strata_by)
+            self._pool.setdefault(q["stratum"], []).append(q)
+        for qs in self._pool.values():
+            self._rng.shuffle(qs)
+
+        self.population = {s: len(qs) for s, qs in self._pool.items()}
+        # (model, stratum) -> list of 0/1 outcomes
+        self._outcomes: dict[tuple[str, str], list[bool]] = {}
+        self._drawn = {s: 0 for s in self._pool}
+        # (method, k, n) -> interval; bootstrap is not free and next_batch asks often
+        self._ci_cache: dict[tuple, tuple[float, float]] = {}
+
+    def discard(self, predicate) -> None:
+        """Remove questions that need no evaluation (e.g. done before a resume)."""
+        for s, qs in self._pool.items():
+            self._pool[s] = [q for q in qs if not predicate(q)]
+
+    def observe(self, model: str, stratum: str, correct: bool) -> None:
+        """Record one result (thread-safe: called from the writer thread)."""
+        with self._lock:
+            self._outcomes.setdefault((model, stratum), []).append(bool(correct))
+
+    def interval(self, model: str, stratum: str) -> tuple[float, float]:
+        with self._lock:
+            outcomes = list(self._outcomes.get((model, stratum), []))
+        key = (self.ci_method, sum(outcomes), len(outcomes))
+        if key not in self._ci_cache:
+            if self.ci_method == "bootstrap":
+                self._ci_cache[key] = bootstrap_interval(outcomes, rng=random.Random(len(outcomes)))
+            else:
+                self._ci_cache[key] = wilson_interval(sum(outcomes), len(outcomes))
+        return self._ci_cache[key]
+
+    def _n(self, model: str, stratum: str) -> int:
+        with self._lock:
+            return len(self._outcomes.get((model, stratum), []))
+
+    def converged(self, stratum: str) -> bool:
+        """Target reached for every model, or nothing left to draw."""
+        if not self._pool.get(stratum):
+            return True
+        for model in self.models:
+            if self._n(model, stratum) < self.min_per_stratum:
+                return False
+            lo, hi = self.interval(model, stratum)
+            if hi - lo > self.target_width:
+                return False
+        return True
+
+    def next_batch(self, size: int) -> list[dict]:
+        """
+        Draw up to `size` questions from the open strata, widest CI first
+        (round-robin among ties), so effort goes where uncertainty is largest.
+        Returns [] when every stratum has converged.
+
+        Results still in flight (pipeline) are not known yet, so a stratum may
+        be over-sampled by up to one pipeline's worth of questions.
+        """
+        open_strata = [s for s in self._pool if not self.converged(s)]
+        if not open_strata:
+            return []
+
+        def width(s: str) -> float:
+            return max(self.interval(m, s)[1] - self.interval(m, s)[0] for m in self.models)
+
+        open_strata.sort(key=lambda s: (-width(s), self._drawn[s]))
+        batch = []
+        while len(batch) < size and open_strata:
+            for s in list(open_strata):
+                if len(batch) >= size:
+                    break
+                if not self._pool[s]:
+                    open_strata.remove(s)
+                    continue
+                batch.append(self._pool[s].pop())
+                self._drawn[s] += 1
+        return batch
+
+    def report(self, model: str) -> dict:
+        """Per-stratum EX + CI and the stratified overall estimate for one model."""
+        total = sum(self.population.values())
+        strata = []
+        est = 0.0
+        var = 0.0
+        n_total = 0
+        for s in sorted(self.population):
+            with self._lock:
+                outcomes = list(self._outcomes.get((model, s), []))
+            n, k = len(outcomes), sum(outcomes)
+            lo, hi = self.interval(model, s)
+            N = self.population[s]
+            strata.append({
+                "stratum": s, "population": N, "n": n, "correct": k,
+                "ex": k / n if n else None, "ci_low": lo, "ci_high": hi,
+            })
+            n_total += n
+            if n and total:
+                w = N / total
+                p = k / n
+                est += w * p
+                fpc = (N - n) / (N - 1) if N > 1 else 0.0
+                var += w * w * p * (1 - p) / n * fpc
+
+        half = 1.96 * math.sqrt(var)
+        covered = all(row["n"] > 0 for row in strata if row["population"] > 0)
+        return {
+            "model": model,
+            "ci_method": self.ci_method,
+            "target_width": self.target_width,
+            "evaluated": n_total,
+            "population": total,
+            "ex": est if covered else None,
+            "ci_low": max(0.0, est - half) if covered else None,
+            "ci_high": min(1.0, est + half) if covered else None,
+            "strata": strata,
+        }
@@ -0,0 +1,44 @@
+"""
+scripts/serve_agent.py
+
+Start a local inference server for one registered agent, so several runner
+processes can share a single loaded model.
+
+Example:
+  python scripts/serve_agent.py --model gpt2xl --port 8765 --max_batch 8 --max_wait_ms 20
+  python scripts/run_baseline.py --models gpt2xl --server gpt2xl=http://127.0.0.1:8765
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+# Add project root to path for imports
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from models.inference_server import DEFAULT_HOST, DEFAULT_PORT, serve
+from models.registry import available_models, build_agent
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--model", type=str, required=True, help=f"Model name. Available: {', '.join(available_models())}")
+    parser.add_argument("--host", type=str, default=DEFAULT_HOST, help="Bind address (keep it on localhost).")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--max_batch", type=int, default=8, help="Max requests per generate_batch() call.")
+    parser.add_argument("--max_wait_ms", type=float, default=20.0, help="Max time to wait for a batch to fill up.")
+    parser.add_argument("--cache", type=str, default="", help="SQLite generation cache path shared with the runner.")
+    args = parser.parse_args()
+
+    try:
+        agent = build_agent(args.model, generation_cache=args.cache or None)
+    except ValueError as e:
+        print(f"❌ {e}")
+        return 1
+
+    serve(agent, host=args.host, port=args.port, max_batch=args.max_batch, max_wait_ms=args.max_wait_ms)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
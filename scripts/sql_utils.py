@@ -4,8 +4,13 @@ SQL utilities for Text2SQL evaluation.
 
 - fill_gold_sql: materialize gold SQL with concrete values
 - normalize_pred_sql: minor normalization so SQL executes reliably
+- compare_results / results_match: execution-accuracy comparison
+- pack_exec_result: JSON-serializable summary of an execute_query() result
+- result_fingerprint: order-insensitive hash of a result table
+- infer_sql_complexity: simple/medium/complex bucket of a SQL query
 """
 
+import hashlib
 import re
 
 
@@ -116,6 +121,62 @@ def compare_results(result1, result2) -> bool:
     except Exception:
         return False
 
+def results_match(res_a: dict | None, res_b: dict | None) -> bool | None:
+    """
+    Compare two execute_query() results.
+
+    Return:
+      - True/False if both succeeded and have DataFrame results
+      - None if not comparable (e.g., one failed, or no tabular results)
+    """
+    if not res_a or not res_b:
+        return None
+    if not res_a.get("success") or not res_b.get("success"):
+        return None
+
+    df_a = res_a.get("result")
+    df_b = res_b.get("result")
+    if df_a is None or df_b is None:
+        return None
+
+    return compare_results(df_a, df_b)
+
+
+def result_fingerprint(df) -> str | None:
+    """
+    Hash of a result DataFrame that ignores row and column order
+    (same notion of equality as compare_results, values compared as text).
+    """
+    if df is None:
+        return None
+    # column positions sorted by name (duplicate names are fine)
+    order = sorted(range(len(df.columns)), key=lambda i: str(df.columns[i]))
+    cols = [str(df.columns[i]) for i in order]
+    rows = sorted(
+        tuple("__NULL__" if row[i] is None or row[i] != row[i] else str(row[i]) for i in order)
+        for row in df.itertuples(index=False, name=None)
+    )
+    h = hashlib.sha1(repr((cols, rows)).encode("utf-8"))
+    return h.hexdigest()[:16]
+
+
+def pack_exec_result(res: dict | None):
+    """Keep only the JSON-serializable parts of an execute_query() result."""
+    if res is None:
+        return None
+    fingerprint = res.get("fingerprint")
+    if fingerprint is None and res.get("success"):
+        fingerprint = result_fingerprint(res.get("result"))
+    return {
+        "success": res.get("success"),
+        "execution_time_s": res.get("execution_time"),
+        "rows": res.get("rows_affected"),
+        "rows_examined": res.get("rows_examined"),
+        "error": res.get("error"),
+        "fingerprint": fingerprint,
+    }
+
+
 def compare_db_results(mysql_result, mariadb_result):
     """
     Compare results from MySQL and MariaDB
@@ -151,4 +212,24 @@ def compare_db_results(mysql_result, mariadb_result):
             mysql_result['execution_time'] - 
             mariadb_result['execution_time']
         )
-    }
\ No newline at end of file
+    }
+
+
+def infer_sql_complexity(sql: str) -> str:
+    """
+    Heuristic complexity bucket:
+      simple: no JOIN and no subquery
+      medium: <=2 JOIN and <=1 subquery
+      complex: otherwise
+    """
+    if not sql:
+        return "unknown"
+    s = sql.upper()
+    join_count = s.count("JOIN")
+    subquery_count = max(0, s.count("SELECT") - 1)
+
+    if join_count == 0 and subquery_count == 0:
+        return "simple"
+    if join_count <= 2 and subquery_count <= 1:
+        return "medium"
+    return "complex"